@@ -1,15 +1,18 @@
 
-from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding, AzureChatCompletion
-from openai import AzureOpenAI
+from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+from openai import AsyncAzureOpenAI
 from dotenv import load_dotenv
-from azure.cosmos import CosmosClient, PartitionKey
+from services.cosmos_client import CosmosResources, get_cosmos_resources
+from services.llm_resilience import (
+    DeploymentPool, RetryPolicy, call_with_retries, create_chat_service, deployment_configs
+)
 import os
 import json
 
 load_dotenv(dotenv_path='../../.env.dev')
 
 class AzureService:
-    def __init__(self):
+    def __init__(self, cosmos: CosmosResources = None):
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
         self.api_base = os.getenv("AZURE_OPENAI_ENDPOINT")
         self.api_version = os.getenv("AZURE_OPENAI_API_VERSION")
@@ -18,29 +21,38 @@ class AzureService:
         self.cosmos_db = os.getenv("COSMOS_DB")
         self.cosmos_container = os.getenv("COSMOS_CONTAINER")
 
-        self.client = AzureOpenAI(
-            api_key=self.api_key,
-            api_version=self.api_version,
-            azure_endpoint=self.api_base
-        )
-        
-        
-        self.chat_client = AzureChatCompletion(
-            deployment_name='chat-completion',
-            api_version="2025-01-01-preview",
-            endpoint=self.api_base,
-            api_key=self.api_key,
-        )
+        # Retries are left to the retry policy, which honors retry-after and the turn deadline
+        self.retry_policy = RetryPolicy.from_env()
+
+        # Extraction requests are load balanced over the deployments in AZURE_OPENAI_DEPLOYMENTS, if several
+        self.deployments = DeploymentPool.from_env([
+            (config.name, (AsyncAzureOpenAI(
+                api_key=config.api_key,
+                api_version=self.api_version,
+                azure_endpoint=config.endpoint,
+                max_retries=0
+            ), config.deployment))
+            for config in deployment_configs()
+        ])
+        self.client = self.deployments.members[0][1][0]
+
+        # Slow extraction requests are also sent to the hedge deployment when one is configured
+        self.hedge_deployment = os.getenv("LLM_HEDGE_DEPLOYMENT")
+        self.hedge_client = None
+        if len(self.deployments) == 1 and self.hedge_deployment and self.retry_policy.hedge_after_seconds is not None:
+            self.hedge_client = AsyncAzureOpenAI(
+                api_key=os.getenv("AZURE_OPENAI_HEDGE_API_KEY", self.api_key),
+                api_version=self.api_version,
+                azure_endpoint=os.getenv("AZURE_OPENAI_HEDGE_ENDPOINT", self.api_base),
+                max_retries=0
+            )
+
+        self.chat_client = create_chat_service()
         self.conversation_history = []  # Initialize conversation history
 
-        # Initialize CosmosDB client
-        self.cosmos_client = CosmosClient(self.cosmos_endpoint, self.cosmos_key)
-        self.database = self.cosmos_client.create_database_if_not_exists(id=self.cosmos_db)
-        self.container = self.database.create_container_if_not_exists(
-            id=self.cosmos_container,
-            partition_key=PartitionKey(path="/session_id"),
-            offer_throughput=400
-        )
+        # CosmosDB container on the shared async client
+        self.cosmos = cosmos or get_cosmos_resources()
+        self.container = self.cosmos.get_container(self.cosmos_db, self.cosmos_container)
 
     # Add or update the get_information method to handle document intelligence output
     async def get_information(self, document_text: str) -> dict:
@@ -69,14 +81,30 @@ class AzureService:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="chat-completion",
-                temperature=0.0,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": f"Extract prescription information from this text:\n\n{document_text}"}
-                ],
-                response_format={"type": "json_object"}
+            messages = [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": f"Extract prescription information from this text:\n\n{document_text}"}
+            ]
+
+            def request(target):
+                client, deployment = target
+                return client.chat.completions.create(
+                    model=deployment,
+                    temperature=0.0,
+                    messages=messages,
+                    response_format={"type": "json_object"}
+                )
+
+            def send():
+                return self.deployments.run(request)
+
+            hedge = None
+            if self.hedge_client:
+                hedge = lambda: request((self.hedge_client, self.hedge_deployment))
+            elif len(self.deployments) > 1:
+                hedge = send
+            response = await call_with_retries(
+                "get_information", send, self.retry_policy, hedge=hedge, retry_after=self.deployments.retry_after
             )
             
             json_response = json.loads(response.choices[0].message.content)
@@ -1,6 +1,8 @@
+import asyncio
 import os
 import sys
 import json
+from dataclasses import dataclass, field
 from datetime import datetime, date
 from typing import List
 from pydantic import BaseModel, Field
@@ -9,14 +11,29 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
  
 from dotenv import load_dotenv
 from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.functions import kernel_function
-from azure.cosmos import CosmosClient, PartitionKey
-from guided_conversation.plugins.guided_conversation_agent import GuidedConversation
+from azure.cosmos.exceptions import CosmosBatchOperationError
+from guided_conversation.plugins.guided_conversation_agent import AgendaMode, GuidedConversation, PlanMode
+from guided_conversation.utils.prompt_functions import PromptLayout
 from guided_conversation.utils.resources import ResourceConstraint, ResourceConstraintMode, ResourceConstraintUnit
 from .azure_models import AzureService
 from guided_conversation.plugins.document_upload_plugin import DocumentUploadPlugin
 from guided_conversation.plugins.artifact_handler import ArtifactHandler, get_artifact_handler
+from guided_conversation.utils.conversation_helpers import ConversationMessageType
+from guided_conversation.utils.events import EventCallback, StepEvent, emit_event
+from guided_conversation.utils.history_window import HistoryWindow
+from guided_conversation.utils import snapshot
+from guided_conversation.utils.snapshot import SnapshotFormat, decode_snapshot, encode_snapshot
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from services.cosmos_client import CosmosResources, get_cosmos_resources
+from services.llm_resilience import RetryPolicy, create_chat_service, llm_deadline
+from services.session_store import create_session_store
+from . import session_documents
+from .field_extraction import extract_health_fields
+from .session_pool import (
+    SessionPool, SessionSweeper, DEFAULT_IDLE_TTL_SECONDS, DEFAULT_MAX_BYTES, DEFAULT_MAX_SESSIONS,
+    DEFAULT_SWEEP_INTERVAL_SECONDS,
+)
  
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../.env.dev"))
  
@@ -28,29 +45,44 @@ class HealthArtifact(BaseModel):
     no_of_days_of_medicine: str = Field(default="")
     primary_email: str = Field(default="")
  
+@dataclass
+class ConversationSession:
+    """
+    Per-session state kept in the session pool and persisted to the session store after every turn.
+    """
+    engine: GuidedConversation
+    history: list = field(default_factory=list)
+    revision: int = 0
+    # Set after a turn is saved to a shared store, since another worker may take the next turn
+    needs_refresh: bool = False
+    # Set while the latest turn has not reached the session store, so eviction must flush it
+    dirty: bool = False
+    # How much of `history` is already in Cosmos DB, and whether the session summary exists there
+    persisted_messages: int = 0
+    summary_saved: bool = False
+    # Kept here so a chat turn can write the session document without reading it first
+    uploaded_files: list = field(default_factory=list)
+    # Save still running after the reply was returned; awaited before the session is used or evicted
+    pending_save: asyncio.Task | None = None
+ 
 def kernel_plugin(cls):
     cls.__kernel_plugin__ = True
     return cls
  
 @kernel_plugin
 class DataCollectionAgent:
-    def __init__(self):
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    def __init__(self, cosmos: CosmosResources = None):
         self.kernel = Kernel()
         document_intelligence_endpoint = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
         document_intelligence_api_key = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
 
-        chat_service = AzureChatCompletion(
-            deployment_name='chat-completion',
-            api_version="2025-01-01-preview",
-            endpoint=endpoint,
-            api_key=api_key,
-            service_id="data_collection_service",
-        )
+        # Throttled and transient failures are retried, and optionally hedged, by the chat service
+        chat_service = create_chat_service(service_id="data_collection_service")
         self.kernel.add_service(chat_service)
+        self.llm_turn_deadline = RetryPolicy.from_env().turn_deadline_seconds
  
-        self.azure_service = AzureService()
+        cosmos = cosmos or get_cosmos_resources()
+        self.azure_service = AzureService(cosmos=cosmos)
         self.document_plugin = DocumentUploadPlugin(document_intelligence_endpoint, document_intelligence_api_key)
  
         self.context = "You're a health assistant collecting prescription details."
@@ -66,32 +98,298 @@ class DataCollectionAgent:
             "Stay strictly within prescription-related details."
         ]
  
+        # Opt-in single-call planning halves the model round trips per step (GC_PLAN_MODE=single_call)
+        self.plan_mode = PlanMode(os.getenv("GC_PLAN_MODE", PlanMode.TWO_STEP.value))
+        # Shared instructions first, so the endpoint can serve them from its prompt cache (GC_PROMPT_LAYOUT=cache_friendly)
+        self.prompt_layout = PromptLayout(os.getenv("GC_PROMPT_LAYOUT", PromptLayout.INTERLEAVED.value))
+        # Opt-in: obvious values (email, duration, times, name) fill unanswered fields without a model call
+        # (GC_FAST_PATH_EXTRACTION=true)
+        fast_path = os.getenv("GC_FAST_PATH_EXTRACTION", "false").lower() == "true"
+        self.field_extractor = extract_health_fields if fast_path else None
+        # Agenda updates can finish after the reply is sent (GC_AGENDA_MODE=background)
+        self.agenda_mode = AgendaMode(os.getenv("GC_AGENDA_MODE", AgendaMode.INLINE.value))
+        # Cap the conversation history in prompts at GC_HISTORY_MAX_TOKENS tokens (unset: whole history)
+        history_max_tokens = os.getenv("GC_HISTORY_MAX_TOKENS")
+        self.history_window = HistoryWindow(
+            max_tokens=int(history_max_tokens),
+            recent_turns=int(os.getenv("GC_HISTORY_RECENT_TURNS", "3")),
+        ) if history_max_tokens else None
+
         self.resource_constraint = ResourceConstraint(
             quantity=15,
             unit=ResourceConstraintUnit.TURNS,
             mode=ResourceConstraintMode.MAXIMUM,
         )
  
-        self.guided_conversation_agent = GuidedConversation(
-            kernel=self.kernel,
+        # Conversation state is saved to the session store after every turn so any worker can serve a session
+        default_format = SnapshotFormat.MSGPACK if snapshot.msgpack is not None else SnapshotFormat.JSON
+        self.snapshot_format = SnapshotFormat(os.getenv("SESSION_SNAPSHOT_FORMAT", default_format.value))
+        self.session_store = create_session_store(
+            encode=lambda state: encode_snapshot(state, self.snapshot_format),
+            decode=decode_snapshot,
+            cosmos=cosmos,
+        )
+
+        # One GuidedConversation per session, bounded by count and estimated memory
+        self.conversation_history = {}
+        self.session_pool = SessionPool(
+            factory=self._create_session,
+            loader=self._load_session,
+            on_evict=self._on_session_evicted,
+            size_of=self._estimate_session_bytes,
+            max_sessions=int(os.getenv("GC_POOL_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)),
+            max_bytes=int(os.getenv("GC_POOL_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+        # Idle sessions are flushed and dropped by a background sweeper started with the app, which also
+        # expires their state from the in-memory session store
+        self.session_sweeper = SessionSweeper(
+            self.session_pool,
+            ttl_seconds=float(os.getenv("SESSION_IDLE_TTL_SECONDS", DEFAULT_IDLE_TTL_SECONDS)),
+            interval_seconds=float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", DEFAULT_SWEEP_INTERVAL_SECONDS)),
+            store=self.session_store,
+        )
+ 
+        # Cosmos DB setup explicitly
+        self.persistence_mode = session_documents.get_persistence_mode()
+        self.container = cosmos.get_container(
+            "HealthConversations", "ExtractedDetails", indexing_policy=session_documents.SESSION_INDEXING_POLICY
+        )
+
+    def _create_engine_kernel(self) -> Kernel:
+        """
+        A kernel for one session's engine. GuidedConversation registers its tools bound to the session's
+        artifact and agenda, so each engine gets a clone sharing the chat service but not the registrations.
+        """
+        return self.kernel.clone()
+
+    def _create_guided_conversation(self, session_id: str = None) -> GuidedConversation:
+        """
+        Build a fresh GuidedConversation engine for a single session.
+        """
+        return GuidedConversation(
+            kernel=self._create_engine_kernel(),
             artifact=HealthArtifact,
             conversation_flow=self.conversation_flow,
             context=self.context,
             rules=self.rules,
             service_id="data_collection_service",
-            resource_constraint=self.resource_constraint
+            resource_constraint=self.resource_constraint,
+            plan_mode=self.plan_mode,
+            prompt_layout=self.prompt_layout,
+            field_extractor=self.field_extractor,
+            agenda_mode=self.agenda_mode,
+            history_window=self.history_window,
         )
- 
-        # Cosmos DB setup explicitly
-        self.cosmos_client = CosmosClient(os.getenv("COSMOS_ENDPOINT"), os.getenv("COSMOS_KEY"))
-        self.database = self.cosmos_client.create_database_if_not_exists(id="HealthConversations")
-        self.container = self.database.create_container_if_not_exists(
-            id="ExtractedDetails",
-            partition_key=PartitionKey(path="/session_id"),
-            offer_throughput=400
+
+    def _create_session(self, session_id: str = None) -> ConversationSession:
+        """
+        Start a new, empty session.
+        """
+        return ConversationSession(engine=self._create_guided_conversation(session_id))
+
+    def _session_from_state(self, state: dict) -> ConversationSession:
+        """
+        Restore a session from the state written by _save_session.
+        """
+        engine = GuidedConversation.from_json(
+            state,
+            kernel=self._create_engine_kernel(),
+            artifact=HealthArtifact,
+            rules=self.rules,
+            conversation_flow=self.conversation_flow,
+            context=self.context,
+            resource_constraint=self.resource_constraint,
+            service_id="data_collection_service",
+            plan_mode=self.plan_mode,
+            prompt_layout=self.prompt_layout,
+            field_extractor=self.field_extractor,
+            agenda_mode=self.agenda_mode,
+            history_window=self.history_window,
+        )
+        return ConversationSession(
+            engine=engine,
+            history=state.get("history", []),
+            revision=state.get("revision", 0),
+            persisted_messages=state.get("persisted_messages", 0),
+            summary_saved=state.get("summary_saved", False),
+            uploaded_files=state.get("uploaded_files", []),
+        )
+
+    async def _load_session(self, session_id: str):
+        """
+        Load a session that is not in the pool: from the session store when it has state for it,
+        otherwise by replaying the session document persisted in Cosmos DB.
+        Returns None for sessions that were never saved.
+        """
+        try:
+            state = await self.session_store.load(session_id)
+        except Exception as e:
+            print(f"[ERROR] Failed to load session state for {session_id}: {str(e)}")
+            state = None
+
+        if state is not None:
+            session = self._session_from_state(state)
+        else:
+            session = await self._rehydrate_from_session_document(session_id)
+
+        if session is not None:
+            self.conversation_history[session_id] = session.history
+        return session
+
+    async def _rehydrate_from_session_document(self, session_id: str):
+        """
+        Rebuild a session from its Cosmos DB session document by restoring the artifact and replaying
+        the visible conversation. Used for sessions saved before the session store existed.
+        """
+        try:
+            item, history = await session_documents.read_session(self.container, session_id)
+        except Exception as e:
+            print(f"[ERROR] Failed to load persisted state for session {session_id}: {str(e)}")
+            return None
+
+        if item is None:
+            return None
+
+        engine = self._create_guided_conversation(session_id)
+
+        for field_name, field_value in (item.get("artifact") or {}).items():
+            if field_value and field_value != "Unanswered" and field_name in HealthArtifact.model_fields:
+                try:
+                    setattr(engine.artifact.artifact, field_name, field_value)
+                except Exception as e:
+                    print(f"[ERROR] Failed to restore artifact field {field_name}: {str(e)}")
+
+        # Replay the visible conversation so the planner keeps its context
+        for message in history:
+            role = message.get("role")
+            if role not in ("user", "assistant"):
+                continue
+            engine.conversation.add_messages(
+                ChatMessageContent(
+                    role=AuthorRole.USER if role == "user" else AuthorRole.ASSISTANT,
+                    content=message.get("content", ""),
+                    metadata={"turn_number": engine.resource.turn_number, "type": ConversationMessageType.DEFAULT},
+                )
+            )
+            if role == "user":
+                engine.resource.increment_resource()
+
+        return ConversationSession(
+            engine=engine,
+            history=list(history),
+            persisted_messages=len(history),
+            summary_saved=True,
+            uploaded_files=list(item.get("uploaded_files") or []),
         )
 
-    async def update_agent_with_document_info(self, session_id: str, artifact: dict):
+    async def _refresh_session(self, session_id: str, session: ConversationSession):
+        """
+        Make sure a pooled session reflects the latest saved state before a turn runs on it.
+        Only needed for shared stores, where another worker may have handled the previous turn.
+        """
+        if not session.needs_refresh:
+            return
+        try:
+            state = await self.session_store.load(session_id)
+        except Exception as e:
+            print(f"[ERROR] Failed to refresh session state for {session_id}: {str(e)}")
+            return
+        if state is not None and state.get("revision", 0) != session.revision:
+            latest = self._session_from_state(state)
+            session.engine = latest.engine
+            session.history = latest.history
+            session.revision = latest.revision
+            # What the other worker already wrote to Cosmos DB, so it is neither rewritten nor re-created
+            session.persisted_messages = latest.persisted_messages
+            session.summary_saved = latest.summary_saved
+            # Files uploaded through the other worker, which every later save writes back
+            session.uploaded_files = latest.uploaded_files
+        session.needs_refresh = False
+
+    async def _save_session(self, session_id: str, session: ConversationSession):
+        """
+        Persist the session's engine snapshot and visible history to the session store.
+        """
+        # A background agenda update belongs to the turn being saved
+        await session.engine.wait_for_pending_updates()
+        session.revision += 1
+        state = {
+            **session.engine.to_json(),
+            "history": session.history,
+            "revision": session.revision,
+            "persisted_messages": session.persisted_messages,
+            "summary_saved": session.summary_saved,
+            "uploaded_files": session.uploaded_files,
+        }
+        try:
+            await self.session_store.save(session_id, state)
+            session.needs_refresh = self.session_store.shared
+            session.dirty = False
+        except Exception as e:
+            session.dirty = True
+            print(f"[ERROR] Failed to save session state for {session_id}: {str(e)}")
+
+    async def _finish_turn(self, session_id: str, session: ConversationSession):
+        """
+        Persist the session once a chat turn has its reply. A shared store is saved before the reply is
+        returned, since another worker may take the next turn. A per-process store always sees the next
+        turn here, so a background agenda update is left to finish after the reply and the save runs in
+        a task that the next turn and eviction wait for.
+        """
+        if self.session_store.shared or not session.engine.has_pending_updates:
+            await self._save_session(session_id, session)
+            return
+        session.dirty = True
+        session.pending_save = asyncio.create_task(self._save_session(session_id, session))
+
+    @staticmethod
+    async def _wait_for_pending_save(session: ConversationSession):
+        """
+        Wait for a save left running by _finish_turn, if any.
+        """
+        task, session.pending_save = session.pending_save, None
+        if task is not None:
+            await task
+
+    async def _on_session_evicted(self, session_id: str, session: ConversationSession):
+        """
+        Release per-session memory once the pool evicts a session. State is persisted after every
+        turn; a session whose last save failed is flushed again first so it can be reloaded later.
+        """
+        await self._wait_for_pending_save(session)
+        if session.dirty:
+            await self._save_session(session_id, session)
+            if session.dirty:
+                print(f"[ERROR] Evicting session {session_id} with unsaved state")
+        self.conversation_history.pop(session_id, None)
+
+    async def start_background_tasks(self):
+        """
+        Start the idle-session sweeper. Called from the FastAPI lifespan.
+        """
+        self.session_sweeper.start()
+
+    async def stop_background_tasks(self):
+        """
+        Stop the sweeper and flush every resident session before the process exits.
+        """
+        await self.session_sweeper.stop()
+        await self.session_pool.clear()
+
+    @staticmethod
+    def _estimate_session_bytes(session: ConversationSession) -> int:
+        """
+        Rough memory estimate for a pooled session: a fixed overhead for the engine objects
+        plus the size of the accumulated conversation text.
+        """
+        size = 64 * 1024
+        for message in session.engine.conversation.conversation_messages:
+            size += len(message.content or "") * 2 + 512
+        for message in session.history:
+            size += len(message.get("content") or "") * 2 + 256
+        return size
+
+    async def update_agent_with_document_info(self, session_id: str, artifact: dict, guided_conversation_agent: GuidedConversation):
         """
         Update the guided_conversation_agent's internal state with information extracted from documents
         so the conversation can continue with knowledge of what was already extracted.
@@ -99,14 +397,10 @@ class DataCollectionAgent:
         Args:
             session_id: The session identifier
             artifact: Dictionary containing the extracted information
+            guided_conversation_agent: The session's pooled GuidedConversation engine
         """
         # print(f"[DEBUG] Updating agent memory with document-extracted information: {artifact}")
         
-        # Check if guided_conversation_agent is initialized
-        if not hasattr(self, 'guided_conversation_agent'):
-            print("[DEBUG] Initializing guided_conversation_agent for document info update")
-            await self.initialize_agent(session_id)
-        
         # For each non-empty field in the artifact, inject it into the agent's memory
         for field_name, field_value in artifact.items():
             if field_value:  # Only inject non-empty values
@@ -128,9 +422,9 @@ class DataCollectionAgent:
                         self.conversation_history[session_id] = []
                     
                     # Update the agent's artifact directly
-                    if hasattr(self.guided_conversation_agent, 'artifact') and hasattr(self.guided_conversation_agent.artifact, 'artifact'):
+                    if hasattr(guided_conversation_agent, 'artifact') and hasattr(guided_conversation_agent.artifact, 'artifact'):
                         print(f"[DEBUG] Directly updating agent artifact field {agent_field_name} with value {field_value}")
-                        setattr(self.guided_conversation_agent.artifact.artifact, agent_field_name, field_value)
+                        setattr(guided_conversation_agent.artifact.artifact, agent_field_name, field_value)
                         
                         # Add a system message about this update
                         self.conversation_history[session_id].append({
@@ -144,191 +438,208 @@ class DataCollectionAgent:
 
 
     @kernel_function
-    async def handle_user_input(self, session_id: str, user_input: str):
+    async def handle_user_input(self, session_id: str, user_input: str, on_event: EventCallback = None):
         """
         Existing explicitly working method to handle user Q&A.
+        If on_event is given, the reply and artifact updates are reported as they happen, followed by a
+        "done" event sent before the turn is persisted.
         """
-        print(f"[DEBUG][Q&A] Session {session_id}, User input: {user_input}")
-        
-        # Track conversation history
-        if not hasattr(self, 'conversation_history'):
-            self.conversation_history = {}
-        
-        # Initialize conversation history for this session if it doesn't exist
-        if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
+        async with self.session_pool.checkout(session_id) as session:
+            await self._wait_for_pending_save(session)
+            await self._refresh_session(session_id, session)
+            guided_conversation_agent = session.engine
+            self.conversation_history[session_id] = session.history
+            print(f"[DEBUG][Q&A] Session {session_id}, User input: {user_input}")
         
-        # Add user message to conversation history
-        self.conversation_history[session_id].append({
-            "role": "user",
-            "content": user_input
-        })
-
-        response = await self.guided_conversation_agent.step_conversation(user_input=user_input)
-        print(f"[DEBUG][Q&A] Agent response: {response.ai_message}")
-        
-        # Add assistant message to conversation history
-        if response.ai_message:
+            # Add user message to conversation history
             self.conversation_history[session_id].append({
-                "role": "assistant",
-                "content": response.ai_message
+                "role": "user",
+                "content": user_input
             })
 
-        # IMPORTANT: Get the current artifact and save the updated conversation to Cosmos DB
-        # This ensures all messages are saved even after document upload
-        try:
-            current_artifact = {}
-            if hasattr(self.guided_conversation_agent, 'artifact') and hasattr(self.guided_conversation_agent.artifact, 'artifact'):
-                artifact = self.guided_conversation_agent.artifact.artifact
-                current_artifact = {
-                    "name": getattr(artifact, "name", ""),
-                    "prescribed_medicine": getattr(artifact, "prescribed_medicine", ""),
-                    "time_of_medicine": getattr(artifact, "time_of_medicine", ""),
-                    "no_of_days_of_medicine": getattr(artifact, "no_of_days_of_medicine", ""),
-                    "primary_email": getattr(artifact, "primary_email", "")
-                }
+            with llm_deadline(self.llm_turn_deadline):
+                response = await guided_conversation_agent.step_conversation(user_input=user_input, on_event=on_event)
+            print(f"[DEBUG][Q&A] Agent response: {response.ai_message}")
+        
+            # Add assistant message to conversation history
+            if response.ai_message:
+                self.conversation_history[session_id].append({
+                    "role": "assistant",
+                    "content": response.ai_message
+                })
+
+            # The user has the full reply at this point; persistence below happens after it
+            await emit_event(on_event, StepEvent.DONE, {
+                "message": response.ai_message,
+                "is_conversation_over": response.is_conversation_over
+            })
+
+            # IMPORTANT: Get the current artifact and save the updated conversation to Cosmos DB
+            # This ensures all messages are saved even after document upload
+            try:
+                current_artifact = {}
+                if hasattr(guided_conversation_agent, 'artifact') and hasattr(guided_conversation_agent.artifact, 'artifact'):
+                    artifact = guided_conversation_agent.artifact.artifact
+                    current_artifact = {
+                        "name": getattr(artifact, "name", ""),
+                        "prescribed_medicine": getattr(artifact, "prescribed_medicine", ""),
+                        "time_of_medicine": getattr(artifact, "time_of_medicine", ""),
+                        "no_of_days_of_medicine": getattr(artifact, "no_of_days_of_medicine", ""),
+                        "primary_email": getattr(artifact, "primary_email", "")
+                    }
             
-            # Save the updated conversation to Cosmos DB
-            self._save_artifact_to_cosmos(session_id, current_artifact)
-            print(f"[DEBUG][Q&A] Updated conversation saved to Cosmos DB for session {session_id}")
-        except Exception as e:
-            print(f"[ERROR] Failed to save conversation update to Cosmos DB: {str(e)}")
+                # Save the updated conversation to Cosmos DB
+                await self._save_artifact_to_cosmos(session_id, current_artifact)
+                print(f"[DEBUG][Q&A] Updated conversation saved to Cosmos DB for session {session_id}")
+            except Exception as e:
+                print(f"[ERROR] Failed to save conversation update to Cosmos DB: {str(e)}")
 
-        if response.is_conversation_over:
-            print("[DEBUG][Q&A] Conversation completed. Extracting artifact explicitly.")
+            if response.is_conversation_over:
+                print("[DEBUG][Q&A] Conversation completed. Extracting artifact explicitly.")
             
-            # Use the artifact handler to extract and format the artifact
-            artifact_handler = get_artifact_handler()
-            artifact = artifact_handler.extract_artifact(self.guided_conversation_agent)
+                # Use the artifact handler to extract and format the artifact
+                artifact_handler = get_artifact_handler()
+                artifact = artifact_handler.extract_artifact(guided_conversation_agent)
 
-            # print(f'ARTIFACT from guided_conversation_agent: {artifact}')
-            self._save_artifact_to_cosmos(session_id, artifact)
-            # print(f"[DEBUG][Q&A] Artifact saved explicitly: {artifact}")
+                # print(f'ARTIFACT from guided_conversation_agent: {artifact}')
+                await self._save_artifact_to_cosmos(session_id, artifact)
+                # print(f"[DEBUG][Q&A] Artifact saved explicitly: {artifact}")
 
-        return {
-            "message": response.ai_message,
-            "is_conversation_over": response.is_conversation_over
-        }
+            # Persist the engine state so the next turn can run on any worker
+            await self._finish_turn(session_id, session)
+
+            return {
+                "message": response.ai_message,
+                "is_conversation_over": response.is_conversation_over
+            }
     @kernel_function
-    async def handle_document_upload_input(self, session_id: str, file_urls: List[str]):
+    async def handle_document_upload_input(self, session_id: str, file_urls: List[str], on_event: EventCallback = None):
         """
         Explicitly handles document uploads using Document Intelligence and AOAI GPT-4o.
+        If on_event is given, processing status, the extracted fields and the reply are reported as they happen.
         """
-        print(f"[DEBUG][DocumentUpload] Session {session_id}, Uploaded files: {file_urls}")
-        
-        # Initialize conversation history if needed
-        if not hasattr(self, 'conversation_history'):
-            self.conversation_history = {}
-        
-        if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
+        async with self.session_pool.checkout(session_id) as session:
+            await self._wait_for_pending_save(session)
+            await self._refresh_session(session_id, session)
+            guided_conversation_agent = session.engine
+            self.conversation_history[session_id] = session.history
+            print(f"[DEBUG][DocumentUpload] Session {session_id}, Uploaded files: {file_urls}")
         
-        # Add a system message about document upload
-        self.conversation_history[session_id].append({
-            "role": "system",
-            "content": f"User uploaded {len(file_urls)} prescription document(s)."
-        })
+            # Add a system message about document upload
+            self.conversation_history[session_id].append({
+                "role": "system",
+                "content": f"User uploaded {len(file_urls)} prescription document(s)."
+            })
         
-        # Extract details from document
-        extracted_details = self.document_plugin.extract_details(self.kernel, file_urls)
-        # print(f"[DEBUG][DocumentUpload] Extracted details explicitly: {extracted_details}")
+            # Extract details from document
+            await emit_event(on_event, "upload_status", {"status": "extracting"})
+            extracted_details = self.document_plugin.extract_details(self.kernel, file_urls)
+            # print(f"[DEBUG][DocumentUpload] Extracted details explicitly: {extracted_details}")
 
-        # Generate a rich text prompt from extracted details
-        prompt = "\n".join([json.dumps(doc) for doc in extracted_details])
-        # print(f"[DEBUG][DocumentUpload] Prompt explicitly for AOAI GPT-4o: {prompt}")
+            # Generate a rich text prompt from extracted details
+            prompt = "\n".join([json.dumps(doc) for doc in extracted_details])
+            # print(f"[DEBUG][DocumentUpload] Prompt explicitly for AOAI GPT-4o: {prompt}")
 
-        # Get structured information
-        artifact = await self.azure_service.get_information(prompt)
-        # print(f"[DEBUG][DocumentUpload] Artifact explicitly from AOAI GPT-4o: {artifact}")
+            # Get structured information
+            await emit_event(on_event, "upload_status", {"status": "analyzing"})
+            with llm_deadline(self.llm_turn_deadline):
+                artifact = await self.azure_service.get_information(prompt)
+            # print(f"[DEBUG][DocumentUpload] Artifact explicitly from AOAI GPT-4o: {artifact}")
         
-        # Create a summary message for the conversation history
-        summary_message = f"Based on your uploaded prescription, I found the following information:\n"
-        has_information = False
+            # Create a summary message for the conversation history
+            summary_message = f"Based on your uploaded prescription, I found the following information:\n"
+            has_information = False
         
-        for field, value in artifact.items():
-            if value:
-                has_information = True
-                field_names = {
-                    "name": "Patient name",
-                    "prescribed_medicine": "Prescribed medicine",
-                    "time_of_medicine": "Medicine timing",
-                    "no_of_days_of_medicine": "Duration",
-                    "primary_email": "Email"
-                }
-                display_name = field_names.get(field, field)
-                summary_message += f"- {display_name}: {value}\n"
+            for field, value in artifact.items():
+                if value:
+                    has_information = True
+                    field_names = {
+                        "name": "Patient name",
+                        "prescribed_medicine": "Prescribed medicine",
+                        "time_of_medicine": "Medicine timing",
+                        "no_of_days_of_medicine": "Duration",
+                        "primary_email": "Email"
+                    }
+                    display_name = field_names.get(field, field)
+                    summary_message += f"- {display_name}: {value}\n"
         
-        if not has_information:
-            summary_message = "I couldn't extract any information from your prescription. Could you please provide the details manually?"
-        else:
-            summary_message += "\nIs this information correct? If not, please let me know what needs to be updated."
+            if not has_information:
+                summary_message = "I couldn't extract any information from your prescription. Could you please provide the details manually?"
+            else:
+                summary_message += "\nIs this information correct? If not, please let me know what needs to be updated."
         
-        # Add the summary as assistant message to conversation history
-        self.conversation_history[session_id].append({
-            "role": "assistant",
-            "content": summary_message
-        })
-
-        # Check for missing fields
-        missing_fields = [field for field, value in artifact.items() if not value]
-        # print(f"[DEBUG][DocumentUpload] Missing fields explicitly: {missing_fields}")
-
-        # Save the artifact to Cosmos DB
-        self._save_artifact_to_cosmos(session_id, artifact, file_urls)
-        # print(f"[DEBUG][DocumentUpload] Artifact explicitly saved to Cosmos DB: {artifact}")
+            # Add the summary as assistant message to conversation history
+            self.conversation_history[session_id].append({
+                "role": "assistant",
+                "content": summary_message
+            })
+
+            # Check for missing fields
+            missing_fields = [field for field, value in artifact.items() if not value]
+            # print(f"[DEBUG][DocumentUpload] Missing fields explicitly: {missing_fields}")
+
+            # Save the artifact to Cosmos DB
+            await self._save_artifact_to_cosmos(session_id, artifact, file_urls)
+            # print(f"[DEBUG][DocumentUpload] Artifact explicitly saved to Cosmos DB: {artifact}")
         
-        # Update the agent's internal memory with the document information
-        await self.update_agent_with_document_info(session_id, artifact)
-        print(f"[DEBUG][DocumentUpload] Agent memory updated with document information")
-
-        # If fields are missing, ask follow-up questions
-        if missing_fields:
-            follow_up_message = "I couldn't find some important information in your prescription. "
-            follow_up_message += "Could you please provide the following details:\n"
-            
-            field_names = {
-                "name": "your name",
-                "prescribed_medicine": "the medicine names",
-                "time_of_medicine": "when to take the medicine",
-                "no_of_days_of_medicine": "how many days to take the medicine",
-                "primary_email": "your email address"
-            }
+            # Update the agent's internal memory with the document information
+            await self.update_agent_with_document_info(session_id, artifact, guided_conversation_agent)
+            print(f"[DEBUG][DocumentUpload] Agent memory updated with document information")
+            for field_name, field_value in artifact.items():
+                if field_value:
+                    await emit_event(on_event, StepEvent.ARTIFACT_UPDATE, {"field": field_name, "value": field_value})
+
+            # Persist the engine state so the next turn can run on any worker
+            await self._save_session(session_id, session)
+
+            # If fields are missing, ask follow-up questions
+            if missing_fields:
+                follow_up_message = "I couldn't find some important information in your prescription. "
+                follow_up_message += "Could you please provide the following details:\n"
             
-            for field in missing_fields:
-                follow_up_message += f"- {field_names.get(field, field)}\n"
+                field_names = {
+                    "name": "your name",
+                    "prescribed_medicine": "the medicine names",
+                    "time_of_medicine": "when to take the medicine",
+                    "no_of_days_of_medicine": "how many days to take the medicine",
+                    "primary_email": "your email address"
+                }
             
+                for field in missing_fields:
+                    follow_up_message += f"- {field_names.get(field, field)}\n"
+
+                await emit_event(on_event, StepEvent.MESSAGE, {"message": follow_up_message})
+                return {
+                    "message": follow_up_message,
+                    "is_conversation_over": False,
+                    "user_details": artifact
+                }
+
+            await emit_event(on_event, StepEvent.MESSAGE, {"message": summary_message})
             return {
-                "message": follow_up_message,
+                "message": summary_message,
                 "is_conversation_over": False,
                 "user_details": artifact
             }
-
-        return {
-            "message": summary_message,
-            "is_conversation_over": False,
-            "user_details": artifact
-        }
  
-    def _save_artifact_to_cosmos(self, session_id: str, artifact: dict, file_urls: List[str] = None):
+    async def _save_artifact_to_cosmos(self, session_id: str, artifact: dict, file_urls: List[str] = None):
         """
         Explicitly saves artifact data to Cosmos DB.
         """
+        session = self.session_pool.peek(session_id)
+        if self.persistence_mode == session_documents.PERSISTENCE_MODE_INCREMENTAL and session is not None:
+            await self._append_turn_to_cosmos(session_id, session, artifact, file_urls)
+            return
+
+        if session is not None:
+            # Uploads are remembered on the session so later turns preserve them without a read
+            if file_urls:
+                session.uploaded_files = list(file_urls)
+            else:
+                file_urls = session.uploaded_files
+
         artifact_handler = get_artifact_handler()
-        if not file_urls:
-            try:
-                # Try to get existing URLs from Cosmos DB
-                query = f"SELECT c.uploaded_files FROM c WHERE c.session_id = '{session_id}'"
-                items = list(self.container.query_items(
-                    query=query, 
-                    enable_cross_partition_query=True
-                ))
-                
-                if items and items[0].get('uploaded_files'):
-                    file_urls = items[0]['uploaded_files']
-                    print(f"[DEBUG][CosmosDB] Preserving existing uploaded_files: {file_urls}")
-            except Exception as e:
-                print(f"[ERROR] Error retrieving existing file URLs: {str(e)}")
-        
+
         # Get formatted conversation history
         conversation = artifact_handler.format_conversation_history(self, session_id)
         
@@ -341,8 +652,56 @@ class DataCollectionAgent:
         )
         
         # Save to Cosmos DB
-        self.container.upsert_item(cosmos_item)
+        await self.container.upsert_item(cosmos_item)
+        if session is not None:
+            session.persisted_messages = len(conversation)
+            session.summary_saved = True
         print(f"[DEBUG][CosmosDB] Data explicitly saved: {cosmos_item}")
+
+    async def _append_turn_to_cosmos(self, session_id: str, session: ConversationSession, artifact: dict,
+                                     file_urls: List[str] = None):
+        """
+        Incremental save: write only the messages added since the last save as a turn document and
+        patch the small session summary, in one transactional batch on the session's partition.
+        `file_urls` are only given by uploads; otherwise the summary's uploaded_files is left untouched.
+        """
+        history = session.history
+        new_messages = history[session.persisted_messages:]
+        message_count = len(history)
+
+        operations = []
+        if new_messages:
+            turn_item = session_documents.prepare_turn_item(session_id, session.persisted_messages, new_messages)
+            operations.append(("upsert", (turn_item,)))
+
+        if file_urls:
+            session.uploaded_files = list(file_urls)
+
+        summary_item = session_documents.prepare_summary_item(
+            session_id, artifact, message_count, session.uploaded_files
+        )
+        if session.summary_saved:
+            patch = session_documents.summary_patch_operations(artifact, message_count, file_urls)
+            try:
+                await self.container.execute_item_batch(
+                    batch_operations=operations + [("patch", (session_id, patch))], partition_key=session_id
+                )
+            except CosmosBatchOperationError as e:
+                if e.error_index != len(operations) or e.status_code != 404:
+                    raise
+                # The summary is missing (e.g. it was deleted); recreate it with the same batch
+                print(f"[ERROR] Session summary for {session_id} not found, rewriting it")
+                await self.container.execute_item_batch(
+                    batch_operations=operations + [("upsert", (summary_item,))], partition_key=session_id
+                )
+        else:
+            await self.container.execute_item_batch(
+                batch_operations=operations + [("upsert", (summary_item,))], partition_key=session_id
+            )
+
+        session.persisted_messages = message_count
+        session.summary_saved = True
+        print(f"[DEBUG][CosmosDB] Appended {len(new_messages)} message(s) for session {session_id}")
     
     def calculate_age(self, date_of_birth: str) -> int:
         """
@@ -0,0 +1,118 @@
+import re
+from typing import Dict, List
+
+# Rule-based extraction of HealthArtifact values that can be read off a user message without the model.
+# A rule only reports a value when the message contains exactly one candidate for the field, so corrections
+# such as "not 7 days, 10 days" are left to the planner. Durations, times and emails also need context tying
+# them to the prescription (or the user), unless the message is nothing but the value, e.g. a bare "7 days"
+# answering the question; "I have had this cough for 3 days" or "my appointment is at 3pm" are left alone.
+
+EMAIL_PATTERN = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}\b")
+NAME_PATTERN = re.compile(r"\b(?i:my name is) ([A-Z][\w'-]*(?: [A-Z][\w'-]*){0,3})")
+# Spelled-out amounts need a leading "for", so "twice a day" is not read as a one day course,
+# "every 2 days" is an interval rather than a duration, and "2 days ago" is a point in the past
+DURATION_PATTERN = re.compile(
+    r"(?<!every )\b(\d{1,3})\s*(day|week)s?\b(?!\s+(?:ago|since)\b)"
+    r"|\bfor\s+(a|one|two|three|four)\s+(day|week)s?\b(?!\s+(?:ago|since)\b)",
+    re.IGNORECASE,
+)
+FREQUENCY_PATTERN = re.compile(
+    r"\b(?:once|twice|thrice|(?:one|two|three|four|\d) times?)\s+(?:a|per|each|every)\s+day\b"
+    r"|\b(?:once|twice|thrice|(?:one|two|three|four|\d) times?)\s+daily\b"
+    r"|\bevery\s+\d{1,2}\s+hours\b",
+    re.IGNORECASE,
+)
+CLOCK_TIME_PATTERN = re.compile(r"\b(?:[01]?\d|2[0-3])(?::[0-5]\d)?\s*(?:am|pm)\b", re.IGNORECASE)
+MEDICINE_CONTEXT_PATTERN = re.compile(
+    r"\b(?:take|takes|taking|took|medicines?|medications?|tablets?|pills?|capsules?|doses?|course|prescri\w*)\b",
+    re.IGNORECASE,
+)
+OWNER_CONTEXT_PATTERN = re.compile(r"\b(?:my|me)\b", re.IGNORECASE)
+# Words that may surround a bare answer without changing what it refers to
+FILLER_WORDS = {"for", "at", "and", "around", "about"}
+
+NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4}
+DAYS_PER_UNIT = {"day": 1, "week": 7}
+
+
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def _is_bare_answer(text: str, *patterns: re.Pattern) -> bool:
+    """Whether the message holds nothing but values matched by the patterns, filler words and punctuation."""
+    for pattern in patterns:
+        text = pattern.sub(" ", text)
+    return all(word in FILLER_WORDS for word in re.findall(r"\w+", text.lower()))
+
+
+def _is_about_medicine(text: str) -> bool:
+    return bool(MEDICINE_CONTEXT_PATTERN.search(text) or FREQUENCY_PATTERN.search(text))
+
+
+def extract_email(text: str) -> str | None:
+    """
+    The user's email address; an address given for someone else, e.g. "the pharmacy email is ...", is skipped.
+    """
+    if not (OWNER_CONTEXT_PATTERN.search(text) or _is_bare_answer(text, EMAIL_PATTERN)):
+        return None
+    matches = _unique(match.group(0) for match in EMAIL_PATTERN.finditer(text))
+    return matches[0] if len(matches) == 1 else None
+
+
+def extract_name(text: str) -> str | None:
+    matches = _unique(match.group(1) for match in NAME_PATTERN.finditer(text))
+    return matches[0] if len(matches) == 1 else None
+
+
+def extract_days(text: str) -> str | None:
+    """
+    Number of days from a duration such as "7 days", "for a week" or "2 weeks", as a string of digits.
+    """
+    if not (_is_about_medicine(text) or _is_bare_answer(text, DURATION_PATTERN)):
+        return None
+    days = []
+    for number, number_unit, word, word_unit in DURATION_PATTERN.findall(text):
+        count = int(number) if number else NUMBER_WORDS[word.lower()]
+        days.append(str(count * DAYS_PER_UNIT[(number_unit or word_unit).lower()]))
+    days = _unique(days)
+    return days[0] if len(days) == 1 else None
+
+
+def extract_time(text: str) -> str | None:
+    """
+    When the medicine is taken, e.g. "twice daily at 9am" or "8am and 8pm", from a frequency and/or clock times.
+    """
+    frequencies = _unique(" ".join(match.group(0).lower().split()) for match in FREQUENCY_PATTERN.finditer(text))
+    times = _unique(match.group(0).lower().replace(" ", "") for match in CLOCK_TIME_PATTERN.finditer(text))
+    # A clock time on its own may be any appointment; it needs to be about the medicine
+    if times and not (_is_about_medicine(text) or _is_bare_answer(text, CLOCK_TIME_PATTERN)):
+        times = []
+    if len(frequencies) > 1 or (not frequencies and not times):
+        return None
+    clock = " and ".join(times)
+    if not frequencies:
+        return clock
+    return f"{frequencies[0]} at {clock}" if clock else frequencies[0]
+
+
+FIELD_EXTRACTORS = {
+    "name": extract_name,
+    "time_of_medicine": extract_time,
+    "no_of_days_of_medicine": extract_days,
+    "primary_email": extract_email,
+}
+
+
+def extract_health_fields(text: str) -> Dict[str, str]:
+    """
+    Returns the HealthArtifact fields that can be filled directly from a user message, keyed by field name.
+    """
+    if not text:
+        return {}
+    extracted = {}
+    for field_name, extractor in FIELD_EXTRACTORS.items():
+        value = extractor(text)
+        if value:
+            extracted[field_name] = value
+    return extracted
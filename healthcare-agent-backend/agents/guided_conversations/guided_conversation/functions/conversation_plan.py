@@ -8,15 +8,25 @@ from semantic_kernel.functions import FunctionResult, KernelArguments
 from guided_conversation.plugins.agenda import Agenda
 from guided_conversation.plugins.artifact import Artifact
 from guided_conversation.utils.conversation_helpers import Conversation
+from guided_conversation.utils.prompt_functions import (
+    PromptLayout,
+    get_prompt_function,
+    invoke_prompt_function,
+    prompt_arguments,
+)
 from guided_conversation.utils.resources import GCResource, ResourceConstraintMode
 
 logger = logging.getLogger(__name__)
 
-conversation_plan_template = """<message role="system">You are a helpful, thoughtful, and meticulous assistant.
+# The system prompt is kept in parts so the single-call plan-and-execute prompt can reuse the instructions, and so the
+# cache-friendly layout can move the per-session part behind the instructions that are shared by every session.
+conversation_plan_intro = """<message role="system">You are a helpful, thoughtful, and meticulous assistant.
 You are conducting a conversation with a user. \
 Your goal is to complete an artifact as thoroughly as possible by the end of the conversation, and to ensure a smooth experience for the user.
 
-This is the schema of the artifact you are completing:
+"""
+
+conversation_plan_session = """This is the schema of the artifact you are completing:
 {{ artifact_schema }}{{#if context}}
 
 Here is some additional context about the conversation:
@@ -29,7 +39,9 @@ Here's a description of the conversation flow:
 {{ current_state_description }}
 Follow this description, and exercise good judgment about when it is appropriate to deviate.{{/if}}
 
-You will be provided the history of your conversation with the user up until now and the current state of the artifact.
+"""
+
+conversation_plan_actions = """You will be provided the history of your conversation with the user up until now and the current state of the artifact.
 Note that if the value for a field in the artifact is 'Unanswered', it means that the field has not been completed.
 You need to select the best possible action(s), given the state of the conversation and the artifact.
 These are the possible actions you can take:
@@ -88,12 +100,16 @@ If you select the "Update artifact field" action or the "Update agenda" action,
 Note that artifact and updates updates will always be executed before a message is sent to the user or the conversation is terminated. \
 Also note that only one message can be sent to the user at a time.
 
-Your task is to state your step-by-step reasoning for the best possible action(s), followed by a final recommendation of which action(s) to take, including all required parameters.
+"""
+
+conversation_plan_instructions = conversation_plan_intro + conversation_plan_session + conversation_plan_actions
+
+conversation_plan_task = """Your task is to state your step-by-step reasoning for the best possible action(s), followed by a final recommendation of which action(s) to take, including all required parameters.
 Someone else will be responsible for executing the action(s) you select and they will only have access to your output \
 (not any of the conversation history, artifact schema, or other context) so it is EXTREMELY important \
-that you clearly specify the value of all required parameters for each action you select.</message>
+that you clearly specify the value of all required parameters for each action you select."""
 
-<message role="user">Conversation history:
+conversation_plan_inputs = """<message role="user">Conversation history:
 {{ chat_history }}
 
 Latest agenda:
@@ -102,6 +118,76 @@ Latest agenda:
 Current state of the artifact:
 {{ artifact_state }}</message>"""
 
+conversation_plan_template = (
+    conversation_plan_instructions + conversation_plan_task + "</message>\n\n" + conversation_plan_inputs
+)
+
+# The cache-friendly layout states the per-turn parts of the action descriptions in the turn details of the user
+# message, so the system message is the same for every session and turn.
+conversation_plan_shared_actions = (
+    conversation_plan_actions.replace(
+        "{{#if show_agenda}}Update agenda (required parameters: items)\n",
+        "Update agenda (required parameters: items)\n"
+        "- Only pick this action if the turn details say that the agenda can be updated.\n",
+    )
+    .replace("({{ remaining_resource }})", "(see the turn details)")
+    .replace("{{ total_resource_str }}", "must respect the turn budget given in the turn details.")
+    .replace(" {{ ample_time_str }}{{/if}}", "")
+    .replace(
+        "{{ termination_instructions }}\n{{ resource_instructions }}",
+        "- Follow the end conversation guidance and the turn details given with the conversation.",
+    )
+)
+
+# Per-session values first, then the conversation history (which only grows), then everything that changes per turn.
+conversation_plan_cached_inputs = """<message role="user">Artifact schema:
+{{ artifact_schema }}{{#if context}}
+
+Additional context about the conversation:
+{{ context }}{{/if}}
+
+Rules you must abide by throughout the conversation:
+{{ rules }}{{#if current_state_description }}
+
+Description of the conversation flow:
+{{ current_state_description }}
+Follow this description, and exercise good judgment about when it is appropriate to deviate.{{/if}}
+
+End conversation guidance:
+{{ termination_instructions }}
+
+Conversation history:
+{{ chat_history }}
+
+Latest agenda:
+{{ agenda_state }}
+
+Current state of the artifact:
+{{ artifact_state }}
+
+Turn details:
+{{#if show_agenda}}The agenda can be updated in this turn. There are {{ remaining_resource }} turns remaining. \
+The total turns allocated across all items in the updated agenda {{ total_resource_str }} {{ ample_time_str }}\
+{{else}}The agenda cannot be updated in this turn, do not pick the "Update agenda" action.{{/if}}
+{{ resource_instructions }}</message>"""
+
+conversation_plan_cached_template = (
+    conversation_plan_intro
+    + conversation_plan_shared_actions
+    + conversation_plan_task
+    + "</message>\n\n"
+    + conversation_plan_cached_inputs
+)
+
+conversation_plan_prompt_functions = {
+    PromptLayout.INTERLEAVED: get_prompt_function(
+        "conversation_plan", "conversation_plan_function", conversation_plan_template
+    ),
+    PromptLayout.CACHE_FRIENDLY: get_prompt_function(
+        "conversation_plan", "conversation_plan_function", conversation_plan_cached_template
+    ),
+}
+
 
 async def conversation_plan_function(
     kernel: Kernel,
@@ -113,6 +199,7 @@ async def conversation_plan_function(
     req_settings: dict,
     resource: GCResource,
     agenda: Agenda,
+    layout: PromptLayout = PromptLayout.INTERLEAVED,
 ) -> FunctionResult:
     """Reasons/plans about the next best action(s) to continue the conversation. In this function, a DESCRIPTION of the possible actions
     are surfaced to the agent. Note that the agent will not execute the actions, but will provide a step-by-step reasoning for the best
@@ -131,6 +218,8 @@ async def conversation_plan_function(
         current_artifact (Artifact): The current artifact
         req_settings (dict): The request settings
         resource (GCResource): The resource object
+        agenda (Agenda): The current agenda
+        layout (PromptLayout): The arrangement of the prompt.
 
     Returns:
         FunctionResult: The function result.
@@ -143,14 +232,39 @@ async def conversation_plan_function(
     if hasattr(req_settings, "extension_data"):
         req_settings.extension_data = {}
 
-    kernel_function = kernel.add_function(
-        prompt=conversation_plan_template,
-        function_name="conversation_plan_function",
-        plugin_name="conversation_plan",
-        template_format="handlebars",
-        prompt_execution_settings=req_settings,
+    arguments = get_conversation_plan_arguments(
+        chat_history, context, rules, conversation_flow, current_artifact, resource, agenda
     )
 
+    result = await invoke_prompt_function(
+        kernel, conversation_plan_prompt_functions[layout], prompt_arguments(req_settings, arguments), layout
+    )
+    return result
+
+
+def get_conversation_plan_arguments(
+    chat_history: Conversation,
+    context: str,
+    rules: list[str],
+    conversation_flow: str,
+    current_artifact: Artifact,
+    resource: GCResource,
+    agenda: Agenda,
+) -> KernelArguments:
+    """Builds the template arguments shared by the planning prompt and the single-call plan-and-execute prompt.
+
+    Args:
+        chat_history (Conversation): The conversation history
+        context (str): Creator provided context of the conversation
+        rules (list[str]): Creator provided rules
+        conversation_flow (str): Creator provided conversation flow
+        current_artifact (Artifact): The current artifact
+        resource (GCResource): The resource object
+        agenda (Agenda): The current agenda
+
+    Returns:
+        KernelArguments: The arguments for the conversation plan template.
+    """
     remaining_resource = resource.remaining_units
     resource_instructions = resource.get_resource_instructions()
 
@@ -190,9 +304,7 @@ in a way that's directly relevant to the artifact (e.g. "collect additional deta
         agenda_state=agenda.get_agenda_for_prompt(),
         artifact_state=current_artifact.get_artifact_for_prompt(),
     )
-
-    result = await kernel.invoke(function=kernel_function, arguments=arguments)
-    return result
+    return arguments
 
 
 def _get_termination_instructions(resource: GCResource):
@@ -5,10 +5,19 @@ from typing import Annotated
 from semantic_kernel import Kernel
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
 from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
-from semantic_kernel.functions import FunctionResult, KernelArguments
+from semantic_kernel.functions import FunctionResult
 from semantic_kernel.functions.kernel_function_decorator import kernel_function
 
-execution_template = """<message role="system">You are a helpful, thoughtful, and meticulous assistant. 
+from guided_conversation.utils.prompt_functions import (
+    PromptLayout,
+    get_prompt_function,
+    invoke_prompt_function,
+    prompt_arguments,
+)
+
+# Kept in parts so the cache-friendly layout can move the field value guidance into the system message, ahead of the
+# per-session artifact schema.
+execution_instructions = """<message role="system">You are a helpful, thoughtful, and meticulous assistant. 
 You are conducting a conversation with a user. Your goal is to complete an artifact as thoroughly as possible by the end of the conversation.
 You will be given some reasoning about the best possible action(s) to take next given the state of the conversation as well as the artifact schema.
 The reasoning is supposed to state the recommended action(s) to take next, along with all required parameters for each action.
@@ -17,17 +26,31 @@ If the reasoning's specification of an action is incomplete (e.g. it doesn't inc
 or some parameters are specified implicitly, such as "send a message that contains a greeting" instead of explicitly providing \
 the value of the "message" parameter), do not execute the action. You should never fill in missing or imprecise parameters yourself.
 If the reasoning is not clear about which actions to take, or all actions are specified in an incomplete way, \
-return 'None' without selecting any action.</message>
-
-<message role="user">Artifact schema:
-{{ artifact_schema }}
+return 'None' without selecting any action."""
 
-If the type in the schema is str, the "field_value" parameter in the action should be also be a string.
+execution_field_value_guidance = """If the type in the schema is str, the "field_value" parameter in the action should be also be a string.
 These are example parameters for the update_artifact action: {"field_name": "company_name", "field_value": "Contoso"}
-DO NOT write JSON in the "field_value" parameter in this case. {"field_name": "company_name", "field_value": "{"value": "Contoso"}"} is INCORRECT.
+DO NOT write JSON in the "field_value" parameter in this case. {"field_name": "company_name", "field_value": "{"value": "Contoso"}"} is INCORRECT."""
+
+execution_template = (
+    execution_instructions
+    + "</message>\n\n<message role=\"user\">Artifact schema:\n{{ artifact_schema }}\n\n"
+    + execution_field_value_guidance
+    + "\n\nReasoning:\n{{ reasoning }}</message>"
+)
 
-Reasoning:
-{{ reasoning }}</message>"""
+execution_cached_template = (
+    execution_instructions
+    + "\n\n"
+    + execution_field_value_guidance
+    + "</message>\n\n<message role=\"user\">Artifact schema:\n{{ artifact_schema }}\n\n"
+    + "Reasoning:\n{{ reasoning }}</message>"
+)
+
+execution_functions = {
+    PromptLayout.INTERLEAVED: get_prompt_function("execution", "execution", execution_template),
+    PromptLayout.CACHE_FRIENDLY: get_prompt_function("execution", "execution", execution_cached_template),
+}
 
 
 @kernel_function(name="send_message_to_user", description="Sends a message to the user.")
@@ -41,7 +64,12 @@ def end_conversation() -> None:
 
 
 async def execution(
-    kernel: Kernel, reasoning: str, filter: list[str], req_settings: PromptExecutionSettings, artifact_schema: str
+    kernel: Kernel,
+    reasoning: str,
+    filter: list[str],
+    req_settings: PromptExecutionSettings,
+    artifact_schema: str,
+    layout: PromptLayout = PromptLayout.INTERLEAVED,
 ) -> FunctionResult:
     """Executes the actions recommended by the reasoning/planning call in the given context.
 
@@ -51,6 +79,7 @@ async def execution(
         filter (list[str]): The list of plugins to INCLUDE for the tool call.
         req_settings (PromptExecutionSettings): The prompt execution settings.
         artifact (str): The artifact schema for the execution prompt.
+        layout (PromptLayout): The arrangement of the prompt.
 
     Returns:
         FunctionResult: The result of the execution.
@@ -58,18 +87,11 @@ async def execution(
     filter = {"included_plugins": filter}
     req_settings.function_choice_behavior = FunctionChoiceBehavior.Auto(auto_invoke=False, filters=filter)
 
-    kernel_function = kernel.add_function(
-        prompt=execution_template,
-        function_name="execution",
-        plugin_name="execution",
-        template_format="handlebars",
-        prompt_execution_settings=req_settings,
-    )
-
-    arguments = KernelArguments(
+    arguments = prompt_arguments(
+        req_settings,
         artifact_schema=artifact_schema,
         reasoning=reasoning,
     )
 
-    result = await kernel.invoke(function=kernel_function, arguments=arguments)
+    result = await invoke_prompt_function(kernel, execution_functions[layout], arguments, layout)
     return result
@@ -1,9 +1,10 @@
 # Copyright (c) Microsoft. All rights reserved.
 
 from semantic_kernel import Kernel
-from semantic_kernel.functions import FunctionResult, KernelArguments
+from semantic_kernel.functions import FunctionResult
 
 from guided_conversation.utils.conversation_helpers import Conversation
+from guided_conversation.utils.prompt_functions import get_prompt_function, prompt_arguments
 
 final_update_template = """<message role="system">You are a helpful, thoughtful, and meticulous assistant. 
 You just finished a conversation with a user.{{#if context}} Here is some additional context about the conversation:
@@ -49,6 +50,10 @@ fields to update and the values to update them with, or to state that no fields
 Current state of the artifact:
 {{ artifact_state }}</message>"""
 
+final_update_plan_prompt_function = get_prompt_function(
+    "final_update_plan", "final_update_plan_function", final_update_template
+)
+
 
 async def final_update_plan_function(
     kernel: Kernel,
@@ -79,21 +84,14 @@ async def final_update_plan_function(
     if hasattr(req_settings, "extension_data"):
         req_settings.extension_data = {}
 
-    kernel_function = kernel.add_function(
-        prompt=final_update_template,
-        function_name="final_update_plan_function",
-        plugin_name="final_update_plan",
-        template_format="handlebars",
-        prompt_execution_settings=req_settings,
-    )
-
-    arguments = KernelArguments(
+    arguments = prompt_arguments(
+        req_settings,
         conversation_history=chat_history.get_repr_for_prompt(),
         context=context,
         artifact_schema=artifact_schema,
         artifact_state=artifact_state,
     )
 
-    result = await kernel.invoke(function=kernel_function, arguments=arguments)
+    result = await kernel.invoke(function=final_update_plan_prompt_function, arguments=arguments)
 
     return result
@@ -0,0 +1,106 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+import logging
+
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.functions import FunctionResult
+
+from guided_conversation.functions.conversation_plan import (
+    conversation_plan_cached_inputs,
+    conversation_plan_inputs,
+    conversation_plan_instructions,
+    conversation_plan_intro,
+    conversation_plan_shared_actions,
+    get_conversation_plan_arguments,
+)
+from guided_conversation.plugins.agenda import Agenda
+from guided_conversation.plugins.artifact import Artifact
+from guided_conversation.utils.conversation_helpers import Conversation
+from guided_conversation.utils.prompt_functions import (
+    PromptLayout,
+    get_prompt_function,
+    invoke_prompt_function,
+    prompt_arguments,
+)
+from guided_conversation.utils.resources import GCResource
+
+logger = logging.getLogger(__name__)
+
+plan_and_execute_task = """
+Your task is to first state your step-by-step reasoning for the best possible action(s) in your reply, \
+and then, in the same reply, call the tool corresponding to every action you selected, in the order you listed them. \
+Use update_agenda for "Update agenda", send_message_to_user for "Send message to user", \
+update_artifact_field for "Update artifact field" and end_conversation for "End conversation". \
+Every tool call must include all of its required parameters with explicit values. \
+Never call a tool for an action that you did not select in your reasoning.
+If the type of an artifact field in the schema is str, the "value" parameter of update_artifact_field must also be a plain string, not JSON."""
+
+plan_and_execute_template = (
+    conversation_plan_instructions + plan_and_execute_task + "</message>\n\n" + conversation_plan_inputs
+)
+
+plan_and_execute_cached_template = (
+    conversation_plan_intro
+    + conversation_plan_shared_actions
+    + plan_and_execute_task
+    + "</message>\n\n"
+    + conversation_plan_cached_inputs
+)
+
+plan_and_execute_prompt_functions = {
+    PromptLayout.INTERLEAVED: get_prompt_function(
+        "plan_and_execute", "plan_and_execute_function", plan_and_execute_template
+    ),
+    PromptLayout.CACHE_FRIENDLY: get_prompt_function(
+        "plan_and_execute", "plan_and_execute_function", plan_and_execute_cached_template
+    ),
+}
+
+
+async def plan_and_execute_function(
+    kernel: Kernel,
+    chat_history: Conversation,
+    context: str,
+    rules: list[str],
+    conversation_flow: str,
+    current_artifact: Artifact,
+    req_settings: PromptExecutionSettings,
+    resource: GCResource,
+    agenda: Agenda,
+    filter: list[str],
+    layout: PromptLayout = PromptLayout.INTERLEAVED,
+) -> FunctionResult:
+    """Reasons about the next best action(s) and selects the corresponding tool calls in a single model request.
+    This combines conversation_plan_function and execution: the reasoning is returned as the message content and the
+    actions as tool calls, which are not invoked automatically.
+
+    Args:
+        kernel (Kernel): The kernel object.
+        chat_history (Conversation): The conversation history
+        context (str): Creator provided context of the conversation
+        rules (list[str]): Creator provided rules
+        conversation_flow (str): Creator provided conversation flow
+        current_artifact (Artifact): The current artifact
+        req_settings (PromptExecutionSettings): The prompt execution settings.
+        resource (GCResource): The resource object
+        agenda (Agenda): The current agenda
+        filter (list[str]): The list of plugins to INCLUDE for the tool call.
+        layout (PromptLayout): The arrangement of the prompt.
+
+    Returns:
+        FunctionResult: The function result.
+    """
+    req_settings.function_choice_behavior = FunctionChoiceBehavior.Auto(
+        auto_invoke=False, filters={"included_plugins": filter}
+    )
+
+    arguments = get_conversation_plan_arguments(
+        chat_history, context, rules, conversation_flow, current_artifact, resource, agenda
+    )
+
+    result = await invoke_prompt_function(
+        kernel, plan_and_execute_prompt_functions[layout], prompt_arguments(req_settings, arguments), layout
+    )
+    return result
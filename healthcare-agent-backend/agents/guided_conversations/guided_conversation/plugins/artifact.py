@@ -85,6 +85,13 @@ class Artifact:
         # dict: key = field, value = list of tuple[attempt, error message]
         self.failed_artifact_fields: dict[str, list[tuple[str, str]]] = {}
 
+        # The prompt representations only change when a field is assigned or a field runs out of retries.
+        # The schema is cached per (filter_one_field, failed fields) and cleared when the failed fields change,
+        # the artifact state is cached with the artifact revision and failed fields it was built from.
+        self._schema_cache: dict[tuple[str | None, frozenset[str]], str] = {}
+        self._schema_failed_fields: frozenset[str] = frozenset()
+        self._artifact_prompt_cache: tuple[tuple[int, frozenset[str]], dict] | None = None
+
     # The following are the kernel functions that will be provided to the LLM call
     @kernel_function(
         name=UPDATE_ARTIFACT_TOOL,
@@ -175,6 +182,30 @@ class Artifact:
                 self.logger.warning(f"Agent failed to fix field {field_name}. Retrying...")
                 # Otherwise, the agent has failed and we will go through the loop again
 
+    def try_update_artifact(self, field_name: str, field_value: Any) -> ChatMessageContent | None:
+        """Updates a field with a value that did not come from the model, e.g. a rule-based extraction.
+        Unlike update_artifact, an invalid value is dropped instead of being sent to the LLM for error correction,
+        and only fields that are still "Unanswered" are filled; changing an answer is left to the model.
+
+        Args:
+            field_name (str): The name of the field to update in the artifact
+            field_value (Any): The value to set the field to
+
+        Returns:
+            ChatMessageContent | None: The update message, or None if the field is unknown or has failed too often,
+            already has a value, or the value did not pass validation.
+        """
+        is_valid_field, _ = self._is_valid_field(field_name)
+        if not is_valid_field or field_name in self.get_failed_fields():
+            return None
+        if getattr(self.artifact, field_name) != "Unanswered":
+            return None
+        try:
+            return self._execute_update_artifact(field_name, field_value)
+        except Exception as e:
+            self.logger.info(f"Skipping update of field {field_name} to {field_value}: {e}")
+            return None
+
     def get_artifact_for_prompt(self) -> str:
         """Returns a formatted JSON-like representation of the current state of the fields artifact.
         Any fields that were failed are completely omitted.
@@ -182,8 +213,12 @@ class Artifact:
         Returns:
             str: The string representation of the artifact.
         """
-        failed_fields = self.get_failed_fields()
-        return {k: v for k, v in self.artifact.model_dump().items() if k not in failed_fields}
+        failed_fields = frozenset(self.get_failed_fields())
+        key = (self.artifact._revision, failed_fields)
+        if self._artifact_prompt_cache is None or self._artifact_prompt_cache[0] != key:
+            artifact_state = {k: v for k, v in self.artifact.model_dump().items() if k not in failed_fields}
+            self._artifact_prompt_cache = (key, artifact_state)
+        return dict(self._artifact_prompt_cache[1])
 
     def get_schema_for_prompt(self, filter_one_field: str | None = None) -> str:
         """Gets a clean version of the original artifact schema, optimized for use in an LLM prompt.
@@ -194,8 +229,22 @@ class Artifact:
         Returns:
             str: The cleaned schema
         """
-
-        def _clean_properties(schema: dict, failed_fields: list[str]) -> str:
+        failed_fields = frozenset(self.get_failed_fields())
+        if failed_fields != self._schema_failed_fields:
+            self._schema_cache.clear()
+            self._schema_failed_fields = failed_fields
+
+        key = (filter_one_field, failed_fields)
+        schema = self._schema_cache.get(key)
+        if schema is None:
+            schema = self._build_schema_for_prompt(filter_one_field, failed_fields)
+            self._schema_cache[key] = schema
+        return schema
+
+    def _build_schema_for_prompt(self, filter_one_field: str | None, failed_fields: frozenset[str]) -> str:
+        """Builds the schema returned by get_schema_for_prompt, leaving out the failed fields."""
+
+        def _clean_properties(schema: dict, failed_fields: frozenset[str]) -> str:
             properties = schema.get("properties", {})
             clean_properties = {}
             for name, property_dict in properties.items():
@@ -223,7 +272,6 @@ class Artifact:
         else:
             schema = self.original_schema
 
-        failed_fields = self.get_failed_fields()
         properties = _clean_properties(schema, failed_fields)
         if not properties:
             self.logger.error("No properties found in the schema.")
@@ -233,7 +281,7 @@ class Artifact:
         custom_types = []
         for type_name, type_info in types_schema.items():
             if f"'type': '{type_name}'" in properties:
-                clean_schema = _clean_properties(type_info, [])
+                clean_schema = _clean_properties(type_info, frozenset())
                 if clean_schema != "{}":
                     custom_types.append(f"{type_name} = {clean_schema}")
 
@@ -251,6 +299,16 @@ Remember that when updating the artifact, the field will be the original field n
         else:
             return properties
 
+    def is_complete(self) -> bool:
+        """Whether every field of the artifact has a value, i.e. none is "Unanswered" or has failed all attempts.
+
+        Returns:
+            bool: True if all fields are completed.
+        """
+        if self.get_failed_fields():
+            return False
+        return all(value != "Unanswered" for value in self.artifact.model_dump().values())
+
     def get_failed_fields(self) -> list[str]:
         """Get a list of fields that have failed all attempts to update.
 
@@ -470,7 +528,11 @@ Remember that when updating the artifact, the field will be the original field n
     ) -> "Artifact":
         artifact = cls(kernel, service_id, input_artifact, max_artifact_field_retries)
 
-        artifact.failed_artifact_fields = json_data["failed_fields"]
+        # Attempts are (attempt, error) tuples; JSON and msgpack hand them back as lists.
+        artifact.failed_artifact_fields = {
+            field_name: [tuple(attempt) for attempt in attempts]
+            for field_name, attempts in json_data["failed_fields"].items()
+        }
 
         # Iterate over artifact fields and set them to the values in the json data
         # Skip any fields that are set as "Unanswered"
@@ -80,10 +80,11 @@ class ArtifactHandler:
             if hasattr(agent, 'conversation_history') and session_id in agent.conversation_history:
                 return agent.conversation_history[session_id]
             else:
-                # Extract from guided_conversation_agent if available
+                # Extract from the session's pooled guided conversation agent if available
                 history = []
-                if hasattr(agent, 'guided_conversation_agent') and hasattr(agent.guided_conversation_agent, 'conversation'):
-                    for message in agent.guided_conversation_agent.conversation.get_conversation_history():
+                session = agent.session_pool.peek(session_id) if hasattr(agent, 'session_pool') else None
+                if session is not None and hasattr(session.engine, 'conversation'):
+                    for message in session.engine.conversation.conversation_messages:
                         # Skip internal reasoning messages
                         if message.metadata.get("type") != "REASONING":
                             role = "assistant" if message.role == "assistant" else "user"
@@ -113,6 +114,7 @@ class ArtifactHandler:
         return {
             "id": session_id,
             "session_id": session_id,
+            "doc_type": "session",
             "patient_name": artifact.get("name", "Unknown"),
             "artifact": artifact,
             "conversation": conversation,
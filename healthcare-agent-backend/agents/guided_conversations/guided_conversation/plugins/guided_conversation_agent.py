@@ -1,9 +1,12 @@
 # Copyright (c) Microsoft. All rights reserved.
 
+import asyncio
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
+import time
+from typing import Any
 
 from pydantic import BaseModel
 from semantic_kernel import Kernel
@@ -14,19 +17,41 @@ from semantic_kernel.functions.kernel_function_decorator import kernel_function
 from guided_conversation.functions.conversation_plan import conversation_plan_function
 from guided_conversation.functions.execution import end_conversation, execution, send_message
 from guided_conversation.functions.final_update_plan import final_update_plan_function
+from guided_conversation.functions.plan_and_execute import plan_and_execute_function
 from guided_conversation.plugins.agenda import Agenda
 from guided_conversation.plugins.artifact import Artifact
 from guided_conversation.utils.conversation_helpers import Conversation, ConversationMessageType
+from guided_conversation.utils.events import EventCallback, StepEvent, emit_event
+from guided_conversation.utils.history_window import HistoryWindow
 from guided_conversation.utils.openai_tool_calling import (
     ToolValidationResult,
     parse_function_result,
     validate_tool_calling,
 )
-from guided_conversation.utils.plugin_helpers import PluginOutput, format_kernel_functions_as_tools
+from guided_conversation.utils.plugin_helpers import PluginOutput, get_tool_registry
+from guided_conversation.utils.prompt_functions import PromptLayout
 from guided_conversation.utils.resources import GCResource, ResourceConstraint
+from guided_conversation.utils.snapshot import SNAPSHOT_VERSION
+from services.metrics import registry
 
 MAX_DECISION_RETRIES = 2
 
+PLAN_VALIDATION_TOTAL = registry.counter(
+    "gc_plan_validation_total", "Plan/execute attempts by planning mode and tool-call validation result."
+)
+PLAN_STEP_SECONDS = registry.histogram(
+    "gc_plan_step_seconds", "Latency of one plan/execute attempt by planning mode."
+)
+FINAL_UPDATE_CALLS_AVOIDED_TOTAL = registry.counter(
+    "gc_final_update_calls_avoided_total", "LLM calls skipped by the final artifact update, by reason."
+)
+FAST_PATH_UPDATES_TOTAL = registry.counter(
+    "gc_fast_path_updates_total", "Artifact fields filled from the user message without a model call, by field."
+)
+
+# Maps a user message to the artifact fields that can be read off it directly, keyed by field name.
+FieldExtractor = Callable[[str], dict[str, Any]]
+
 
 class ToolName(Enum):
     UPDATE_ARTIFACT_TOOL = "update_artifact_field"
@@ -36,9 +61,33 @@ class ToolName(Enum):
     GENERATE_PLAN_TOOL = "generate_plan"
     EXECUTE_PLAN_TOOL = "execute_plan"
     FINAL_UPDATE_TOOL = "final_update"
+    PLAN_AND_EXECUTE_TOOL = "plan_and_execute"
     GUIDED_CONVERSATION_AGENT_TOOLBOX = "gc_agent"
 
 
+class PlanMode(Enum):
+    """How each step decides on its actions.
+
+    TWO_STEP: a free-text planning request followed by a tool-calling execution request (the default).
+    SINGLE_CALL: one tool-calling request that returns the reasoning as content alongside the tool calls.
+    """
+
+    TWO_STEP = "two_step"
+    SINGLE_CALL = "single_call"
+
+
+class AgendaMode(Enum):
+    """When the agenda updates selected by the model are applied.
+
+    INLINE: before the step returns its reply (the default).
+    BACKGROUND: in a background task once the step has its reply, awaited before the next planning request.
+        The agenda only shapes later turns, so its update and error correction do not need to delay the reply.
+    """
+
+    INLINE = "inline"
+    BACKGROUND = "background"
+
+
 @dataclass
 class GCOutput:
     """The output of the GuidedConversation agent.
@@ -62,6 +111,11 @@ class GuidedConversation:
         context: str | None,
         resource_constraint: ResourceConstraint | None,
         service_id: str = "gc_main",
+        plan_mode: PlanMode = PlanMode.TWO_STEP,
+        prompt_layout: PromptLayout = PromptLayout.INTERLEAVED,
+        field_extractor: FieldExtractor | None = None,
+        agenda_mode: AgendaMode = AgendaMode.INLINE,
+        history_window: HistoryWindow | None = None,
     ) -> None:
         """Initializes the GuidedConversation agent.
 
@@ -73,13 +127,26 @@ class GuidedConversation:
             context (str | None): The scene-setting for the conversation.
             resource_constraint (ResourceConstraint | None): The limit on the conversation length (for ex: number of turns).
             service_id (str): Provide a service_id associated with the kernel's service that was provided.
+            plan_mode (PlanMode): Whether to plan and execute in two model requests or in a single one.
+            prompt_layout (PromptLayout): How the planning and execution prompts are arranged.
+            field_extractor (FieldExtractor | None): Rule-based extraction of obvious field values from each user
+                message. Extracted values fill artifact fields that are still unanswered before planning, so the model
+                does not have to.
+            agenda_mode (AgendaMode): Whether agenda updates run before the reply is returned or in the background.
+            history_window (HistoryWindow | None): Token budget for the conversation history in prompts. If None, the
+                whole history is included.
         """
 
         self.logger = logging.getLogger(__name__)
         self.kernel = kernel
         self.service_id = service_id
+        self.plan_mode = plan_mode
+        self.prompt_layout = prompt_layout
+        self.field_extractor = field_extractor
+        self.agenda_mode = agenda_mode
 
-        self.conversation = Conversation()
+        self.history_window = history_window
+        self.conversation = Conversation(window=history_window)
         self.resource = GCResource(resource_constraint)
         self.artifact = Artifact(self.kernel, self.service_id, artifact)
         self.rules = rules
@@ -105,6 +172,12 @@ class GuidedConversation:
 
         self.current_failed_decision_attempts = 0
 
+        # Event callback of the step currently running, if any
+        self._on_event: EventCallback | None = None
+
+        # Agenda update left running by the previous step in AgendaMode.BACKGROUND, if any
+        self._pending_agenda_update: asyncio.Task | None = None
+
         # Set common request settings
         self.req_settings = self.kernel.get_prompt_execution_settings_from_service_id(self.service_id)
         self.req_settings.max_tokens = 2000
@@ -122,6 +195,9 @@ class GuidedConversation:
             plugin_name="gc_agent", function=self.generate_plan
         )
         self.kernel_function_execute_plan = self.kernel.add_function(plugin_name="gc_agent", function=self.execute_plan)
+        self.kernel_function_plan_and_execute = self.kernel.add_function(
+            plugin_name="gc_agent", function=self.plan_and_execute
+        )
         self.kernel_function_final_update = self.kernel.add_function(plugin_name="gc_agent", function=self.final_update)
 
     @kernel_function(
@@ -146,6 +222,7 @@ class GuidedConversation:
             self.req_settings,
             self.resource,
             self.agenda,
+            self.prompt_layout,
         )
         plan = plan.value[0].content
         self.conversation.add_messages(
@@ -185,11 +262,59 @@ class GuidedConversation:
             filter=functions,
             req_settings=req_settings,
             artifact_schema=self.artifact.get_schema_for_prompt(),
+            layout=self.prompt_layout,
+        )
+
+        return self._sort_tool_calls(result, functions)
+
+    @kernel_function(
+        name=ToolName.PLAN_AND_EXECUTE_TOOL.value,
+        description="Generate a plan and the functions to execute for it in a single model request.",
+    )
+    async def plan_and_execute(self) -> tuple[ToolValidationResult, list[tuple[str, dict]], list[tuple[str, dict]]]:
+        """Single-call alternative to generate_plan followed by execute_plan. The reasoning returned alongside the
+        tool calls is added to the conversation like a generated plan.
+
+        Returns:
+            tuple[ToolValidationResult, list[tuple[str, dict]], list[tuple[str, dict]]]: Same as execute_plan.
+        """
+        self.logger.info("Generating and executing plan in a single request.")
+
+        req_settings = self.kernel.get_prompt_execution_settings_from_service_id(self.service_id)
+        req_settings.max_tokens = self.req_settings.max_tokens
+        functions = self.plugins_order + self.terminal_plugins_order
+        result = await plan_and_execute_function(
+            self.kernel,
+            self.conversation,
+            self.context,
+            self.rules,
+            self.conversation_flow,
+            self.artifact,
+            req_settings,
+            self.resource,
+            self.agenda,
+            functions,
+            self.prompt_layout,
         )
 
+        plan = result.value[0].content if result.value else None
+        if plan:
+            self.conversation.add_messages(
+                ChatMessageContent(
+                    role=AuthorRole.ASSISTANT,
+                    content=plan,
+                    metadata={"turn_number": self.resource.turn_number, "type": ConversationMessageType.REASONING},
+                )
+            )
+        return self._sort_tool_calls(result, functions)
+
+    def _sort_tool_calls(
+        self, result, functions: list[str]
+    ) -> tuple[ToolValidationResult, list[tuple[str, dict]], list[tuple[str, dict]]]:
+        """Validates the tool calls in a model response and sorts them into regular and terminal plugins."""
         parsed_result = parse_function_result(result)
-        formatted_tools = format_kernel_functions_as_tools(self.kernel, functions)
-        validation_result = validate_tool_calling(parsed_result, formatted_tools)
+        tool_registry = get_tool_registry(self.kernel, functions)
+        validation_result = validate_tool_calling(parsed_result, tool_registry)
 
         # Sort plugin calls into two groups in the order of the corresponding lists defined in __init__
         plugins = []
@@ -211,9 +336,22 @@ class GuidedConversation:
 
         return validation_result, plugins, terminal_plugins
 
-    async def step_conversation(self, user_input: str | None = None) -> GCOutput:
+    async def step_conversation(self, user_input: str | None = None, on_event: EventCallback | None = None) -> GCOutput:
         """Given a message from a user, this will execute the guided conversation agent up until a
-        terminal plugin is called or the maximum number of decision retries is reached."""
+        terminal plugin is called or the maximum number of decision retries is reached.
+
+        If on_event is given, it receives a "message" event as soon as the reply to the user is decided
+        (before the artifact and agenda updates of the same step run) and an "artifact_update" event
+        for every artifact field that was successfully updated."""
+        self._on_event = on_event
+        try:
+            return await self._step_conversation(user_input)
+        finally:
+            self._on_event = None
+
+    async def _step_conversation(self, user_input: str | None) -> GCOutput:
+        # The previous step's background agenda update belongs before this step's messages and planning
+        await self.wait_for_pending_updates()
         print(f"Starting conversation step {self.resource.turn_number}.")
         print('User input:', user_input)
         self.logger.info(f"Starting conversation step {self.resource.turn_number}.")
@@ -227,15 +365,23 @@ class GuidedConversation:
                     metadata={"turn_number": self.resource.turn_number, "type": ConversationMessageType.DEFAULT},
                 )
             )
+            if self.field_extractor is not None:
+                await self._apply_extracted_fields(user_input)
 
         # Keep generating and executing plans until a terminal plugin is called
         # or the maximum number of decision retries is reached.
         while self.current_failed_decision_attempts < MAX_DECISION_RETRIES:
-            plan = await self.kernel.invoke(self.kernel_function_generate_plan)
-            executed_plan = await self.kernel.invoke(
-                self.kernel_function_execute_plan, KernelArguments(plan=plan.value)
-            )
+            started = time.perf_counter()
+            if self.plan_mode == PlanMode.SINGLE_CALL:
+                executed_plan = await self.kernel.invoke(self.kernel_function_plan_and_execute)
+            else:
+                plan = await self.kernel.invoke(self.kernel_function_generate_plan)
+                executed_plan = await self.kernel.invoke(
+                    self.kernel_function_execute_plan, KernelArguments(plan=plan.value)
+                )
             success, plugins, terminal_plugins = executed_plan.value
+            PLAN_STEP_SECONDS.observe(time.perf_counter() - started, mode=self.plan_mode.value)
+            PLAN_VALIDATION_TOTAL.inc(mode=self.plan_mode.value, result=success.name.lower())
 
             if success != ToolValidationResult.SUCCESS:
                 self.logger.warning(
@@ -244,20 +390,37 @@ class GuidedConversation:
                 self.current_failed_decision_attempts += 1
                 continue
 
+            # The reply is known once the tool calls are validated, so it can be streamed before the updates run.
+            if terminal_plugins:
+                plugin_name, plugin_args = terminal_plugins[0]
+                if plugin_name == f"{ToolName.SEND_MSG_TOOL.value}-{ToolName.SEND_MSG_TOOL.value}":
+                    await emit_event(self._on_event, StepEvent.MESSAGE, {"message": plugin_args["message"]})
+
             # Run a step of the orchestration logic based on the plugins called by the model.
-            # First execute all regular plugins (if any) in the order returned by execute_plan
+            # First execute all regular plugins (if any) in the order returned by execute_plan.
+            # Artifact updates come first and run concurrently across fields (see _update_artifact_fields).
+            artifact_updates = []
             for plugin_name, plugin_args in plugins:
-                # print('plugin_name:', plugin_name, 'plugin_args:', plugin_args, 'LINE163 in guided_conversation_agent.py')
                 if plugin_name == f"{ToolName.UPDATE_ARTIFACT_TOOL.value}-{ToolName.UPDATE_ARTIFACT_TOOL.value}":
                     plugin_args["conversation"] = self.conversation
                     # Modify plugin_args such that field=field_name and value=field_value
                     plugin_args["field_name"] = plugin_args.pop("field")
                     plugin_args["field_value"] = plugin_args.pop("value")
-                    await self._call_plugin(self.artifact.update_artifact, plugin_args)
-                elif plugin_name == f"{ToolName.UPDATE_AGENDA_TOOL.value}-{ToolName.UPDATE_AGENDA_TOOL.value}":
+                    artifact_updates.append(plugin_args)
+            await self._update_artifact_fields(artifact_updates)
+
+            for plugin_name, plugin_args in plugins:
+                # print('plugin_name:', plugin_name, 'plugin_args:', plugin_args, 'LINE163 in guided_conversation_agent.py')
+                if plugin_name == f"{ToolName.UPDATE_AGENDA_TOOL.value}-{ToolName.UPDATE_AGENDA_TOOL.value}":
                     plugin_args["remaining_turns"] = self.resource.get_remaining_turns()
                     plugin_args["conversation"] = self.conversation
-                    await self._call_plugin(self.agenda.update_agenda, plugin_args)
+                    # Only a step that ends with a reply can leave its agenda update running
+                    if self.agenda_mode == AgendaMode.BACKGROUND and terminal_plugins:
+                        self._pending_agenda_update = asyncio.create_task(
+                            self._update_agenda_in_background(plugin_args, self.resource.turn_number)
+                        )
+                    else:
+                        await self._call_plugin(self.agenda.update_agenda, plugin_args)
             # for plugin_name, plugin_args in plugins:
                 # print('plugin_name:', plugin_name, 'plugin_args:', plugin_args, 'LINE176 in guided_conversation_agent.py')
             # print(plugins, 'PLUGINS...261')
@@ -271,6 +434,7 @@ class GuidedConversation:
                     await self.kernel.invoke(self.kernel_function_final_update, tool_args={})
                     gc_output.ai_message = "I will terminate this conversation now. Thank you for your time!"
                     gc_output.is_conversation_over = True
+                    await emit_event(self._on_event, StepEvent.MESSAGE, {"message": gc_output.ai_message})
                 self.resource.increment_resource()
                 return gc_output
 
@@ -280,6 +444,7 @@ class GuidedConversation:
         gc_output = GCOutput()
         gc_output.ai_message = "An error occurred and I must sadly end the conversation."
         gc_output.is_conversation_over = True
+        await emit_event(self._on_event, StepEvent.MESSAGE, {"message": gc_output.ai_message})
         return gc_output
 
     @kernel_function(
@@ -287,7 +452,14 @@ class GuidedConversation:
         description="After the last message of a conversation was added to the conversation history, perform a final update of the artifact",
     )
     async def final_update(self, tool_args: dict):
-        """Explicit final update of the artifact after the conversation ends."""
+        """Explicit final update of the artifact after the conversation ends.
+        Skipped when every field is completed and the user has not said anything since the last artifact update,
+        since the conversation then holds nothing the artifact does not reflect yet."""
+        if self.artifact.is_complete() and not self.conversation.has_user_message_since_artifact_update():
+            self.logger.info("Skipping the final update, the artifact is complete and up to date.")
+            FINAL_UPDATE_CALLS_AVOIDED_TOTAL.inc(2, reason="artifact_settled")
+            return
+
         self.logger.info("Final update of the artifact prior to terminating the conversation.")
 
         # Get a plan from the model
@@ -300,24 +472,27 @@ class GuidedConversation:
             artifact_state=self.artifact.get_artifact_for_prompt(),
         )
 
+        reasoning = reasoning_response.value[0].content
+
         # Then generate the functions to be executed
         req_settings = self.kernel.get_prompt_execution_settings_from_service_id(self.service_id)
 
         functions = [ToolName.UPDATE_ARTIFACT_TOOL.value]
         execution_response = await execution(
             kernel=self.kernel,
-            reasoning=reasoning_response.value[0].content,
+            reasoning=reasoning,
             filter=functions,
             req_settings=req_settings,
             artifact_schema=self.artifact.get_schema_for_prompt(),
+            layout=self.prompt_layout,
         )
 
         parsed_result = parse_function_result(execution_response)
-        formatted_tools = format_kernel_functions_as_tools(self.kernel, functions)
-        validation_result = validate_tool_calling(parsed_result, formatted_tools)
+        tool_registry = get_tool_registry(self.kernel, functions)
+        validation_result = validate_tool_calling(parsed_result, tool_registry)
         self.logger.info(f"Parsed result: {parsed_result}")
         self.logger.info(f"Validation result: {validation_result}")
-        self.logger.info(f"Formatted tools: {formatted_tools}")
+        self.logger.info(f"Tool registry: {tool_registry}")
         # If the tool call was successful, update the artifact.
         if validation_result != ToolValidationResult.SUCCESS:
             self.logger.warning(f"No artifact change during final update due to: {validation_result.value}")
@@ -343,6 +518,7 @@ class GuidedConversation:
                     )
                     if plugin_output.update_successful:
                         self.logger.info(f"Artifact field {tool_args['field_name']} successfully updated.")
+                        await self._emit_artifact_update(tool_args["field_name"])
                         # Set turn numbers
                         for message in plugin_output.messages:
                             message.turn_number = self.resource.turn_number
@@ -355,16 +531,43 @@ class GuidedConversation:
 
     def to_json(self) -> dict:
         return {
+            "version": SNAPSHOT_VERSION,
             "artifact": self.artifact.to_json(),
             "agenda": self.agenda.to_json(),
             "chat_history": self.conversation.to_json(),
             "resource": self.resource.to_json(),
         }
 
-    async def _call_plugin(self, plugin_function: Callable, plugin_args: dict):
-        """Common logic whenever any plugin is called like handling errors and appending to chat history."""
+    async def _call_plugin(self, plugin_function: Callable, plugin_args: dict) -> bool:
+        """Common logic whenever any plugin is called like handling errors and appending to chat history.
+        Returns whether the plugin succeeded."""
         self.logger.info(f"Calling plugin {plugin_function.__name__}.")
         output: PluginOutput = await plugin_function(**plugin_args)
+        return self._record_plugin_output(plugin_function, output)
+
+    async def _update_artifact_fields(self, updates: list[dict]) -> None:
+        """Runs the update_artifact calls of one step. Updates of different fields, including any LLM error
+        correction they trigger, run concurrently, while updates of the same field keep their order. The outputs are
+        recorded in the order of the calls, so the conversation does not depend on which update finished first."""
+        outputs: list[PluginOutput | None] = [None] * len(updates)
+        indices_by_field: dict[str, list[int]] = {}
+        for idx, plugin_args in enumerate(updates):
+            indices_by_field.setdefault(plugin_args["field_name"], []).append(idx)
+
+        async def update_field(indices: list[int]) -> None:
+            for idx in indices:
+                self.logger.info(f"Calling plugin update_artifact for field {updates[idx]['field_name']}.")
+                outputs[idx] = await self.artifact.update_artifact(**updates[idx])
+
+        await asyncio.gather(*(update_field(indices) for indices in indices_by_field.values()))
+
+        for plugin_args, output in zip(updates, outputs):
+            if self._record_plugin_output(self.artifact.update_artifact, output):
+                await self._emit_artifact_update(plugin_args["field_name"])
+
+    def _record_plugin_output(self, plugin_function: Callable, output: PluginOutput) -> bool:
+        """Appends the messages of a successful plugin call to the conversation, or counts a failed decision attempt.
+        Returns whether the plugin succeeded."""
         if output.update_successful:
             # Set turn numbers
             for message in output.messages:
@@ -375,30 +578,108 @@ class GuidedConversation:
                 f"Plugin {plugin_function.__name__} failed to execute on attempt {self.current_failed_decision_attempts} out of {MAX_DECISION_RETRIES}."
             )
             self.current_failed_decision_attempts += 1
+        return output.update_successful
+
+    async def _update_agenda_in_background(self, plugin_args: dict, turn_number: int) -> None:
+        """Runs an agenda update (and its error correction) after the step that selected it has returned.
+        A failure is logged but no longer counts as a failed decision attempt, since that step is over."""
+        output: PluginOutput = await self.agenda.update_agenda(**plugin_args)
+        if output.update_successful:
+            for message in output.messages:
+                message.metadata["turn_number"] = turn_number
+            self.conversation.add_messages(output.messages)
+        else:
+            self.logger.warning(f"Background agenda update of turn {turn_number} failed.")
+
+    @property
+    def has_pending_updates(self) -> bool:
+        """Whether an agenda update left by the previous step is still running in the background."""
+        return self._pending_agenda_update is not None
+
+    async def wait_for_pending_updates(self) -> None:
+        """Waits for an agenda update still running in the background, if any. Call this before taking a snapshot
+        with to_json; the next step calls it before adding its user message."""
+        task, self._pending_agenda_update = self._pending_agenda_update, None
+        if task is None:
+            return
+        try:
+            await task
+        except Exception as e:
+            self.logger.error(f"Background agenda update failed: {e}")
+
+    async def _apply_extracted_fields(self, user_input: str) -> None:
+        """Writes the field values found by the field extractor to unanswered artifact fields without a model call.
+        Fields that already have a value and values that fail validation are skipped and left to the planner."""
+        for field_name, field_value in self.field_extractor(user_input).items():
+            message = self.artifact.try_update_artifact(field_name, field_value)
+            if message is None:
+                continue
+            self.logger.info(f"Fast path updated artifact field {field_name}.")
+            message.metadata["turn_number"] = self.resource.turn_number
+            self.conversation.add_messages(message)
+            FAST_PATH_UPDATES_TOTAL.inc(field=field_name)
+            await self._emit_artifact_update(field_name)
+
+    async def _emit_artifact_update(self, field_name: str) -> None:
+        """Reports the stored value of an updated artifact field to the event callback of the running step."""
+        if self._on_event is None:
+            return
+        value = getattr(self.artifact.artifact, field_name, None)
+        await emit_event(self._on_event, StepEvent.ARTIFACT_UPDATE, {"field": field_name, "value": value})
 
     @classmethod
     def from_json(
         cls,
         json_data: dict,
         kernel: Kernel,
+        artifact: BaseModel,
+        rules: list[str],
+        conversation_flow: str | None,
+        context: str | None,
+        resource_constraint: ResourceConstraint | None,
         service_id: str = "gc_main",
+        plan_mode: PlanMode = PlanMode.TWO_STEP,
+        prompt_layout: PromptLayout = PromptLayout.INTERLEAVED,
+        field_extractor: FieldExtractor | None = None,
+        agenda_mode: AgendaMode = AgendaMode.INLINE,
+        history_window: HistoryWindow | None = None,
     ) -> "GuidedConversation":
-        artifact = Artifact.from_json(
+        """Restores a GuidedConversation from the output of to_json (or decode_snapshot).
+        The creator-provided configuration is not part of the snapshot and must be passed in again.
+        """
+        gc = cls(
+            kernel=kernel,
+            artifact=artifact,
+            rules=rules,
+            conversation_flow=conversation_flow,
+            context=context,
+            resource_constraint=resource_constraint,
+            service_id=service_id,
+            plan_mode=plan_mode,
+            prompt_layout=prompt_layout,
+            field_extractor=field_extractor,
+            agenda_mode=agenda_mode,
+            history_window=history_window,
+        )
+        gc.artifact = Artifact.from_json(
             json_data["artifact"],
             kernel=kernel,
             service_id=service_id,
-            input_artifact=cls.artifact,
+            input_artifact=artifact,
             max_artifact_field_retries=MAX_DECISION_RETRIES,
         )
-        agenda = Agenda.from_json(
+        gc.agenda = Agenda.from_json(
             json_data["agenda"],
             kernel=kernel,
             service_id=service_id,
-            resource_constraint_mode=cls.resource_constraint.mode,
+            resource_constraint_mode=gc.resource.get_resource_mode(),
+            max_agenda_retries=MAX_DECISION_RETRIES,
         )
-        chat_history = Conversation.from_json(json_data["chat_history"])
-        resource = GCResource.from_json(json_data["resource"])
-
-        gc = cls(kernel, artifact, agenda, chat_history, resource, service_id)
-
-        return gc
\ No newline at end of file
+        gc.conversation = Conversation.from_json(json_data["chat_history"])
+        gc.conversation.window = history_window
+        gc.resource = GCResource.from_json(json_data["resource"], resource_constraint)
+
+        # Point the tool definitions at the restored plugin instances.
+        gc.kernel.add_function(plugin_name=ToolName.UPDATE_ARTIFACT_TOOL.value, function=gc.artifact.update_artifact_field)
+        gc.kernel.add_function(plugin_name=ToolName.UPDATE_AGENDA_TOOL.value, function=gc.agenda.update_agenda_items)
+        return gc
@@ -2,14 +2,22 @@
 
 import ast
 from types import NoneType
-from typing import get_args
+from typing import Any, get_args
 
-from pydantic import BaseModel, ValidationInfo, field_validator
+from pydantic import BaseModel, PrivateAttr, ValidationInfo, field_validator
 
 
 class BaseModelLLM(BaseModel):
     """A Pydantic base class for use when an LLM is completing fields. Provides a custom field validator and Pydantic Config."""
 
+    # Incremented on every successful field assignment, so values derived from the fields can be cached
+    _revision: int = PrivateAttr(default=0)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._revision += 1
+
     @field_validator("*", mode="before")
     def parse_literal_eval(cls, value: str, info: ValidationInfo):  # noqa: N805
         """An LLM will always result in a string (e.g. '["x", "y"]'), so we need to parse it to the correct type"""
@@ -8,6 +8,8 @@ from typing import Union
 
 from semantic_kernel.contents import ChatMessageContent
 
+from guided_conversation.utils.history_window import HistoryWindow, TurnBlock
+
 
 class ConversationMessageType(Enum):
     DEFAULT = "default"
@@ -15,6 +17,17 @@ class ConversationMessageType(Enum):
     REASONING = "reasoning"
 
 
+@dataclass
+class _RenderState:
+    """The rendering of a conversation for one exclude_types variant, up to rendered_messages messages."""
+
+    rendered_messages: int = 0
+    current_turn: int | None = None
+    turns: list[TurnBlock] = field(default_factory=list)
+    text: str = ""
+    line_count: int = 0
+
+
 @dataclass
 class Conversation:
     """An abstraction to represent a list of messages and common operations such as adding messages
@@ -22,10 +35,17 @@ class Conversation:
 
     Args:
         conversation_messages (list[ChatMessageContent]): A list of ChatMessageContent objects.
+        window (HistoryWindow | None): The token budget for get_repr_for_prompt. If None, the whole history is rendered.
+            The window is configuration and is not part of to_json.
     """
 
     logger = logging.getLogger(__name__)
     conversation_messages: list[ChatMessageContent] = field(default_factory=list)
+    window: HistoryWindow | None = None
+    # Incrementally maintained renderings for get_repr_for_prompt, keyed by the frozen exclude_types
+    _render_states: dict[frozenset | None, "_RenderState"] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def add_messages(self, messages: Union[ChatMessageContent, list[ChatMessageContent], "Conversation", None]) -> None:
         """Add a message, list of messages to the conversation or merge another conversation into the end of this one.
@@ -66,44 +86,77 @@ class Conversation:
         if len(self.conversation_messages) == 0:
             return "None"
 
-        # Do not include the excluded messages types in the conversation history repr.
-        if exclude_types is not None:
-            conversation_messages = [
-                message
-                for message in self.conversation_messages
-                if "type" in message.metadata and message.metadata["type"] not in exclude_types
-            ]
-        else:
-            conversation_messages = self.conversation_messages
+        # Each exclude_types variant keeps its own rendering and only renders the messages added since the last call.
+        key = frozenset(exclude_types) if exclude_types is not None else None
+        state = self._render_states.get(key)
+        if state is None or state.rendered_messages > len(self.conversation_messages):
+            state = self._render_states[key] = _RenderState()
+        self._render_new_messages(state, exclude_types)
+
+        if self.window is not None:
+            return self.window.render(state.turns)
+        return state.text
+
+    def _render_new_messages(self, state: "_RenderState", exclude_types: list[ConversationMessageType] | None) -> None:
+        """Extends a rendering with the messages added since it was last brought up to date.
+        Each message becomes one line in the block of its turn, flagged if it is reasoning or an artifact update."""
+        new_lines = []
+        for message in self.conversation_messages[state.rendered_messages :]:
+            # Do not include the excluded messages types in the conversation history repr.
+            if exclude_types is not None and (
+                "type" not in message.metadata or message.metadata["type"] in exclude_types
+            ):
+                continue
 
-        to_join = []
-        current_turn = None
-        for message in conversation_messages:
             participant_name = message.name
             # Modify the default user to be capitalized for consistency with how assistant is written.
             if participant_name == "user":
                 participant_name = "User"
 
             # If the turn number is None, don't include it in the string
-            if "turn_number" in message.metadata and current_turn != message.metadata["turn_number"]:
-                current_turn = message.metadata["turn_number"]
-                to_join.append(f"[Turn {current_turn}]")
+            if "turn_number" in message.metadata and state.current_turn != message.metadata["turn_number"]:
+                state.current_turn = message.metadata["turn_number"]
+                header = f"[Turn {state.current_turn}]"
+                state.turns.append((header, []))
+                new_lines.append(header)
+            elif not state.turns:
+                state.turns.append((None, []))
 
             # Add the message content
-            if (message.role == "assistant") and (
-                "type" in message.metadata and message.metadata["type"] == ConversationMessageType.ARTIFACT_UPDATE
-            ):
-                to_join.append(message.content)
+            message_type = message.metadata.get("type")
+            is_chatter = message_type in (ConversationMessageType.REASONING, ConversationMessageType.ARTIFACT_UPDATE)
+            if (message.role == "assistant") and (message_type == ConversationMessageType.ARTIFACT_UPDATE):
+                line = message.content
             elif message.role == "assistant":
-                to_join.append(f"Assistant: {message.content}")
+                line = f"Assistant: {message.content}"
             else:
                 user_string = message.content.strip()
                 if user_string == "":
-                    to_join.append(f"{participant_name}: <sent an empty message>")
+                    line = f"{participant_name}: <sent an empty message>"
                 else:
-                    to_join.append(f"{participant_name}: {user_string}")
-        conversation_string = "\n".join(to_join)
-        return conversation_string
+                    line = f"{participant_name}: {user_string}"
+            state.turns[-1][1].append((line, is_chatter))
+            new_lines.append(line)
+
+        state.rendered_messages = len(self.conversation_messages)
+        if new_lines:
+            if state.line_count:
+                state.text += "\n"
+            state.text += "\n".join(new_lines)
+            state.line_count += len(new_lines)
+
+    def has_user_message_since_artifact_update(self) -> bool:
+        """Whether the user has sent a message after the most recent artifact update in the conversation.
+
+        Returns:
+            bool: True if a user message follows the last artifact update, or if there was no artifact update.
+        """
+        for message in reversed(self.conversation_messages):
+            if message.metadata.get("type") == ConversationMessageType.ARTIFACT_UPDATE:
+                return False
+            if message.role == "user":
+                return True
+        return True
 
     def set_turn_numbers(self, turn_number: int) -> None:
         """Set all the turn numbers in the conversation to the given turn number.
@@ -115,6 +168,7 @@ class Conversation:
             None"""
         for message in self.conversation_messages:
             message.metadata["turn_number"] = turn_number
+        self._render_states.clear()
 
     @staticmethod
     def message_to_json(message: ChatMessageContent) -> dict:
@@ -127,13 +181,14 @@ class Conversation:
         Returns:
             dict: A JSON serializable dictionary representation of the ChatMessageContent object.
         """
+        message_type = message.metadata.get("type", ConversationMessageType.DEFAULT)
         return {
-            "role": message.role,
+            "role": message.role.value if isinstance(message.role, Enum) else message.role,
             "content": message.content,
             "name": message.name,
             "metadata": {
                 "turn_number": message.metadata.get("turn_number", None),
-                "type": message.metadata.get("type", ConversationMessageType.DEFAULT),
+                "type": message_type.value if isinstance(message_type, Enum) else message_type,
             },
         }
 
@@ -152,16 +207,20 @@ class Conversation:
     ) -> "Conversation":
         conversation = cls()
         for message in json_data["conversation"]["conversation_messages"]:
+            # message_to_json nests these under "metadata"; older snapshots stored them at the top level.
+            metadata = message.get("metadata", message)
+            message_metadata = {
+                "turn_number": metadata.get("turn_number"),
+                "type": ConversationMessageType(metadata.get("type", ConversationMessageType.DEFAULT.value)),
+            }
+            if metadata.get("timestamp"):
+                message_metadata["timestamp"] = datetime.datetime.fromisoformat(metadata["timestamp"])
             conversation.add_messages(
                 ChatMessageContent(
                     role=message["role"],
                     content=message["content"],
-                    name=message["name"],
-                    metadata={
-                        "turn_number": message["turn_number"],
-                        "type": ConversationMessageType(message["type"]),
-                        "timestamp": datetime.datetime.fromisoformat(message["timestamp"]),
-                    },
+                    name=message.get("name"),
+                    metadata=message_metadata,
                 )
             )
 
@@ -0,0 +1,38 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+from collections.abc import Awaitable, Callable
+import inspect
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Receives progress events while a conversation step runs, e.g. to stream them to a client.
+# It is called with the event name and a JSON-serializable payload and may be sync or async.
+EventCallback = Callable[[str, dict[str, Any]], Awaitable[None] | None]
+
+
+class StepEvent:
+    """Names of the events emitted during a conversation step."""
+
+    MESSAGE = "message"
+    ARTIFACT_UPDATE = "artifact_update"
+    DONE = "done"
+
+
+async def emit_event(callback: EventCallback | None, event: str, data: dict[str, Any]) -> None:
+    """Calls the event callback, if any. Errors raised by the callback are logged and never fail the step.
+
+    Args:
+        callback (EventCallback | None): The callback to notify.
+        event (str): The name of the event.
+        data (dict[str, Any]): The payload of the event.
+    """
+    if callback is None:
+        return
+    try:
+        result = callback(event, data)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.error(f"Event callback failed for {event}: {e}")
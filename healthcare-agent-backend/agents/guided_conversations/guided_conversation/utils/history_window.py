@@ -0,0 +1,101 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+from dataclasses import dataclass
+import logging
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional, token counts are estimated from the text length without it
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+
+# Rough characters per token, only used when tiktoken is not installed
+_CHARS_PER_TOKEN = 4
+
+# A rendered turn: its "[Turn n]" header (None for messages without a turn number) and its lines,
+# each flagged with whether it is reasoning or artifact-update chatter that can be dropped from older turns.
+TurnBlock = tuple[str | None, list[tuple[str, bool]]]
+
+
+class Tokenizer:
+    """Counts and truncates text in model tokens, using tiktoken when it is installed."""
+
+    def __init__(self, encoding_name: str = DEFAULT_ENCODING) -> None:
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                logger.warning(f"Could not load tiktoken encoding {encoding_name}, estimating token counts: {e}")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return -(-len(text) // _CHARS_PER_TOKEN)
+
+    def keep_last(self, text: str, max_tokens: int) -> str:
+        """Returns the end of the text that fits in max_tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[-max_tokens:])
+        return text[-max_tokens * _CHARS_PER_TOKEN :]
+
+
+@dataclass
+class HistoryWindow:
+    """Token budget for the conversation history rendered into prompts.
+
+    The most recent turns are kept verbatim. Older turns lose their reasoning and artifact-update lines, and if the
+    history still does not fit, the oldest turns are dropped. As a last resort the remaining text is cut from the
+    start, so the rendered history never exceeds max_tokens.
+
+    Args:
+        max_tokens (int): The maximum number of tokens of the rendered history.
+        recent_turns (int): The number of most recent turns that are kept verbatim.
+        encoding_name (str): The tiktoken encoding of the model.
+    """
+
+    max_tokens: int
+    recent_turns: int = 3
+    encoding_name: str = DEFAULT_ENCODING
+
+    def __post_init__(self) -> None:
+        self.tokenizer = Tokenizer(self.encoding_name)
+
+    def render(self, turns: list[TurnBlock]) -> str:
+        """Renders the turns of a conversation within the token budget.
+
+        Args:
+            turns (list[TurnBlock]): The rendered turns, oldest first.
+
+        Returns:
+            str: The history, one line per message with a header line per turn.
+        """
+        split = max(len(turns) - self.recent_turns, 0)
+        blocks = []
+        for idx, (header, lines) in enumerate(turns):
+            kept = [line for line, is_chatter in lines if idx >= split or not is_chatter]
+            if kept:
+                blocks.append("\n".join(([header] if header is not None else []) + kept))
+
+        # Each block is joined to the next with a newline, which is counted with the block
+        sizes = [self.tokenizer.count(block) + 1 for block in blocks]
+        remaining = sum(sizes)
+        omitted = 0
+        marker = ""
+        while remaining + (self.tokenizer.count(marker) + 1 if marker else 0) > self.max_tokens:
+            if omitted >= len(blocks) - 1:
+                break
+            remaining -= sizes[omitted]
+            omitted += 1
+            marker = f"[{omitted} earlier turn(s) omitted]"
+
+        history = "\n".join(([marker] if marker else []) + blocks[omitted:])
+        if self.tokenizer.count(history) > self.max_tokens:
+            history = self.tokenizer.keep_last(history, self.max_tokens)
+        return history
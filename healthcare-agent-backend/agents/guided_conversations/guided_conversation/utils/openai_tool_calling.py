@@ -24,6 +24,32 @@ class Tool:
     args: list[ToolArg]
 
 
+@dataclass(frozen=True)
+class ToolRegistry:
+    """The tools the model may call, indexed by tool name, with the names of the required arguments of each.
+    Build it once from the tool definitions and reuse it, so validating a response is a lookup per tool call."""
+
+    required_args: dict[str, frozenset[str]]
+
+    @classmethod
+    def from_tool_definitions(cls, kernel_function_tools: list[dict]) -> "ToolRegistry":
+        """Builds the registry from tool definitions in the function calling format.
+        If a name is defined more than once, the first definition wins."""
+        required_args: dict[str, frozenset[str]] = {}
+        for tool_definition in kernel_function_tools:
+            parameters = tool_definition["function"]["parameters"]
+            required = frozenset(parameters["required"]).intersection(parameters["properties"])
+            required_args.setdefault(tool_definition["function"]["name"], required)
+        return cls(required_args)
+
+    def with_tools(self, kernel_function_tools: list[dict]) -> "ToolRegistry":
+        """Returns a registry that also contains the given tool definitions, keeping the existing ones on conflict."""
+        if not kernel_function_tools:
+            return self
+        added = ToolRegistry.from_tool_definitions(kernel_function_tools)
+        return ToolRegistry(added.required_args | self.required_args)
+
+
 class ToolValidationResult(Enum):
     NO_TOOL_CALLED = "No tool was called"
     INVALID_TOOL_CALLED = "A tool was called with an unexpected name"
@@ -119,7 +145,9 @@ def construct_tool_objects(kernel_function_tools: dict) -> list[Tool]:
     return tool_objects
 
 
-def validate_tool_calling(response: dict[str, Any], request_tool_param: dict) -> ToolValidationResult:
+def validate_tool_calling(
+    response: dict[str, Any], request_tool_param: list[dict] | ToolRegistry
+) -> ToolValidationResult:
     """Validate that the response from the LLM called tools corrected.
     1. Check if any tool was called.
     2. Check if the tools called were valid (names match)
@@ -127,13 +155,17 @@ def validate_tool_calling(response: dict[str, Any], request_tool_param: dict) ->
 
     Args:
         response (dict[str, Any]): The response from the LLM containing the tools called (output of parse_function_result)
-        tools (list[Tool]): The list of tools that can be called by the model.
+        request_tool_param (list[dict] | ToolRegistry): The tools that can be called by the model, either as tool
+            definitions in the function calling format or as a prebuilt ToolRegistry.
 
     Returns:
         ToolValidationResult: The result of the validation. ToolValidationResult.SUCCESS if the validation passed.
     """
 
-    tool_objects = construct_tool_objects(request_tool_param)
+    if isinstance(request_tool_param, ToolRegistry):
+        registry = request_tool_param
+    else:
+        registry = ToolRegistry.from_tool_definitions(request_tool_param)
     tool_names = response.get("tool_names", [])
     tool_args_list = response.get("tool_args_list", [])
 
@@ -144,15 +176,15 @@ def validate_tool_calling(response: dict[str, Any], request_tool_param: dict) ->
 
     for tool_name, tool_args in zip(tool_names, tool_args_list, strict=True):
         # Check the tool names is valid.
-        tool: Tool | None = next((t for t in tool_objects if t.name == tool_name), None)
-        if not tool:
+        required_args = registry.required_args.get(tool_name)
+        if required_args is None:
             logger.warning(f"Invalid tool called: {tool_name}")
             return ToolValidationResult.INVALID_TOOL_CALLED
 
-        for arg in tool.args:
-            # Check if the required arguments were passed.
-            if arg.required and arg.argument_name not in tool_args:
-                logger.warning(f"Missing required argument '{arg.argument_name}' for tool '{tool_name}'.")
-                return ToolValidationResult.MISSING_REQUIRED_ARGUMENT
+        # Check if the required arguments were passed.
+        missing_args = required_args.difference(tool_args)
+        if missing_args:
+            logger.warning(f"Missing required argument '{min(missing_args)}' for tool '{tool_name}'.")
+            return ToolValidationResult.MISSING_REQUIRED_ARGUMENT
 
     return ToolValidationResult.SUCCESS
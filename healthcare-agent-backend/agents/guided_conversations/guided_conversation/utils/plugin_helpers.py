@@ -1,5 +1,6 @@
 # Copyright (c) Microsoft. All rights reserved.
 
+import weakref
 from dataclasses import dataclass
 
 from pydantic import ValidationError
@@ -9,7 +10,8 @@ from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.contents import ChatMessageContent
 from semantic_kernel.functions import KernelArguments
 
-from guided_conversation.utils.openai_tool_calling import parse_function_result, validate_tool_calling
+from guided_conversation.utils.openai_tool_calling import ToolRegistry, parse_function_result, validate_tool_calling
+from guided_conversation.utils.prompt_functions import get_prompt_function, prompt_arguments
 
 
 @dataclass
@@ -37,6 +39,73 @@ def format_kernel_functions_as_tools(kernel: Kernel, functions: list[str]):
     return formatted_tools
 
 
+# Tool registries per kernel, keyed by id(kernel) and then by the function filter they were built for. Kernels are
+# not hashable, so an entry is dropped by a weakref finalizer when its kernel is garbage collected, before the id can
+# be reused. Sessions re-register the same functions on a shared kernel, so after the first turn a registry is found
+# here without formatting any function metadata.
+_tool_registries: dict[int, dict[tuple, ToolRegistry]] = {}
+
+
+def _kernel_tool_registries(kernel: Kernel) -> dict[tuple, ToolRegistry]:
+    registries = _tool_registries.get(id(kernel))
+    if registries is None:
+        registries = _tool_registries[id(kernel)] = {}
+        weakref.finalize(kernel, _tool_registries.pop, id(kernel), None)
+    return registries
+
+
+def _function_fingerprint(functions_metadata: list) -> tuple:
+    """The parts of the function metadata that end up in the tool schemas, in a hashable form."""
+    return tuple(
+        sorted(
+            (
+                metadata.fully_qualified_name,
+                metadata.description,
+                tuple(
+                    (parameter.name, parameter.type_, parameter.is_required, parameter.description)
+                    for parameter in metadata.parameters
+                ),
+            )
+            for metadata in functions_metadata
+        )
+    )
+
+
+def get_tool_registry(
+    kernel: Kernel, functions: list[str] | None = None, filters: dict[str, list[str]] | None = None
+) -> ToolRegistry:
+    """Returns the registry of the kernel functions the model may call. Registries are cached per kernel and
+    keyed by the names and parameters of the matching functions, so registering or replacing a function
+    builds a new one.
+
+    Args:
+        kernel (Kernel): The kernel object.
+        functions (list[str] | None): If provided, only functions with these names are included,
+            like format_kernel_functions_as_tools.
+        filters (dict[str, list[str]] | None): Function choice filters (included_plugins, excluded_plugins, ...),
+            as passed to FunctionChoiceBehavior.
+
+    Returns:
+        ToolRegistry: The registry of the matching kernel functions.
+    """
+    if filters:
+        functions_metadata = kernel.get_list_of_function_metadata(filters)
+    else:
+        functions_metadata = kernel.get_full_list_of_function_metadata()
+    if functions is not None:
+        functions_metadata = [metadata for metadata in functions_metadata if metadata.name in functions]
+
+    registries = _kernel_tool_registries(kernel)
+    key = _function_fingerprint(functions_metadata)
+    registry = registries.get(key)
+    if registry is None:
+        registry = ToolRegistry.from_tool_definitions(
+            [kernel_function_metadata_to_function_call_format(metadata) for metadata in functions_metadata]
+        )
+        registries[key] = registry
+    return registry
+
+
 async def fix_error(
     kernel: Kernel, prompt_template: str, req_settings: AzureChatCompletion, arguments: KernelArguments
 ) -> dict:
@@ -58,28 +127,18 @@ async def fix_error(
     Returns:
         dict: The result of the plugin call.
     """
-    kernel_function_obj = kernel.add_function(
-        prompt=prompt_template,
-        function_name="error_correction",
-        plugin_name="error_correction",
-        template_format="handlebars",
-        prompt_execution_settings=req_settings,
-    )
+    # The prompt function is built once per template and shared; only the settings and arguments vary per call.
+    kernel_function_obj = get_prompt_function("error_correction", "error_correction", prompt_template)
 
-    result = await kernel.invoke(function=kernel_function_obj, arguments=arguments)
+    result = await kernel.invoke(function=kernel_function_obj, arguments=prompt_arguments(req_settings, arguments))
     parsed_result = parse_function_result(result)
 
-    formatted_tools = []
-    for _, kernel_plugin_def in kernel.plugins.items():
-        for _, function_def in kernel_plugin_def.functions.items():
-            func_metadata = function_def.metadata
-            formatted_tools.append(kernel_function_metadata_to_function_call_format(func_metadata))
-
-    # Add any tools from req_settings
-    if req_settings.tools:
-        formatted_tools.extend(req_settings.tools)
+    # Only the functions offered to the model by the function choice filters are valid, plus any tools from req_settings
+    function_choice_behavior = req_settings.function_choice_behavior
+    filters = function_choice_behavior.filters if function_choice_behavior is not None else None
+    tool_registry = get_tool_registry(kernel, filters=filters).with_tools(req_settings.tools)
 
-    validation_result = validate_tool_calling(parsed_result, formatted_tools)
+    validation_result = validate_tool_calling(parsed_result, tool_registry)
     parsed_result["validation_result"] = validation_result
     return parsed_result
 
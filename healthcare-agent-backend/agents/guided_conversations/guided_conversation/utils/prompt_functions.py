@@ -0,0 +1,118 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+from enum import Enum
+import time
+
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.functions import FunctionResult, KernelArguments
+from semantic_kernel.functions.kernel_function_from_prompt import KernelFunctionFromPrompt
+
+from services.metrics import registry
+
+PROMPT_TOKENS_TOTAL = registry.counter(
+    "gc_prompt_tokens_total", "Prompt tokens sent to the model by prompt function and prompt layout."
+)
+PROMPT_CACHED_TOKENS_TOTAL = registry.counter(
+    "gc_prompt_cached_tokens_total",
+    "Prompt tokens served from the model endpoint's prompt cache by prompt function and prompt layout.",
+)
+PROMPT_SECONDS = registry.histogram(
+    "gc_prompt_seconds", "Latency of one prompt function call by prompt function and prompt layout."
+)
+
+
+class PromptLayout(Enum):
+    """How the planning and execution prompts are arranged.
+
+    INTERLEAVED: the original layout, with per-session and per-turn values placed inside the instructions (the default).
+    CACHE_FRIENDLY: the instructions shared by every session come first and are byte-identical on every call, followed
+        by the per-session values and then the per-turn values, so the model endpoint can reuse a cached prefix.
+    """
+
+    INTERLEAVED = "interleaved"
+    CACHE_FRIENDLY = "cache_friendly"
+
+# Prompt functions keyed by (plugin_name, function_name, prompt_template). They hold no per-call state, so a single
+# instance is shared by every kernel and session in the process.
+_prompt_functions: dict[tuple[str, str, str], KernelFunctionFromPrompt] = {}
+
+
+def get_prompt_function(plugin_name: str, function_name: str, prompt_template: str) -> KernelFunctionFromPrompt:
+    """Returns the handlebars prompt function for the template, building (and parsing the template) only on first use.
+
+    The function is created without execution settings and is not added to any kernel. Pass the settings for each
+    call through the arguments (see prompt_arguments) and invoke it with kernel.invoke(function=...).
+
+    Args:
+        plugin_name (str): The plugin name of the prompt function.
+        function_name (str): The name of the prompt function.
+        prompt_template (str): The handlebars prompt template.
+
+    Returns:
+        KernelFunctionFromPrompt: The shared prompt function.
+    """
+    key = (plugin_name, function_name, prompt_template)
+    function = _prompt_functions.get(key)
+    if function is None:
+        function = KernelFunctionFromPrompt(
+            function_name=function_name,
+            plugin_name=plugin_name,
+            prompt=prompt_template,
+            template_format="handlebars",
+        )
+        _prompt_functions[key] = function
+    return function
+
+
+def prompt_arguments(
+    req_settings: PromptExecutionSettings, arguments: KernelArguments | None = None, **kwargs
+) -> KernelArguments:
+    """Builds the arguments for a shared prompt function, carrying the execution settings for this call.
+
+    Args:
+        req_settings (PromptExecutionSettings): The prompt execution settings for this call.
+        arguments (KernelArguments | None): Template arguments to copy, if already built.
+        **kwargs: Additional template arguments.
+
+    Returns:
+        KernelArguments: The template arguments together with the execution settings.
+    """
+    return KernelArguments(settings=req_settings, **(arguments or {}), **kwargs)
+
+
+async def invoke_prompt_function(
+    kernel: Kernel, function: KernelFunctionFromPrompt, arguments: KernelArguments, layout: PromptLayout
+) -> FunctionResult:
+    """Invokes a shared prompt function and records its latency and prompt token usage, including cached tokens.
+
+    Args:
+        kernel (Kernel): The kernel object.
+        function (KernelFunctionFromPrompt): The prompt function to invoke.
+        arguments (KernelArguments): The arguments, including the execution settings (see prompt_arguments).
+        layout (PromptLayout): The layout of the prompt, used as a metric label.
+
+    Returns:
+        FunctionResult: The result of the invocation.
+    """
+    started = time.perf_counter()
+    result = await kernel.invoke(function=function, arguments=arguments)
+    PROMPT_SECONDS.observe(time.perf_counter() - started, function=function.name, layout=layout.value)
+
+    prompt_tokens, cached_tokens = _get_prompt_token_usage(result)
+    PROMPT_TOKENS_TOTAL.inc(prompt_tokens, function=function.name, layout=layout.value)
+    PROMPT_CACHED_TOKENS_TOTAL.inc(cached_tokens, function=function.name, layout=layout.value)
+    return result
+
+
+def _get_prompt_token_usage(result: FunctionResult) -> tuple[int, int]:
+    """Returns the prompt tokens and the cached prompt tokens reported in the usage metadata of a chat result."""
+    if result is None or not result.value:
+        return 0, 0
+    message = result.value[0]
+    # The raw OpenAI response carries prompt_tokens_details.cached_tokens; fall back to the kernel's usage metadata.
+    usage = getattr(getattr(message, "inner_content", None), "usage", None) or message.metadata.get("usage")
+    if usage is None:
+        return 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(details, "cached_tokens", 0) or 0
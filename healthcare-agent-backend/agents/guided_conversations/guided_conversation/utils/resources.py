@@ -240,9 +240,10 @@ You will need to plan your actions carefully using the agenda: you want to avoid
     def from_json(
         cls,
         json_data: dict,
+        resource_constraint: ResourceConstraint | None = None,
     ) -> "GCResource":
         gc_resource = cls(
-            resource_constraint=None,
+            resource_constraint=resource_constraint,
             initial_seconds_per_turn=120,
         )
         gc_resource.turn_number = json_data["turn_number"]
@@ -0,0 +1,88 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+from enum import Enum
+import json
+import logging
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, JSON snapshots work without it
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the layout produced by GuidedConversation.to_json changes,
+# and teach _upgrade_snapshot how to migrate the previous version.
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotFormat(Enum):
+    """Encoding used for a serialized GuidedConversation snapshot.
+    JSON is human readable and can be stored in document databases as is.
+    MSGPACK is a compact binary encoding that is faster to encode and decode."""
+
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+# A one byte tag in front of every encoded snapshot, so decode_snapshot can detect the format.
+_FORMAT_TAGS = {
+    SnapshotFormat.JSON: b"J",
+    SnapshotFormat.MSGPACK: b"M",
+}
+
+
+def encode_snapshot(state: dict, snapshot_format: SnapshotFormat = SnapshotFormat.JSON) -> bytes:
+    """Encode the output of GuidedConversation.to_json into bytes.
+
+    Args:
+        state (dict): The snapshot to encode. A "version" key is added if it is missing.
+        snapshot_format (SnapshotFormat): The encoding to use. Defaults to JSON.
+
+    Returns:
+        bytes: The tagged, encoded snapshot.
+    """
+    state = {"version": SNAPSHOT_VERSION, **state}
+    if snapshot_format == SnapshotFormat.MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("The msgpack package is required for SnapshotFormat.MSGPACK.")
+        payload = msgpack.packb(state, use_bin_type=True)
+    else:
+        payload = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _FORMAT_TAGS[snapshot_format] + payload
+
+
+def decode_snapshot(data: bytes) -> dict:
+    """Decode bytes produced by encode_snapshot back into a dict accepted by GuidedConversation.from_json.
+
+    Args:
+        data (bytes): The encoded snapshot.
+
+    Returns:
+        dict: The snapshot, upgraded to the current SNAPSHOT_VERSION.
+    """
+    if not data:
+        raise ValueError("Cannot decode an empty snapshot.")
+
+    tag, payload = data[:1], data[1:]
+    if tag == _FORMAT_TAGS[SnapshotFormat.MSGPACK]:
+        if msgpack is None:
+            raise RuntimeError("The msgpack package is required to decode this snapshot.")
+        state = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    elif tag == _FORMAT_TAGS[SnapshotFormat.JSON]:
+        state = json.loads(payload.decode("utf-8"))
+    else:
+        raise ValueError(f"Unknown snapshot format tag: {tag!r}")
+
+    return _upgrade_snapshot(state)
+
+
+def _upgrade_snapshot(state: dict) -> dict:
+    """Migrate a decoded snapshot to the current SNAPSHOT_VERSION."""
+    version = state.get("version", SNAPSHOT_VERSION)
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Snapshot version {version} is newer than the supported version {SNAPSHOT_VERSION}."
+        )
+    state["version"] = SNAPSHOT_VERSION
+    return state
@@ -2,56 +2,50 @@ import os
 import asyncio
 from datetime import datetime
 import json
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.functions import kernel_function
-from azure.cosmos import CosmosClient, PartitionKey
  
+from services.cosmos_client import CosmosResources, get_cosmos_resources
+from services.llm_resilience import create_chat_service
 from .data_collection import DataCollectionAgent
 from .email_agent import EmailAgent
+from .session_documents import (
+    DOC_TYPE_SESSION, SESSION_INDEXING_POLICY, backfill_session_doc_type, read_session, read_summary
+)
+from .session_locks import SessionLocks
  
 # Load environment variables explicitly
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../.env.dev"))
  
 class Orchestrator:
  
-    def __init__(self):
+    def __init__(self, cosmos: CosmosResources = None):
  
+        # Storage shares one async Cosmos DB client per process
+        cosmos = cosmos or get_cosmos_resources()
+
         # Initialize Semantic Kernel explicitly
         self.kernel = Kernel()
  
         # Configure Azure OpenAI Chat Completion Service explicitly
-        chat_service = AzureChatCompletion(
-            deployment_name='chat-completion',
-            api_version="2025-01-01-preview",
-            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            service_id="orchestrator_service",
-        )
+        chat_service = create_chat_service(service_id="orchestrator_service")
         self.kernel.add_service(chat_service)
  
         # Initialize Data Collection and Email agents explicitly
-        self.data_collection_agent = DataCollectionAgent()
+        self.data_collection_agent = DataCollectionAgent(cosmos=cosmos)
         self.email_agent = EmailAgent()
+
+        # Turns of one session run one at a time; different sessions run concurrently
+        self.session_locks = SessionLocks()
  
-        # Set up Cosmos DB client explicitly
-        self.cosmos_client = CosmosClient(
-            os.getenv("COSMOS_ENDPOINT"), os.getenv("COSMOS_KEY")
-        )
- 
+        # Set up Cosmos DB container explicitly (created on startup by the app lifespan)
+        self.cosmos = cosmos
         self.database_name = os.getenv("COSMOS_DB")
         self.container_name = os.getenv("COSMOS_CONTAINER")
- 
-        self.database = self.cosmos_client.create_database_if_not_exists(
-            id=self.database_name
-        )
- 
-        self.container = self.database.create_container_if_not_exists(
-            id=self.container_name,
-            partition_key=PartitionKey(path="/session_id"),
-            offer_throughput=400
+        self.container = cosmos.get_container(
+            self.database_name, self.container_name, indexing_policy=SESSION_INDEXING_POLICY
         )
  
     @kernel_function
@@ -68,23 +62,25 @@ class Orchestrator:
         return {"session_id": session_id, "message": initial_message}
  
     @kernel_function
-    async def handle_user_message(self, session_id: str, user_input: str):
+    async def handle_user_message(self, session_id: str, user_input: str, on_event=None):
         """
         Explicitly handle user messages by delegating to Data Collection Agent.
         If conversation completes, explicitly trigger email sending.
+        on_event optionally receives progress events for streaming (see DataCollectionAgent.handle_user_input).
         """
-        response = await self.data_collection_agent.handle_user_input(session_id, user_input)
-        print('[Orchestrator] Response from DataCollectionAgent:', response)
- 
-        # Check explicitly if the conversation is complete
-        if response.get('is_conversation_over', False):
-            print("[Orchestrator] Conversation completed. Now triggering email agent explicitly.")
-            email_result = await self.finalize_conversation_and_send_email(session_id)
-            print('[Orchestrator] Final Email Response:', email_result)
+        async with self.session_locks.hold(session_id, operation="message"):
+            response = await self.data_collection_agent.handle_user_input(session_id, user_input, on_event=on_event)
+            print('[Orchestrator] Response from DataCollectionAgent:', response)
+
+            # Check explicitly if the conversation is complete
+            if response.get('is_conversation_over', False):
+                print("[Orchestrator] Conversation completed. Now triggering email agent explicitly.")
+                email_result = await self.finalize_conversation_and_send_email(session_id)
+                print('[Orchestrator] Final Email Response:', email_result)
  
         return response
     
-    async def handle_prescription_upload(self, session_id: str, file_urls: List[str]):
+    async def handle_prescription_upload(self, session_id: str, file_urls: List[str], on_event=None):
         """
         Handle prescription uploads by calling document_upload_input handler
         and ensuring the conversation state is properly updated.
@@ -92,6 +88,7 @@ class Orchestrator:
         Args:
             session_id: The session identifier
             file_urls: URLs to the uploaded files in blob storage
+            on_event: Optional callback receiving processing status and extracted fields
             
         Returns:
             Dict with message and conversation status
@@ -100,10 +97,12 @@ class Orchestrator:
         
         try:
             # Use the existing method in DataCollectionAgent
-            result = await self.data_collection_agent.handle_document_upload_input(
-                session_id=session_id,
-                file_urls=file_urls
-            )
+            async with self.session_locks.hold(session_id, operation="upload"):
+                result = await self.data_collection_agent.handle_document_upload_input(
+                    session_id=session_id,
+                    file_urls=file_urls,
+                    on_event=on_event
+                )
             
             # Ensure the conversation can continue with knowledge of document-extracted info
             print(f"[Orchestrator] Document upload processed successfully: {result}")
@@ -124,16 +123,15 @@ class Orchestrator:
         """
         Explicitly finalize conversation, fetch artifact from CosmosDB, and trigger email.
         """
-        query = f"SELECT * FROM c WHERE c.session_id = '{session_id}'"
-        items = list(self.container.query_items(query=query, enable_cross_partition_query=True))
+        summary = await read_summary(self.container, session_id)
  
-        print('[Orchestrator] Items retrieved for session:', items)
+        print('[Orchestrator] Session summary retrieved:', summary)
  
-        if not items:
+        if not summary:
             print('[Orchestrator] No details found for session:', session_id)
             return {"message": "No details found for this session."}
  
-        user_details = items[0].get('artifact', {})
+        user_details = summary.get('artifact', {})
  
         # Debug print statement
         print("[Orchestrator] User details explicitly fetched for email:", user_details)
@@ -148,15 +146,61 @@ class Orchestrator:
         """
         Explicitly retrieve full conversation history from Cosmos DB.
         """
-        query = f"SELECT * FROM c WHERE c.session_id = '{session_id}'"
-        items = list(self.container.query_items(query=query, enable_cross_partition_query=True))
-        print('[Orchestrator] Retrieved conversation items:', items)
-        if not items:
+        # The summary and any turn documents written in incremental mode share the session's partition
+        summary, conversation_history = await read_session(self.container, session_id)
+        print('[Orchestrator] Retrieved conversation messages:', len(conversation_history))
+        if not summary:
             return {"history": []}
  
-        conversation_history = items[0].get('conversation', [])
         return {"history": conversation_history}
  
+    async def backfill_legacy_sessions(self) -> int:
+        """
+        Give session summaries saved before doc_type existed the fields list_sessions filters and sorts on.
+        """
+        updated = await backfill_session_doc_type(self.container)
+        if updated:
+            print(f"[Orchestrator] Backfilled doc_type on {updated} legacy session summaries")
+        return updated
+
+    async def list_sessions(self, page_size: int = 20, continuation_token: Optional[str] = None,
+                            from_date: Optional[datetime] = None, to_date: Optional[datetime] = None):
+        """
+        Return one page of session summaries, newest first, and the token for the next page.
+        Turn documents are excluded. Filtering on doc_type alone lets the (doc_type, timestamp)
+        composite index serve the query; summaries saved before doc_type existed are backfilled
+        at startup by backfill_legacy_sessions.
+        """
+        conditions = ["c.doc_type = @doc_type"]
+        parameters = [{"name": "@doc_type", "value": DOC_TYPE_SESSION}]
+        if from_date:
+            conditions.append("c.timestamp >= @from_date")
+            parameters.append({"name": "@from_date", "value": from_date.isoformat()})
+        if to_date:
+            conditions.append("c.timestamp <= @to_date")
+            parameters.append({"name": "@to_date", "value": to_date.isoformat()})
+
+        query = (
+            "SELECT c.session_id, c.timestamp FROM c WHERE "
+            + " AND ".join(conditions)
+            + " ORDER BY c.timestamp DESC"
+        )
+        pages = self.container.query_items(
+            query=query, parameters=parameters, max_item_count=page_size
+        ).by_page(continuation_token)
+
+        sessions = []
+        try:
+            page = await pages.__anext__()
+            sessions = [
+                {"session_id": item["session_id"], "created_at": item.get("timestamp")}
+                async for item in page
+            ]
+        except StopAsyncIteration:
+            pass
+
+        return {"sessions": sessions, "continuation_token": pages.continuation_token}
+ 
 # Explicit testing scenario
 if __name__ == "__main__":
     orchestrator = Orchestrator()
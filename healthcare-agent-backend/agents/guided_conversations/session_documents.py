@@ -0,0 +1,176 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+# "full" rewrites the whole session document every turn; "incremental" appends turn documents
+# next to a small session summary in the same partition.
+PERSISTENCE_MODE_FULL = "full"
+PERSISTENCE_MODE_INCREMENTAL = "incremental"
+
+DOC_TYPE_SESSION = "session"
+DOC_TYPE_TURN = "turn"
+
+# Given to legacy summaries saved without a timestamp, so they sort after every dated session
+LEGACY_TIMESTAMP = "1970-01-01T00:00:00"
+
+# Backs the sessions listing, which filters on doc_type and orders by timestamp
+SESSION_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "includedPaths": [{"path": "/*"}],
+    "excludedPaths": [{"path": "/conversation/*"}, {"path": "/messages/*"}, {"path": "/\"_etag\"/?"}],
+    "compositeIndexes": [
+        [{"path": "/doc_type", "order": "ascending"}, {"path": "/timestamp", "order": "descending"}],
+        [{"path": "/doc_type", "order": "ascending"}, {"path": "/timestamp", "order": "ascending"}],
+    ],
+}
+
+
+def get_persistence_mode() -> str:
+    """
+    Read COSMOS_PERSISTENCE_MODE, defaulting to the original full-document behaviour.
+    """
+    mode = os.getenv("COSMOS_PERSISTENCE_MODE", PERSISTENCE_MODE_FULL).lower()
+    if mode not in (PERSISTENCE_MODE_FULL, PERSISTENCE_MODE_INCREMENTAL):
+        raise ValueError(f"Unknown COSMOS_PERSISTENCE_MODE '{mode}'. Expected one of: full, incremental.")
+    return mode
+
+
+def turn_id(session_id: str, first_message_index: int) -> str:
+    return f"{session_id}-turn-{first_message_index:06d}"
+
+
+def prepare_turn_item(session_id: str, first_message_index: int, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A turn document holding the messages appended since the previous save.
+    """
+    return {
+        "id": turn_id(session_id, first_message_index),
+        "session_id": session_id,
+        "doc_type": DOC_TYPE_TURN,
+        "turn_index": first_message_index,
+        "messages": messages,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def prepare_summary_item(session_id: str, artifact: Dict[str, Any], message_count: int,
+                         file_urls: List[str] = None) -> Dict[str, Any]:
+    """
+    The session summary document written on the first incremental save. It has no conversation array.
+    """
+    return {
+        "id": session_id,
+        "session_id": session_id,
+        "doc_type": DOC_TYPE_SESSION,
+        "patient_name": artifact.get("name", "Unknown"),
+        "artifact": artifact,
+        "uploaded_files": file_urls or [],
+        "message_count": message_count,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def summary_patch_operations(artifact: Dict[str, Any], message_count: int,
+                             file_urls: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Patch operations that update an existing summary in place. uploaded_files is only touched
+    when new files were given, so a chat turn never needs to read it first.
+    """
+    operations = [
+        {"op": "set", "path": "/doc_type", "value": DOC_TYPE_SESSION},
+        {"op": "set", "path": "/patient_name", "value": artifact.get("name", "Unknown")},
+        {"op": "set", "path": "/artifact", "value": artifact},
+        {"op": "set", "path": "/message_count", "value": message_count},
+        {"op": "set", "path": "/timestamp", "value": datetime.utcnow().isoformat()},
+    ]
+    if file_urls:
+        operations.append({"op": "set", "path": "/uploaded_files", "value": file_urls})
+    return operations
+
+
+def assemble_session(items: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split the documents of one session partition into its summary and the full conversation.
+
+    Sessions written in full mode keep their conversation on the summary; turn documents continue
+    from where that array ends, so older turn documents it already covers are skipped.
+
+    Returns:
+        The summary document (or None) and the ordered list of conversation messages.
+    """
+    summary = None
+    turns = []
+    for item in items:
+        if item.get("doc_type") == DOC_TYPE_TURN:
+            turns.append(item)
+        elif summary is None or item.get("id") == item.get("session_id"):
+            summary = item
+
+    conversation = list((summary or {}).get("conversation") or [])
+    for turn in sorted(turns, key=lambda t: t.get("turn_index", 0)):
+        start = turn.get("turn_index", 0)
+        messages = turn.get("messages") or []
+        if start + len(messages) <= len(conversation):
+            continue
+        conversation.extend(messages[max(0, len(conversation) - start):])
+    return summary, conversation
+
+
+async def read_summary(container, session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Point read of the session summary, whose id and partition key are both the session_id.
+    """
+    try:
+        return await container.read_item(item=session_id, partition_key=session_id)
+    except CosmosResourceNotFoundError:
+        return None
+
+
+async def query_turn_items(container, session_id: str) -> List[Dict[str, Any]]:
+    """
+    The turn documents of a session. They share its partition, so this is a single-partition query.
+    """
+    return [item async for item in container.query_items(
+        query="SELECT * FROM c WHERE c.session_id = @session_id AND c.doc_type = @doc_type",
+        parameters=[
+            {"name": "@session_id", "value": session_id},
+            {"name": "@doc_type", "value": DOC_TYPE_TURN},
+        ],
+        partition_key=session_id,
+    )]
+
+
+async def read_session(container, session_id: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read a session summary and its full conversation. Sessions saved in full mode are a single
+    point read; turn documents are only queried when the summary says messages live outside it.
+    """
+    summary = await read_summary(container, session_id)
+    if summary is None:
+        return None, []
+    if len(summary.get("conversation") or []) >= summary.get("message_count", 0):
+        return summary, list(summary.get("conversation") or [])
+    return assemble_session([summary] + await query_turn_items(container, session_id))
+
+
+async def backfill_session_doc_type(container) -> int:
+    """
+    Set doc_type (and a timestamp where missing) on summaries saved before doc_type existed,
+    so the sessions listing can filter on doc_type alone and be served by the composite index.
+    Only documents without doc_type are read, so once every summary has it this is a cheap no-op.
+
+    Returns:
+        The number of summaries updated.
+    """
+    items = [item async for item in container.query_items(
+        query="SELECT c.id, c.session_id, c.timestamp FROM c WHERE NOT IS_DEFINED(c.doc_type)",
+    )]
+    for item in items:
+        operations = [{"op": "set", "path": "/doc_type", "value": DOC_TYPE_SESSION}]
+        if not item.get("timestamp"):
+            operations.append({"op": "set", "path": "/timestamp", "value": LEGACY_TIMESTAMP})
+        await container.patch_item(
+            item=item["id"], partition_key=item["session_id"], patch_operations=operations
+        )
+    return len(items)
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict
+
+from services.metrics import registry
+
+SESSION_LOCK_WAIT_SECONDS = registry.histogram(
+    "session_lock_wait_seconds",
+    "Time a turn waited for the previous turn of the same session to finish.",
+)
+SESSION_LOCK_WAITERS = registry.gauge(
+    "session_lock_waiters",
+    "Turns currently queued behind another turn of the same session.",
+)
+
+
+@dataclass
+class _SessionLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class SessionLocks:
+    """
+    One asyncio lock per active session, so turns of a session run one at a time in arrival order
+    while turns of different sessions run concurrently. Locks are dropped once no turn holds or awaits them.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, _SessionLock] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, session_id: str, operation: str = "message"):
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _SessionLock()
+        entry.users += 1
+
+        waiting = entry.lock.locked()
+        if waiting:
+            SESSION_LOCK_WAITERS.inc()
+        started = time.perf_counter()
+        try:
+            async with entry.lock:
+                if waiting:
+                    SESSION_LOCK_WAITERS.dec()
+                    waiting = False
+                SESSION_LOCK_WAIT_SECONDS.observe(time.perf_counter() - started, operation=operation)
+                yield
+        finally:
+            if waiting:
+                SESSION_LOCK_WAITERS.dec()
+            entry.users -= 1
+            if entry.users == 0 and self._locks.get(session_id) is entry:
+                del self._locks[session_id]
@@ -0,0 +1,265 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.metrics import registry
+from services.session_store import SessionStore
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_IDLE_TTL_SECONDS = 30 * 60
+DEFAULT_SWEEP_INTERVAL_SECONDS = 60
+
+LIVE_SESSIONS = registry.gauge("conversation_sessions_live", "Conversation sessions resident in memory.")
+RETAINED_BYTES = registry.gauge("conversation_sessions_bytes", "Estimated memory retained by resident conversation sessions.")
+EVICTIONS = registry.counter("conversation_session_evictions_total", "Sessions evicted from memory, by reason.")
+
+
+@dataclass
+class PooledSession:
+    """A single pooled conversation engine and the bookkeeping used for eviction."""
+
+    value: Any
+    size_bytes: int = 0
+    pins: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class SessionPool:
+    """
+    Session-keyed pool of conversation engines with a bounded size and LRU eviction.
+
+    Engines are created on first use through `factory`. When a session is not resident,
+    `loader` is asked to rehydrate it from persisted state before a fresh engine is built.
+    Least recently used sessions are evicted once either `max_sessions` or `max_bytes` is
+    exceeded, and `on_evict` is called for each of them. Sessions idle for longer than a TTL
+    are removed by `sweep_idle`. Sessions that are checked out are never evicted.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        loader: Optional[Callable[[str], Awaitable[Any]]] = None,
+        on_evict: Optional[Callable[[str, Any], Any]] = None,
+        size_of: Optional[Callable[[Any], int]] = None,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.factory = factory
+        self.loader = loader
+        self.on_evict = on_evict
+        self.size_of = size_of or (lambda value: 0)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, PooledSession]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def peek(self, session_id: str) -> Any:
+        """Return the resident engine for a session without touching its LRU position."""
+        entry = self._entries.get(session_id)
+        return entry.value if entry else None
+
+    @asynccontextmanager
+    async def checkout(self, session_id: str):
+        """
+        Yield the engine for a session, loading or creating it if needed.
+
+        The session is pinned while checked out, and its size is re-measured on release
+        so that growth during a turn counts against the pool limits.
+        """
+        entry = await self._get_entry(session_id)
+        entry.pins += 1
+        await self._enforce_limits()
+        try:
+            yield entry.value
+        finally:
+            entry.pins -= 1
+            entry.last_access = time.monotonic()
+            if self._entries.get(session_id) is entry:
+                self._resize(entry)
+            await self._enforce_limits()
+            self._publish_stats()
+
+    async def discard(self, session_id: str) -> None:
+        """Drop a session from the pool without calling `on_evict`."""
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+            self._publish_stats()
+
+    async def sweep_idle(self, ttl_seconds: float, now: Optional[float] = None) -> List[str]:
+        """
+        Evict every session that is not checked out and has not been used for `ttl_seconds`.
+
+        Returns:
+            The ids of the evicted sessions.
+        """
+        now = time.monotonic() if now is None else now
+        evicted: List[Tuple[str, Any]] = []
+        for session_id, entry in list(self._entries.items()):
+            if entry.pins == 0 and now - entry.last_access >= ttl_seconds:
+                evicted.append((session_id, self._remove(session_id, reason="idle")))
+        await self._notify_evicted(evicted)
+        self._publish_stats()
+        return [session_id for session_id, _ in evicted]
+
+    async def clear(self) -> None:
+        """Evict every session that is not checked out, e.g. on shutdown."""
+        evicted = [
+            (session_id, self._remove(session_id, reason="shutdown"))
+            for session_id, entry in list(self._entries.items())
+            if entry.pins == 0
+        ]
+        await self._notify_evicted(evicted)
+        self._publish_stats()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    async def _get_entry(self, session_id: str) -> PooledSession:
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(session_id)
+            entry.last_access = time.monotonic()
+            return entry
+
+        self.misses += 1
+        value = None
+        if self.loader is not None:
+            value = await self.loader(session_id)
+            if value is not None:
+                self.logger.info(f"Rehydrated session {session_id} from persisted state")
+
+        # Another turn may have populated the session while the loader was awaiting.
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._entries.move_to_end(session_id)
+            return entry
+
+        if value is None:
+            value = self.factory(session_id)
+
+        entry = PooledSession(value=value)
+        self._entries[session_id] = entry
+        self._resize(entry)
+        return entry
+
+    def _resize(self, entry: PooledSession) -> None:
+        size = self.size_of(entry.value)
+        self._total_bytes += size - entry.size_bytes
+        entry.size_bytes = size
+
+    def _over_limits(self) -> bool:
+        return len(self._entries) > self.max_sessions or self._total_bytes > self.max_bytes
+
+    async def _enforce_limits(self) -> None:
+        if not self._over_limits():
+            return
+
+        evicted: List[Tuple[str, Any]] = []
+        for session_id in list(self._entries.keys()):
+            if not self._over_limits():
+                break
+            if self._entries[session_id].pins > 0:
+                continue
+            evicted.append((session_id, self._remove(session_id, reason="capacity")))
+        await self._notify_evicted(evicted)
+
+    def _remove(self, session_id: str, reason: str) -> Any:
+        entry = self._entries.pop(session_id)
+        self._total_bytes -= entry.size_bytes
+        self.evictions += 1
+        EVICTIONS.inc(reason=reason)
+        return entry.value
+
+    def _publish_stats(self) -> None:
+        LIVE_SESSIONS.set(len(self._entries))
+        RETAINED_BYTES.set(self._total_bytes)
+
+    async def _notify_evicted(self, evicted: List[Tuple[str, Any]]) -> None:
+        for session_id, value in evicted:
+            self.logger.info(f"Evicted session {session_id} from the conversation pool")
+            if self.on_evict is None:
+                continue
+            try:
+                result = self.on_evict(session_id, value)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.logger.error(f"Error while evicting session {session_id}: {str(e)}")
+
+
+class SessionSweeper:
+    """
+    Background task that periodically evicts idle sessions from a SessionPool, and drops
+    expired state from the session store the evicted sessions were saved to.
+    """
+
+    def __init__(
+        self,
+        pool: SessionPool,
+        ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+        interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS,
+        store: Optional[SessionStore] = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                evicted = await self.pool.sweep_idle(self.ttl_seconds)
+                if evicted:
+                    self.logger.info(f"Swept {len(evicted)} idle sessions from the conversation pool")
+                if self.store is not None:
+                    expired = await self.store.sweep_expired()
+                    if expired:
+                        self.logger.info(f"Dropped {expired} expired session states from the session store")
+            except Exception as e:
+                self.logger.error(f"Error while sweeping idle sessions: {str(e)}")
@@ -0,0 +1,129 @@
+"""
+Per-turn cost of the Cosmos DB session save strategies.
+
+Replays synthetic conversations against a scratch container and reports latency and request
+units (RU) per turn for:
+
+  read_then_upsert  the original save: query uploaded_files, then upsert the full document
+  upsert_only       uploaded_files kept in session state, so a turn is a single upsert
+  incremental       COSMOS_PERSISTENCE_MODE=incremental: turn document + summary patch in one batch
+
+Run from the backend root:
+
+    python -m benchmarks.cosmos_save_benchmark --sessions 5 --turns 15
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+
+from dotenv import load_dotenv
+from azure.cosmos import CosmosClient, PartitionKey
+
+from agents.guided_conversations import session_documents
+from agents.guided_conversations.guided_conversation.plugins.artifact_handler import ArtifactHandler
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env.dev"))
+
+ARTIFACT = {
+    "name": "Jane Doe",
+    "prescribed_medicine": "Amoxicillin 500mg",
+    "time_of_medicine": "8am and 8pm",
+    "no_of_days_of_medicine": "7",
+    "primary_email": "jane@example.com",
+}
+FILE_URLS = ["https://example.blob.core.windows.net/prescriptions/sample.png"]
+
+
+def _request_charge(container) -> float:
+    headers = container.client_connection.last_response_headers or {}
+    return float(headers.get("x-ms-request-charge", 0))
+
+
+def _turn_messages(turn: int):
+    return [
+        {"role": "user", "content": f"Turn {turn}: I take the medicine twice a day after meals. " * 3},
+        {"role": "assistant", "content": f"Turn {turn}: Thanks, I have noted that. How many days is the course? " * 3},
+    ]
+
+
+def read_then_upsert(container, handler, session_id, history, new_messages, first_turn):
+    charge = 0.0
+    list(container.query_items(
+        query="SELECT c.uploaded_files FROM c WHERE c.session_id = @session_id",
+        parameters=[{"name": "@session_id", "value": session_id}],
+        enable_cross_partition_query=True,
+    ))
+    charge += _request_charge(container)
+    container.upsert_item(handler.prepare_cosmos_item(session_id, ARTIFACT, history, FILE_URLS))
+    return charge + _request_charge(container)
+
+
+def upsert_only(container, handler, session_id, history, new_messages, first_turn):
+    container.upsert_item(handler.prepare_cosmos_item(session_id, ARTIFACT, history, FILE_URLS))
+    return _request_charge(container)
+
+
+def incremental(container, handler, session_id, history, new_messages, first_turn):
+    start = len(history) - len(new_messages)
+    operations = [("upsert", (session_documents.prepare_turn_item(session_id, start, new_messages),))]
+    if first_turn:
+        summary = session_documents.prepare_summary_item(session_id, ARTIFACT, len(history), FILE_URLS)
+        operations.append(("upsert", (summary,)))
+    else:
+        patch = session_documents.summary_patch_operations(ARTIFACT, len(history))
+        operations.append(("patch", (session_id, patch)))
+    container.execute_item_batch(batch_operations=operations, partition_key=session_id)
+    return _request_charge(container)
+
+
+STRATEGIES = {
+    "read_then_upsert": read_then_upsert,
+    "upsert_only": upsert_only,
+    "incremental": incremental,
+}
+
+
+def run(container, strategy, sessions: int, turns: int):
+    handler = ArtifactHandler()
+    save = STRATEGIES[strategy]
+    latencies, charges = [], []
+    for _ in range(sessions):
+        session_id = f"bench-{strategy}-{uuid.uuid4()}"
+        history = []
+        for turn in range(turns):
+            new_messages = _turn_messages(turn)
+            history.extend(new_messages)
+            started = time.perf_counter()
+            charges.append(save(container, handler, session_id, list(history), new_messages, turn == 0))
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, charges
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=15)
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--container", default=os.getenv("COSMOS_BENCHMARK_CONTAINER", "SaveBenchmark"))
+    args = parser.parse_args()
+
+    client = CosmosClient(os.getenv("COSMOS_ENDPOINT"), os.getenv("COSMOS_KEY"))
+    database = client.create_database_if_not_exists(id=os.getenv("COSMOS_DB", "HealthConversations"))
+    container = database.create_container_if_not_exists(
+        id=args.container, partition_key=PartitionKey(path="/session_id"), offer_throughput=400
+    )
+
+    print(f"{'strategy':<18}{'p50 ms':>10}{'p95 ms':>10}{'mean RU':>10}{'last-turn RU':>14}")
+    for strategy in args.strategies:
+        latencies, charges = run(container, strategy, args.sessions, args.turns)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(
+            f"{strategy:<18}{statistics.median(latencies):>10.1f}{p95:>10.1f}"
+            f"{statistics.mean(charges):>10.2f}{charges[-1]:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Two-step vs single-call planning in GuidedConversation.step_conversation.
+
+Runs the same scripted prescription conversations in both planning modes against the configured
+Azure OpenAI deployment and reports, per mode, the latency of each conversation step, the share
+of plan/execute attempts whose tool calls passed validation and the share of prompt tokens that
+were served from the endpoint's prompt cache.
+
+Run from the backend root:
+
+    python -m benchmarks.plan_mode_benchmark --conversations 5 --prompt-layout cache_friendly
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+
+# Importing data_collection puts the vendored guided_conversation package on sys.path
+from agents.guided_conversations.data_collection import HealthArtifact
+from guided_conversation.plugins.guided_conversation_agent import PLAN_VALIDATION_TOTAL, GuidedConversation, PlanMode
+from guided_conversation.utils.openai_tool_calling import ToolValidationResult
+from guided_conversation.utils.prompt_functions import PROMPT_CACHED_TOKENS_TOTAL, PROMPT_TOKENS_TOTAL, PromptLayout
+from guided_conversation.utils.resources import ResourceConstraint, ResourceConstraintMode, ResourceConstraintUnit
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env.dev"))
+
+SERVICE_ID = "plan_mode_benchmark"
+
+SCRIPT = [
+    "I'd like to answer the questions.",
+    "My name is Jane Doe.",
+    "I was prescribed Amoxicillin 500mg.",
+    "I take it twice a day, at 8am and 8pm.",
+    "For 7 days.",
+    "My email is jane@example.com",
+    "Yes, that's all correct.",
+]
+
+
+def build_conversation(kernel: Kernel, plan_mode: PlanMode, prompt_layout: PromptLayout) -> GuidedConversation:
+    return GuidedConversation(
+        kernel=kernel,
+        artifact=HealthArtifact,
+        rules=["DO NOT provide medical advice.", "Stay strictly within prescription-related details."],
+        conversation_flow="""
+        1. Ask explicitly if user wants to upload prescriptions or answer questions.
+        2. Collect explicitly structured fields: name, medicine, time, duration, email.
+        3. Explicitly confirm details and explicitly allow user updates.
+        """,
+        context="You're a health assistant collecting prescription details.",
+        resource_constraint=ResourceConstraint(
+            quantity=15, unit=ResourceConstraintUnit.TURNS, mode=ResourceConstraintMode.MAXIMUM
+        ),
+        service_id=SERVICE_ID,
+        plan_mode=plan_mode,
+        prompt_layout=prompt_layout,
+    )
+
+
+def attempts(mode: PlanMode):
+    success = PLAN_VALIDATION_TOTAL.value(mode=mode.value, result=ToolValidationResult.SUCCESS.name.lower())
+    total = sum(
+        PLAN_VALIDATION_TOTAL.value(mode=mode.value, result=result.name.lower()) for result in ToolValidationResult
+    )
+    return success, total
+
+
+def cached_tokens(layout: PromptLayout):
+    functions = ("conversation_plan_function", "execution", "plan_and_execute_function")
+    cached = sum(PROMPT_CACHED_TOKENS_TOTAL.value(function=f, layout=layout.value) for f in functions)
+    total = sum(PROMPT_TOKENS_TOTAL.value(function=f, layout=layout.value) for f in functions)
+    return cached, total
+
+
+async def run(kernel: Kernel, mode: PlanMode, layout: PromptLayout, conversations: int):
+    latencies = []
+    for _ in range(conversations):
+        gc = build_conversation(kernel, mode, layout)
+        for user_input in [None] + SCRIPT:
+            started = time.perf_counter()
+            output = await gc.step_conversation(user_input=user_input)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if output.is_conversation_over:
+                break
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=5)
+    parser.add_argument(
+        "--prompt-layout", type=PromptLayout, choices=list(PromptLayout), default=PromptLayout.INTERLEAVED
+    )
+    parser.add_argument("--deployment", default=os.getenv("AZURE_OPENAI_DEPLOYMENT", "chat-completion"))
+    args = parser.parse_args()
+
+    kernel = Kernel()
+    kernel.add_service(AzureChatCompletion(
+        deployment_name=args.deployment,
+        api_version="2025-01-01-preview",
+        endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        service_id=SERVICE_ID,
+    ))
+
+    print(f"{'mode':<14}{'steps':>7}{'p50 ms':>10}{'p95 ms':>10}{'valid attempts':>17}{'cached tokens':>15}")
+    for mode in PlanMode:
+        cached_before, total_before = cached_tokens(args.prompt_layout)
+        latencies = await run(kernel, mode, args.prompt_layout, args.conversations)
+        success, total = attempts(mode)
+        cached, prompt_tokens = cached_tokens(args.prompt_layout)
+        cached, prompt_tokens = cached - cached_before, prompt_tokens - total_before
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        rate = f"{success}/{total} ({success / total:.0%})" if total else "n/a"
+        cache_rate = f"{cached / prompt_tokens:.0%}" if prompt_tokens else "n/a"
+        print(
+            f"{mode.value:<14}{len(latencies):>7}{statistics.median(latencies):>10.0f}{p95:>10.0f}"
+            f"{rate:>17}{cache_rate:>15}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Per-turn CPU cost of preparing the guided conversation prompt functions.
+
+A two-step turn renders the planning and execution prompts. This compares, without calling the model:
+
+  add_function  the original path: kernel.add_function(prompt=..., template_format="handlebars") on every call,
+                which creates the KernelFunction and parses the handlebars template again
+  shared        the prompt functions built once at import and reused with per-call arguments and settings
+
+Each iteration renders both prompts, so the difference between the two rows is the construction overhead.
+
+Run from the backend root:
+
+    python -m benchmarks.prompt_function_benchmark --turns 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.functions import KernelArguments
+
+# Importing data_collection puts the vendored guided_conversation package on sys.path
+import agents.guided_conversations.data_collection  # noqa: F401
+from guided_conversation.functions.conversation_plan import (
+    conversation_plan_prompt_functions,
+    conversation_plan_template,
+)
+from guided_conversation.functions.execution import execution_functions, execution_template
+from guided_conversation.utils.prompt_functions import PromptLayout, prompt_arguments
+
+PLAN_ARGUMENTS = {
+    "context": "You're a health assistant collecting prescription details.",
+    "artifact_schema": '{"name": "str", "prescribed_medicine": "str", "primary_email": "str"}',
+    "rules": "DO NOT provide medical advice.",
+    "current_state_description": "Collect name, medicine, time, duration, email.",
+    "show_agenda": True,
+    "remaining_resource": 10,
+    "total_resource_str": "does not exceed the remaining turns (10).",
+    "ample_time_str": "",
+    "termination_instructions": "",
+    "resource_instructions": "",
+    "chat_history": "[Turn 1]\nUser: My name is Jane Doe.",
+    "agenda_state": "1. [2 turns] Collect medicine details",
+    "artifact_state": '{"name": "Jane Doe"}',
+}
+EXECUTION_ARGUMENTS = {
+    "artifact_schema": PLAN_ARGUMENTS["artifact_schema"],
+    "reasoning": "Update artifact field name to Jane Doe, then send a message asking for the medicine.",
+}
+
+
+async def render(kernel: Kernel, function, arguments: KernelArguments) -> str:
+    return await function.prompt_template.render(kernel, arguments)
+
+
+async def add_function_turn(kernel: Kernel, settings: PromptExecutionSettings):
+    plan = kernel.add_function(
+        prompt=conversation_plan_template,
+        function_name="conversation_plan_function",
+        plugin_name="conversation_plan",
+        template_format="handlebars",
+        prompt_execution_settings=settings,
+    )
+    await render(kernel, plan, KernelArguments(**PLAN_ARGUMENTS))
+    execution = kernel.add_function(
+        prompt=execution_template,
+        function_name="execution",
+        plugin_name="execution",
+        template_format="handlebars",
+        prompt_execution_settings=settings,
+    )
+    await render(kernel, execution, KernelArguments(**EXECUTION_ARGUMENTS))
+
+
+async def shared_turn(kernel: Kernel, settings: PromptExecutionSettings):
+    plan = conversation_plan_prompt_functions[PromptLayout.INTERLEAVED]
+    await render(kernel, plan, prompt_arguments(settings, **PLAN_ARGUMENTS))
+    execution = execution_functions[PromptLayout.INTERLEAVED]
+    await render(kernel, execution, prompt_arguments(settings, **EXECUTION_ARGUMENTS))
+
+
+async def run(turn, turns: int) -> list[float]:
+    kernel = Kernel()
+    settings = PromptExecutionSettings(service_id="prompt_function_benchmark")
+    timings = []
+    for _ in range(turns):
+        started = time.process_time()
+        await turn(kernel, settings)
+        timings.append((time.process_time() - started) * 1000)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'path':<14}{'turns':>7}{'p50 ms':>10}{'mean ms':>10}")
+    for name, turn in (("add_function", add_function_turn), ("shared", shared_turn)):
+        timings = await run(turn, args.turns)
+        print(f"{name:<14}{len(timings):>7}{statistics.median(timings):>10.3f}{statistics.mean(timings):>10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,17 @@
+from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi import APIRouter, HTTPException, File, UploadFile, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from agents.guided_conversations.orchestrator_main import Orchestrator
 import services.extraction as extraction
 from services.blob_service import BlobStorageService
+from services.connection_manager import connection_manager
+from services.event_stream import EventStream
+from services.metrics import registry as metrics_registry
 router = APIRouter()
+SESSIONS_PAGE_SIZE = 20
+SESSIONS_MAX_PAGE_SIZE = 100
 orchestrator = Orchestrator()
 blob_service = BlobStorageService()
 # Pydantic models for response clarity
@@ -53,12 +60,74 @@ async def handle_user_message(session_id: str, request: UserMessageRequest):
         raise HTTPException(status_code=500, detail=str(e))
  
  
+@router.post("/conversation/{session_id}/message/stream", summary="Handle user message, streaming progress as Server-Sent Events")
+async def stream_user_message(session_id: str, request: UserMessageRequest):
+    """
+    Same as /message, but responds with Server-Sent Events: "message" with the reply as soon as it is known,
+    "artifact_update" for each updated field, then "done" with is_conversation_over (or "error").
+    The turn is persisted after "done" has been sent.
+    """
+    stream = EventStream()
+    stream.run(orchestrator.handle_user_message(session_id, request.user_input, on_event=stream.push))
+    return StreamingResponse(
+        stream.sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/conversation/{session_id}/ws")
+async def conversation_channel(websocket: WebSocket, session_id: str):
+    """
+    Long-lived channel for a session. The client sends {"type": "message", "user_input": "..."} and receives
+    the same events as the streaming endpoint ("message", "artifact_update", "done", "error"), plus
+    "upload_status" while a prescription uploaded for this session is being processed.
+    """
+    await connection_manager.connect(session_id, websocket)
+
+    async def push(event: str, data: dict):
+        await connection_manager.send(session_id, event, data)
+
+    try:
+        while True:
+            try:
+                payload = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON."})
+                continue
+
+            is_message = isinstance(payload, dict) and payload.get("type") == "message"
+            user_input = payload.get("user_input") if is_message else None
+            if not user_input:
+                await websocket.send_json({
+                    "type": "error",
+                    "detail": 'Expected {"type": "message", "user_input": "..."}.'
+                })
+                continue
+
+            try:
+                await orchestrator.handle_user_message(session_id, user_input, on_event=push)
+            except Exception as e:
+                print(f"[ERROR] WebSocket turn failed for session {session_id}: {str(e)}")
+                await push("error", {"detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        connection_manager.disconnect(session_id, websocket)
+
+
 @router.post("/conversation/{session_id}/upload", response_model=UploadResponse)
 async def upload_prescription(session_id: str, file: UploadFile = File(...)):
     """
     Upload a prescription file, process with Document Intelligence and return extracted details.
     """
+    # Clients connected to the session's WebSocket channel get processing status as it happens
+    async def push(event: str, data: dict):
+        await connection_manager.send(session_id, event, data)
+
     try:
+        await push("upload_status", {"status": "received", "filename": file.filename})
+
         # Read file content
         file_content = await file.read()
         content_type = file.content_type
@@ -75,12 +144,15 @@ async def upload_prescription(session_id: str, file: UploadFile = File(...)):
         
         # Get the blob URL
         file_url = blob_metadata["url"]
+        await push("upload_status", {"status": "uploaded", "file_url": file_url})
         
         # Process the prescription via orchestrator
         result = await orchestrator.handle_prescription_upload(
             session_id=session_id,
-            file_urls=[file_url]
+            file_urls=[file_url],
+            on_event=push
         )
+        await push("upload_status", {"status": "completed", "user_details": result.get("user_details", {})})
         
         # Format the response to match UploadResponse model
         return {
@@ -95,6 +167,7 @@ async def upload_prescription(session_id: str, file: UploadFile = File(...)):
         print(f"[ERROR] {error_message}")
         import traceback
         traceback.print_exc()
+        await push("upload_status", {"status": "failed", "detail": error_message})
         raise HTTPException(status_code=500, detail=error_message)
  
 @router.post("/conversation/{session_id}/finalize", summary="Finalize conversation and send email")
@@ -130,17 +203,24 @@ async def get_conversation_history(session_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
  
-@router.get("/conversation/sessions", summary="Retrieve all historical conversation sessions explicitly")
-async def get_all_sessions():
+@router.get("/conversation/sessions", summary="Retrieve historical conversation sessions one page at a time")
+async def get_all_sessions(
+    page_size: int = Query(SESSIONS_PAGE_SIZE, ge=1),
+    continuation_token: Optional[str] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+):
     try:
-        items = list(orchestrator.container.query_items(
-            query="SELECT c.session_id, c.timestamp FROM c",
-            enable_cross_partition_query=True
-        ))
-        sessions = [
-            {"session_id": item["session_id"], "created_at": item["timestamp"]}
-            for item in items
-        ]
-        return {"sessions": sessions}
+        # Page size is capped so one request can never scan the whole container
+        return await orchestrator.list_sessions(
+            page_size=min(page_size, SESSIONS_MAX_PAGE_SIZE),
+            continuation_token=continuation_token,
+            from_date=from_date,
+            to_date=to_date,
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus-style service metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
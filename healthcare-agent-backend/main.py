@@ -1,10 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Security, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from controllers.query_controller import router as query_router
+from controllers.query_controller import router as query_router, orchestrator
+from services.cosmos_client import get_cosmos_resources
 import decode_jwt
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create Cosmos DB containers once, then sweep idle conversation sessions in the background
+    cosmos = get_cosmos_resources()
+    await cosmos.ensure_resources()
+    try:
+        await orchestrator.backfill_legacy_sessions()
+    except Exception as e:
+        # Legacy sessions are only missing from the listing until a later startup succeeds
+        print(f"[ERROR] Failed to backfill legacy session summaries: {str(e)}")
+    await orchestrator.data_collection_agent.start_background_tasks()
+    yield
+    # Flush resident sessions before the shared Cosmos DB client is closed
+    await orchestrator.data_collection_agent.stop_background_tasks()
+    await cosmos.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     
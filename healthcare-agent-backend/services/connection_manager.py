@@ -0,0 +1,44 @@
+from typing import Dict, Set
+from fastapi import WebSocket
+
+
+class ConnectionManager:
+    """
+    Tracks the WebSocket connections open for each conversation session and pushes events to them.
+    A session can have several connections (e.g. two browser tabs); all of them receive every event.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, Set[WebSocket]] = {}
+
+    async def connect(self, session_id: str, websocket: WebSocket) -> None:
+        await websocket.accept()
+        self._connections.setdefault(session_id, set()).add(websocket)
+        print(f"[DEBUG][WebSocket] Connected to session {session_id}")
+
+    def disconnect(self, session_id: str, websocket: WebSocket) -> None:
+        connections = self._connections.get(session_id)
+        if connections is None:
+            return
+        connections.discard(websocket)
+        if not connections:
+            del self._connections[session_id]
+        print(f"[DEBUG][WebSocket] Disconnected from session {session_id}")
+
+    def is_connected(self, session_id: str) -> bool:
+        return session_id in self._connections
+
+    async def send(self, session_id: str, event: str, data: dict) -> None:
+        """
+        Push an event as {"type": event, ...data} to every connection of the session.
+        Connections that fail to receive it are dropped.
+        """
+        for websocket in list(self._connections.get(session_id, ())):
+            try:
+                await websocket.send_json({"type": event, **data})
+            except Exception as e:
+                print(f"[ERROR] Failed to push {event} to session {session_id}: {str(e)}")
+                self.disconnect(session_id, websocket)
+
+
+connection_manager = ConnectionManager()
@@ -0,0 +1,78 @@
+import os
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from azure.cosmos import PartitionKey
+from azure.cosmos.aio import ContainerProxy, CosmosClient
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env.dev"))
+
+
+class CosmosResources:
+    """
+    One async Cosmos DB client (and connection pool) per process, shared by every component that
+    reads or writes Cosmos DB.
+
+    Container clients are handed out synchronously so components can be built at import time.
+    The databases and containers they refer to are created once by `ensure_resources`, which the
+    FastAPI lifespan awaits on startup.
+    """
+
+    def __init__(self, endpoint: str = None, key: str = None):
+        self.client = CosmosClient(endpoint or os.getenv("COSMOS_ENDPOINT"), credential=key or os.getenv("COSMOS_KEY"))
+        self._containers: Dict[Tuple[str, str], dict] = {}
+
+    def get_container(self, database: str, container: str, partition_key_path: str = "/session_id",
+                      offer_throughput: int = 400, **container_options) -> ContainerProxy:
+        """
+        Return a client for a container, registering it to be created by `ensure_resources`.
+
+        Components may share a container. Options given by a later registration (e.g. an indexing_policy)
+        are added to the earlier one; a partition key or option that conflicts with it raises ValueError.
+        """
+        registered = self._containers.setdefault((database, container), {
+            "partition_key": PartitionKey(path=partition_key_path),
+            "offer_throughput": offer_throughput,
+        })
+        if registered["partition_key"] != PartitionKey(path=partition_key_path):
+            raise ValueError(
+                f"Container {database}/{container} is already registered with partition key "
+                f"{registered['partition_key']['paths']}, not {partition_key_path}"
+            )
+        for name, value in container_options.items():
+            if registered.setdefault(name, value) != value:
+                raise ValueError(f"Container {database}/{container} is already registered with a different {name}")
+        return self.client.get_database_client(database).get_container_client(container)
+
+    async def ensure_resources(self) -> None:
+        """
+        Create every registered database and container that does not exist yet. Existing containers
+        missing a registered composite index get their indexing policy updated.
+        """
+        for (database_id, container_id), options in self._containers.items():
+            database = await self.client.create_database_if_not_exists(id=database_id)
+            container = await database.create_container_if_not_exists(id=container_id, **options)
+
+            indexing_policy = options.get("indexing_policy")
+            if indexing_policy and indexing_policy.get("compositeIndexes"):
+                properties = await container.read()
+                current = properties.get("indexingPolicy", {}).get("compositeIndexes", [])
+                if any(index not in current for index in indexing_policy["compositeIndexes"]):
+                    await database.replace_container(
+                        container, partition_key=options["partition_key"], indexing_policy=indexing_policy
+                    )
+                    print(f"[DEBUG][CosmosDB] Updated indexing policy for {database_id}/{container_id}")
+            print(f"[DEBUG][CosmosDB] Container ready: {database_id}/{container_id}")
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+_shared: Optional[CosmosResources] = None
+
+
+def get_cosmos_resources() -> CosmosResources:
+    """Get the process-wide CosmosResources, creating it on first use."""
+    global _shared
+    if _shared is None:
+        _shared = CosmosResources()
+    return _shared
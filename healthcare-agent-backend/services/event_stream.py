@@ -0,0 +1,56 @@
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Optional, Set, Tuple
+
+# Strong references to running turns, so they are not garbage collected when a client goes away
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class EventStream:
+    """
+    Bridges the progress events of a conversation turn to a Server-Sent Events response.
+
+    The turn runs as its own task, so it finishes (including persistence) even if the client
+    disconnects. The response ends as soon as one of the `final_events` has been sent.
+    """
+
+    def __init__(self, final_events: Tuple[str, ...] = ("done", "error")):
+        self.final_events = final_events
+        self._queue: "asyncio.Queue[Optional[Tuple[str, dict]]]" = asyncio.Queue()
+
+    async def push(self, event: str, data: dict) -> None:
+        await self._queue.put((event, data))
+
+    def close(self) -> None:
+        self._queue.put_nowait(None)
+
+    def run(self, turn: Awaitable) -> asyncio.Task:
+        """Run a turn in the background, reporting failures as an "error" event and closing the stream after it."""
+        async def _run():
+            try:
+                await turn
+            except Exception as e:
+                print(f"[ERROR] Streaming turn failed: {str(e)}")
+                await self.push("error", {"detail": str(e)})
+            finally:
+                self.close()
+
+        task = asyncio.create_task(_run())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return task
+
+    async def sse(self) -> AsyncIterator[str]:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            event, data = item
+            yield format_sse(event, data)
+            if event in self.final_events:
+                return
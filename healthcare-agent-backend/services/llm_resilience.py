@@ -0,0 +1,466 @@
+import asyncio
+import contextvars
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import openai
+from pydantic import PrivateAttr
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+
+from services.metrics import registry
+
+LLM_CALLS_TOTAL = registry.counter(
+    "llm_calls_total",
+    "Chat completion calls by operation and outcome "
+    "(success, retried, throttled, exhausted, deadline_exceeded, error).",
+)
+LLM_RETRIES_TOTAL = registry.counter(
+    "llm_retries_total", "Chat completion attempts that were retried, by operation and reason."
+)
+LLM_HEDGES_TOTAL = registry.counter(
+    "llm_hedges_total", "Hedged chat completion requests by operation and which request answered first."
+)
+LLM_CALL_SECONDS = registry.histogram(
+    "llm_call_seconds", "Latency of a chat completion call including retries and backoff, by operation and outcome."
+)
+LLM_DEPLOYMENT_OUTSTANDING = registry.gauge(
+    "llm_deployment_outstanding_requests", "Chat completion requests in flight to a pooled deployment."
+)
+LLM_DEPLOYMENT_REQUESTS_TOTAL = registry.counter(
+    "llm_deployment_requests_total", "Chat completion requests sent to a pooled deployment by outcome."
+)
+LLM_DEPLOYMENT_EJECTIONS_TOTAL = registry.counter(
+    "llm_deployment_ejections_total", "Times a pooled deployment was taken out of rotation after failures."
+)
+
+# Throttling, request timeouts and transient server errors; anything else is returned to the caller at once
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Monotonic time by which the calls of the current turn must stop retrying, set with llm_deadline
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How chat completion calls are retried and hedged.
+
+    A retryable error is retried up to max_attempts attempts in total. The wait before a retry is the service's
+    retry-after when it sends one, otherwise exponential backoff with full jitter between base and max delay.
+    No retry is started that would end past the turn deadline. With hedge_after_seconds set, a request that has
+    not answered by then is also sent to the hedge deployment and the first answer wins.
+    """
+
+    max_attempts: int = 4
+    base_delay_seconds: float = 0.5
+    max_delay_seconds: float = 8.0
+    turn_deadline_seconds: float = 60.0
+    hedge_after_seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        hedge_after = os.getenv("LLM_HEDGE_AFTER_SECONDS")
+        return cls(
+            max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", cls.max_attempts)),
+            base_delay_seconds=float(os.getenv("LLM_BACKOFF_BASE_SECONDS", cls.base_delay_seconds)),
+            max_delay_seconds=float(os.getenv("LLM_BACKOFF_MAX_SECONDS", cls.max_delay_seconds)),
+            turn_deadline_seconds=float(os.getenv("LLM_TURN_DEADLINE_SECONDS", cls.turn_deadline_seconds)),
+            hedge_after_seconds=float(hedge_after) if hedge_after else None,
+        )
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before the given retry (1 for the first), exponential with full jitter."""
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (retry - 1)))
+
+
+@contextmanager
+def llm_deadline(seconds: float):
+    """
+    Bounds the time spent retrying the chat completion calls made inside the block, e.g. one conversation turn.
+    Tasks started inside the block inherit the deadline; a nested block cannot extend it.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _remaining_seconds() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _api_error(error: BaseException) -> Optional[openai.APIError]:
+    """The OpenAI error behind an exception; semantic kernel raises its own exceptions from them."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, openai.APIError):
+            return error
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def retry_reason(error: BaseException) -> Optional[str]:
+    """Why a failed call may be retried ("throttled", "server_error", "timeout" or "connection"), or None."""
+    api_error = _api_error(error)
+    if isinstance(api_error, openai.APIStatusError):
+        if api_error.status_code == 429:
+            return "throttled"
+        return "server_error" if api_error.status_code in RETRYABLE_STATUS_CODES else None
+    if isinstance(api_error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(api_error, openai.APIConnectionError):
+        return "connection"
+    return None
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The wait requested by the service in the retry-after-ms, x-ms-retry-after-ms or retry-after header."""
+    response = getattr(_api_error(error), "response", None)
+    if response is None:
+        return None
+    for header in ("retry-after-ms", "x-ms-retry-after-ms"):
+        try:
+            return float(response.headers[header]) / 1000
+        except (KeyError, ValueError):
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def _hedged(operation: str, call: Callable[[], Awaitable[T]], hedge: Callable[[], Awaitable[T]],
+                  hedge_after: float) -> T:
+    """
+    Runs call, and also hedge if call has not finished after hedge_after seconds. Returns the first result;
+    an error is only raised once both requests have failed.
+    """
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.append(asyncio.ensure_future(hedge()))
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Retrieve every error first, so a failure that lost the race is not reported as never retrieved
+            errors = {task: task.exception() for task in done}
+            for task in sorted(done, key=tasks.index):
+                task_error = errors[task]
+                if task_error is None:
+                    if len(tasks) > 1:
+                        LLM_HEDGES_TOTAL.inc(operation=operation, winner="primary" if task is tasks[0] else "hedge")
+                    return task.result()
+                error = error or task_error
+        if len(tasks) > 1:
+            LLM_HEDGES_TOTAL.inc(operation=operation, winner="none")
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def call_with_retries(operation: str, call: Callable[[], Awaitable[T]], policy: RetryPolicy,
+                            hedge: Optional[Callable[[], Awaitable[T]]] = None,
+                            retry_after: Callable[[BaseException], Optional[float]] = retry_after_seconds) -> T:
+    """
+    Awaits call(), retrying throttled and transient failures according to the policy and the current
+    llm_deadline. hedge, if given, sends the same request to another deployment (see RetryPolicy).
+    retry_after gives the wait the service asked for after an error, if any (by default from the response headers).
+    The last error is raised when the call cannot be retried any more.
+    """
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if hedge is not None and policy.hedge_after_seconds is not None:
+                result = await _hedged(operation, call, hedge, policy.hedge_after_seconds)
+            else:
+                result = await call()
+        except Exception as e:
+            reason = retry_reason(e)
+            outcome = None
+            if reason is None:
+                outcome = "error"
+            elif attempt >= policy.max_attempts:
+                outcome = "throttled" if reason == "throttled" else "exhausted"
+            else:
+                delay = retry_after(e)
+                if delay is None:
+                    delay = policy.backoff(attempt)
+                else:
+                    # A little jitter so that calls throttled together do not all come back at the same moment
+                    delay += random.uniform(0, policy.base_delay_seconds)
+                remaining = _remaining_seconds()
+                if remaining is not None and delay >= remaining:
+                    outcome = "deadline_exceeded"
+            if outcome is not None:
+                LLM_CALLS_TOTAL.inc(operation=operation, outcome=outcome)
+                LLM_CALL_SECONDS.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
+                raise
+            LLM_RETRIES_TOTAL.inc(operation=operation, reason=reason)
+            await asyncio.sleep(delay)
+            continue
+
+        outcome = "success" if attempt == 1 else "retried"
+        LLM_CALLS_TOTAL.inc(operation=operation, outcome=outcome)
+        LLM_CALL_SECONDS.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
+        return result
+
+
+@dataclass
+class DeploymentConfig:
+    """One chat deployment on an Azure OpenAI endpoint."""
+
+    endpoint: str
+    deployment: str
+    api_key: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """The deployment and endpoint host, used as the deployment's metric label."""
+        return f"{self.deployment}@{urlparse(self.endpoint or '').hostname or self.endpoint}"
+
+
+def deployment_configs(default_deployment: str = "chat-completion") -> List[DeploymentConfig]:
+    """
+    The chat deployments listed in AZURE_OPENAI_DEPLOYMENTS, comma-separated endpoint|deployment entries, each
+    optionally followed by |NAME_OF_ITS_API_KEY_VARIABLE (the key is AZURE_OPENAI_API_KEY otherwise).
+    Without it, the single default_deployment on AZURE_OPENAI_ENDPOINT.
+    """
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    value = os.getenv("AZURE_OPENAI_DEPLOYMENTS", "").strip()
+    if not value:
+        return [DeploymentConfig(os.getenv("AZURE_OPENAI_ENDPOINT"), default_deployment, api_key)]
+
+    configs = []
+    for entry in value.split(","):
+        parts = [part.strip() for part in entry.split("|")]
+        if len(parts) not in (2, 3) or not all(parts):
+            raise ValueError(
+                f"Invalid AZURE_OPENAI_DEPLOYMENTS entry '{entry}'. Expected endpoint|deployment[|API_KEY_VARIABLE]."
+            )
+        configs.append(DeploymentConfig(parts[0], parts[1], os.getenv(parts[2]) if len(parts) == 3 else api_key))
+    return configs
+
+
+@dataclass
+class _DeploymentHealth:
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+
+
+# Shared by every pool in the process, so routing sees all the requests in flight to a deployment
+_deployment_health: Dict[str, _DeploymentHealth] = {}
+
+
+class DeploymentPool(Generic[T]):
+    """
+    Spreads requests over several deployments, each request going to the healthy deployment with the fewest
+    requests in flight. A throttled deployment that sends a retry-after is ejected for that long; any deployment
+    is ejected for eject_seconds after eject_after_failures throttled or transient failures in a row. When every
+    deployment is ejected, the one that comes back first is used.
+
+    Members are (name, target) pairs; the target is whatever the send callable of run needs, e.g. a chat service.
+    """
+
+    def __init__(self, members: List[Tuple[str, T]], eject_after_failures: int = 3, eject_seconds: float = 30.0):
+        if not members:
+            raise ValueError("A deployment pool needs at least one deployment.")
+        self.members = members
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        for name, _ in members:
+            _deployment_health.setdefault(name, _DeploymentHealth())
+
+    @classmethod
+    def from_env(cls, members: List[Tuple[str, T]]) -> "DeploymentPool[T]":
+        return cls(
+            members,
+            eject_after_failures=int(os.getenv("LLM_EJECT_AFTER_FAILURES", 3)),
+            eject_seconds=float(os.getenv("LLM_EJECT_SECONDS", 30.0)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def retry_after(self, error: BaseException) -> Optional[float]:
+        """
+        The wait before a request is retried through the pool: none while some deployment is in rotation,
+        since the retry goes there, otherwise until the first ejected deployment comes back.
+        """
+        wait = min(_deployment_health[name].ejected_until for name, _ in self.members) - time.monotonic()
+        return wait if wait > 0 else None
+
+    def _pick(self) -> Tuple[str, T]:
+        now = time.monotonic()
+        healthy = [member for member in self.members if _deployment_health[member[0]].ejected_until <= now]
+        if not healthy:
+            return min(self.members, key=lambda member: _deployment_health[member[0]].ejected_until)
+        fewest = min(_deployment_health[name].outstanding for name, _ in healthy)
+        return random.choice([member for member in healthy if _deployment_health[member[0]].outstanding == fewest])
+
+    async def run(self, send: Callable[[T], Awaitable[R]]) -> R:
+        """Awaits send(target) for the deployment picked for this request, tracking its health."""
+        name, target = self._pick()
+        health = _deployment_health[name]
+        health.outstanding += 1
+        LLM_DEPLOYMENT_OUTSTANDING.set(health.outstanding, deployment=name)
+        try:
+            result = await send(target)
+        except Exception as e:
+            retryable = retry_reason(e) is not None
+            if retryable:
+                self._record_failure(name, health, e)
+            LLM_DEPLOYMENT_REQUESTS_TOTAL.inc(deployment=name, outcome="failure" if retryable else "error")
+            raise
+        finally:
+            health.outstanding -= 1
+            LLM_DEPLOYMENT_OUTSTANDING.set(health.outstanding, deployment=name)
+        health.consecutive_failures = 0
+        LLM_DEPLOYMENT_REQUESTS_TOTAL.inc(deployment=name, outcome="success")
+        return result
+
+    def _record_failure(self, name: str, health: _DeploymentHealth, error: BaseException) -> None:
+        health.consecutive_failures += 1
+        retry_after = retry_after_seconds(error) if retry_reason(error) == "throttled" else None
+        if retry_after:
+            cooldown = retry_after
+        elif health.consecutive_failures >= self.eject_after_failures:
+            cooldown = self.eject_seconds
+        else:
+            return
+        health.ejected_until = max(health.ejected_until, time.monotonic() + cooldown)
+        health.consecutive_failures = 0
+        LLM_DEPLOYMENT_EJECTIONS_TOTAL.inc(deployment=name)
+
+
+def _send_chat_request(service: AzureChatCompletion, chat_history, settings):
+    # Each request fills in its deployment as the model, so every service gets its own copy of the settings
+    request_settings = settings.model_copy(update={"ai_model_id": service.ai_model_id})
+    return service._inner_get_chat_message_contents(chat_history, request_settings)
+
+
+class ResilientAzureChatCompletion(AzureChatCompletion):
+    """
+    AzureChatCompletion whose requests go through call_with_retries. With a deployment pool, every attempt is
+    routed by the pool, so a retry or a hedge usually lands on another deployment; otherwise requests go to this
+    service's deployment and can be hedged to a second chat service. The OpenAI clients' own retries are turned
+    off so that the retry policy alone decides. Streaming requests are sent once, as before.
+    """
+
+    _retry_policy: RetryPolicy = PrivateAttr(default_factory=RetryPolicy)
+    _hedge_service: Optional[AzureChatCompletion] = PrivateAttr(default=None)
+    _pool: Optional[DeploymentPool[AzureChatCompletion]] = PrivateAttr(default=None)
+
+    def __init__(self, retry_policy: RetryPolicy = None, hedge_service: AzureChatCompletion = None,
+                 pool: DeploymentPool[AzureChatCompletion] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.client = self.client.with_options(max_retries=0)
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._hedge_service = hedge_service
+        self._pool = pool
+
+    async def _inner_get_chat_message_contents(self, chat_history, settings):
+        pool = self._pool
+        if pool is not None:
+            def send():
+                return pool.run(lambda service: _send_chat_request(service, chat_history, settings))
+        else:
+            inner = super()._inner_get_chat_message_contents
+
+            def send():
+                return inner(chat_history, settings)
+
+        hedge = None
+        if self._hedge_service is not None:
+            hedge_service = self._hedge_service
+
+            def hedge():
+                return _send_chat_request(hedge_service, chat_history, settings)
+        elif pool is not None and len(pool) > 1:
+            # The slow request counts as in flight, so the pool sends the hedge to a less loaded deployment
+            hedge = send
+
+        if pool is not None:
+            return await call_with_retries(
+                self.service_id, send, self._retry_policy, hedge=hedge, retry_after=pool.retry_after
+            )
+        return await call_with_retries(self.service_id, send, self._retry_policy, hedge=hedge)
+
+
+def _azure_chat_service(config: DeploymentConfig, api_version: str, service_id: str = None) -> AzureChatCompletion:
+    service = AzureChatCompletion(
+        deployment_name=config.deployment,
+        api_version=api_version,
+        endpoint=config.endpoint,
+        api_key=config.api_key,
+        service_id=service_id,
+    )
+    service.client = service.client.with_options(max_retries=0)
+    return service
+
+
+def create_chat_service(service_id: str = None, deployment_name: str = "chat-completion",
+                        api_version: str = "2025-01-01-preview") -> ResilientAzureChatCompletion:
+    """
+    Build the chat completion service with the retry policy from the environment
+    (LLM_MAX_ATTEMPTS, LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_MAX_SECONDS, LLM_TURN_DEADLINE_SECONDS).
+    With several deployments in AZURE_OPENAI_DEPLOYMENTS (see deployment_configs), requests are load balanced
+    over them by a DeploymentPool (LLM_EJECT_AFTER_FAILURES, LLM_EJECT_SECONDS) and hedged within the pool when
+    LLM_HEDGE_AFTER_SECONDS is set. Otherwise deployment_name on AZURE_OPENAI_ENDPOINT is used, hedged to
+    LLM_HEDGE_DEPLOYMENT when it and LLM_HEDGE_AFTER_SECONDS are set; the hedge deployment is on
+    AZURE_OPENAI_HEDGE_ENDPOINT (with AZURE_OPENAI_HEDGE_API_KEY) or else on the same endpoint.
+    """
+    configs = deployment_configs(deployment_name)
+    policy = RetryPolicy.from_env()
+
+    pool = None
+    if len(configs) > 1:
+        pool = DeploymentPool.from_env([(config.name, _azure_chat_service(config, api_version)) for config in configs])
+
+    hedge_service = None
+    hedge_deployment = os.getenv("LLM_HEDGE_DEPLOYMENT")
+    if pool is None and hedge_deployment and policy.hedge_after_seconds is not None:
+        hedge_config = DeploymentConfig(
+            os.getenv("AZURE_OPENAI_HEDGE_ENDPOINT", configs[0].endpoint),
+            hedge_deployment,
+            os.getenv("AZURE_OPENAI_HEDGE_API_KEY", configs[0].api_key),
+        )
+        hedge_service = _azure_chat_service(hedge_config, api_version, f"{service_id}_hedge" if service_id else None)
+
+    return ResilientAzureChatCompletion(
+        retry_policy=policy,
+        hedge_service=hedge_service,
+        pool=pool,
+        deployment_name=configs[0].deployment,
+        api_version=api_version,
+        endpoint=configs[0].endpoint,
+        api_key=configs[0].api_key,
+        service_id=service_id,
+    )
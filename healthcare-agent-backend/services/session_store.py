@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from dotenv import load_dotenv
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from services.cosmos_client import CosmosResources, get_cosmos_resources
+from services.metrics import registry
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env.dev"))
+
+DEFAULT_MEMORY_STORE_TTL_SECONDS = 2 * 60 * 60
+DEFAULT_MEMORY_STORE_MAX_BYTES = 64 * 1024 * 1024
+
+STORED_STATES = registry.gauge("session_store_states", "Session states held by an in-process session store.")
+STORED_BYTES = registry.gauge("session_store_bytes", "Encoded bytes held by an in-process session store.")
+
+
+def _json_encode(state: dict) -> bytes:
+    return json.dumps(state, separators=(",", ":")).encode("utf-8")
+
+
+def _json_decode(data: bytes) -> dict:
+    return json.loads(data.decode("utf-8"))
+
+
+class SessionStore(ABC):
+    """
+    Persistence for per-session conversation state, so that any worker can serve any turn.
+
+    State is a JSON-compatible dict. Stores that keep bytes use the `encode`/`decode`
+    callables they were created with.
+    """
+
+    # True when other processes can write to the same store, so cached state may be stale.
+    shared = True
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[dict]:
+        """Return the saved state for a session, or None if there is none."""
+
+    @abstractmethod
+    async def save(self, session_id: str, state: dict) -> None:
+        """Persist the state for a session, replacing any previous state."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Remove the saved state for a session."""
+
+    async def sweep_expired(self, now: Optional[float] = None) -> int:
+        """
+        Drop state that has outlived the store's TTL and return how many sessions were dropped.
+        Shared stores keep state until it is deleted, so by default nothing is dropped.
+        """
+        return 0
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local store holding encoded state. Only suitable for a single worker.
+
+    State not saved or loaded for `ttl_seconds` expires, and the least recently used state is
+    dropped once `max_sessions` or `max_bytes` is exceeded. A session dropped here is rebuilt
+    from its Cosmos DB session document when it is next used.
+    """
+
+    shared = False
+
+    def __init__(self, encode: Callable[[dict], bytes] = _json_encode, decode: Callable[[bytes], dict] = _json_decode,
+                 max_sessions: int = 10000, max_bytes: int = DEFAULT_MEMORY_STORE_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_MEMORY_STORE_TTL_SECONDS):
+        self.encode = encode
+        self.decode = decode
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # Ordered from least to most recently used: (encoded state, last use)
+        self._states: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    async def load(self, session_id: str) -> Optional[dict]:
+        self._expire(time.monotonic())
+        entry = self._states.get(session_id)
+        if entry is None:
+            return None
+        data, _ = entry
+        self._states[session_id] = (data, time.monotonic())
+        self._states.move_to_end(session_id)
+        return self.decode(data)
+
+    async def save(self, session_id: str, state: dict) -> None:
+        data = self.encode(state)
+        self._pop(session_id)
+        self._states[session_id] = (data, time.monotonic())
+        self._total_bytes += len(data)
+        # The state just saved is kept even when it alone exceeds max_bytes
+        while len(self._states) > 1 and (len(self._states) > self.max_sessions or self._total_bytes > self.max_bytes):
+            self._pop(next(iter(self._states)))
+        self._expire(time.monotonic())
+
+    async def delete(self, session_id: str) -> None:
+        self._pop(session_id)
+        self._publish_stats()
+
+    async def sweep_expired(self, now: Optional[float] = None) -> int:
+        return self._expire(time.monotonic() if now is None else now)
+
+    def _expire(self, now: float) -> int:
+        expired = 0
+        while self._states:
+            session_id, (_, last_used) = next(iter(self._states.items()))
+            if now - last_used < self.ttl_seconds:
+                break
+            self._pop(session_id)
+            expired += 1
+        self._publish_stats()
+        return expired
+
+    def _pop(self, session_id: str) -> None:
+        entry = self._states.pop(session_id, None)
+        if entry is not None:
+            self._total_bytes -= len(entry[0])
+
+    def _publish_stats(self) -> None:
+        STORED_STATES.set(len(self._states), store="memory")
+        STORED_BYTES.set(self._total_bytes, store="memory")
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store backed by a local SQLite file. Shared by all workers on the same node.
+    """
+
+    def __init__(self, path: str, encode: Callable[[dict], bytes] = _json_encode,
+                 decode: Callable[[bytes], dict] = _json_decode):
+        self.path = path
+        self.encode = encode
+        self.decode = decode
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL lets readers in other worker processes proceed while one worker writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            "session_id TEXT PRIMARY KEY, state BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _load(self, session_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state FROM session_state WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _save(self, session_id: str, data: bytes) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO session_state (session_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (session_id, data, time.time()),
+            )
+
+    def _delete(self, session_id: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+
+    async def load(self, session_id: str) -> Optional[dict]:
+        data = await asyncio.to_thread(self._load, session_id)
+        return self.decode(data) if data is not None else None
+
+    async def save(self, session_id: str, state: dict) -> None:
+        await asyncio.to_thread(self._save, session_id, self.encode(state))
+
+    async def delete(self, session_id: str) -> None:
+        await asyncio.to_thread(self._delete, session_id)
+
+
+class CosmosSessionStore(SessionStore):
+    """
+    Store backed by a Cosmos DB container, one document per session partitioned by session_id.
+    Shared by all workers on all nodes.
+    """
+
+    def __init__(self, cosmos: CosmosResources = None):
+        self.cosmos = cosmos or get_cosmos_resources()
+        self.container = self.cosmos.get_container(
+            os.getenv("COSMOS_DB", "HealthConversations"),
+            os.getenv("COSMOS_SESSION_CONTAINER", "SessionState"),
+        )
+
+    async def load(self, session_id: str) -> Optional[dict]:
+        try:
+            item = await self.container.read_item(item=session_id, partition_key=session_id)
+        except CosmosResourceNotFoundError:
+            return None
+        return item.get("state")
+
+    async def save(self, session_id: str, state: dict) -> None:
+        item = {"id": session_id, "session_id": session_id, "state": state, "updated_at": time.time()}
+        await self.container.upsert_item(item)
+
+    async def delete(self, session_id: str) -> None:
+        try:
+            await self.container.delete_item(item=session_id, partition_key=session_id)
+        except CosmosResourceNotFoundError:
+            pass
+
+
+def create_session_store(encode: Callable[[dict], bytes] = _json_encode,
+                         decode: Callable[[bytes], dict] = _json_decode,
+                         cosmos: CosmosResources = None) -> SessionStore:
+    """
+    Build the session store selected by the SESSION_STORE environment variable:
+    "memory" (default, single worker), "sqlite" (workers on one node) or "cosmos" (any number of nodes).
+    The memory store is bounded by SESSION_STORE_TTL_SECONDS and SESSION_STORE_MAX_BYTES.
+    """
+    kind = os.getenv("SESSION_STORE", "memory").lower()
+    if kind == "memory":
+        return InMemorySessionStore(
+            encode=encode,
+            decode=decode,
+            max_bytes=int(os.getenv("SESSION_STORE_MAX_BYTES", DEFAULT_MEMORY_STORE_MAX_BYTES)),
+            ttl_seconds=float(os.getenv("SESSION_STORE_TTL_SECONDS", DEFAULT_MEMORY_STORE_TTL_SECONDS)),
+        )
+    if kind == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_STORE_SQLITE_PATH", "session_state.db"), encode=encode, decode=decode)
+    if kind == "cosmos":
+        return CosmosSessionStore(cosmos)
+    raise ValueError(f"Unknown SESSION_STORE '{kind}'. Expected one of: memory, sqlite, cosmos.")
@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+# The guided conversation modules import each other as the top-level guided_conversation package,
+# which the app makes importable by adding this directory to sys.path (see data_collection.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../../agents/guided_conversations"))
+
+
+@pytest.fixture
+def azure_env(monkeypatch):
+    """Fixture with placeholder Azure settings, enough to build the agents without calling any service."""
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com/")
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "key")
+    monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "2024-06-01")
+    monkeypatch.setenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT", "https://example.cognitiveservices.azure.com/")
+    monkeypatch.setenv("AZURE_DOCUMENT_INTELLIGENCE_KEY", "key")
+    monkeypatch.setenv(
+        "AZURE_COMMUNICATION_SERVICES_CONNECTION_STRING", "endpoint=https://example.communication.azure.com/;accesskey=a2V5"
+    )
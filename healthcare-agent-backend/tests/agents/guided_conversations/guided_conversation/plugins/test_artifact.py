@@ -0,0 +1,42 @@
+import pytest
+from pydantic import BaseModel
+from semantic_kernel import Kernel
+from guided_conversation.plugins.artifact import Artifact
+
+
+class Prescription(BaseModel):
+    name: str
+    primary_email: str
+
+
+@pytest.fixture
+def artifact():
+    """Fixture with an Artifact plugin on a kernel that is never called."""
+    return Artifact(kernel=Kernel(), service_id="gc_main", input_artifact=Prescription, max_artifact_field_retries=2)
+
+
+def test_field_assignment_invalidates_the_state_cache(artifact):
+    """The cached artifact state should be reused until a field is assigned, including assignments made directly."""
+    assert artifact.get_artifact_for_prompt() == {"name": "Unanswered", "primary_email": "Unanswered"}
+    cached = artifact._artifact_prompt_cache
+    artifact.get_artifact_for_prompt()
+    assert artifact._artifact_prompt_cache is cached
+
+    artifact.artifact.name = "Jane"
+
+    assert artifact.get_artifact_for_prompt() == {"name": "Jane", "primary_email": "Unanswered"}
+
+
+def test_field_crossing_the_retry_limit_invalidates_the_schema_cache(artifact):
+    """A failed attempt below the retry limit should keep the cached schema; crossing the limit drops the field."""
+    schema = artifact.get_schema_for_prompt()
+    assert "primary_email" in schema
+
+    artifact.failed_artifact_fields["primary_email"] = [("jane@", "value is not a valid email")]
+    assert artifact.get_schema_for_prompt() is schema
+
+    artifact.failed_artifact_fields["primary_email"].append(("jane@example", "value is not a valid email"))
+    schema = artifact.get_schema_for_prompt()
+    assert "primary_email" not in schema
+    assert "name" in schema
+    assert "primary_email" not in artifact.get_artifact_for_prompt()
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pydantic import BaseModel
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from guided_conversation.plugins import guided_conversation_agent
+from guided_conversation.plugins.guided_conversation_agent import (
+    FINAL_UPDATE_CALLS_AVOIDED_TOTAL,
+    AgendaMode,
+    GuidedConversation,
+    PlanMode,
+)
+from guided_conversation.utils.openai_tool_calling import ToolValidationResult
+from guided_conversation.utils.plugin_helpers import PluginOutput
+from guided_conversation.utils.resources import ResourceConstraint, ResourceConstraintMode, ResourceConstraintUnit
+
+
+class Prescription(BaseModel):
+    name: str
+    prescribed_medicine: str
+
+
+@pytest.fixture
+def agent():
+    """Fixture with a GuidedConversation on a kernel whose chat service is never called."""
+    kernel = Kernel()
+    kernel.add_service(AzureChatCompletion(
+        service_id="gc_main", deployment_name="chat", endpoint="https://example.openai.azure.com/", api_key="key",
+    ))
+    return GuidedConversation(
+        kernel=kernel, artifact=Prescription, rules=[], conversation_flow=None, context=None, resource_constraint=None
+    )
+
+
+def user_says(agent, content):
+    agent.conversation.add_messages(ChatMessageContent(role=AuthorRole.USER, content=content, metadata={}))
+
+
+def fill_artifact(agent):
+    for field_name, value in [("name", "Jane"), ("prescribed_medicine", "Aspirin")]:
+        agent.conversation.add_messages(agent.artifact.try_update_artifact(field_name, value))
+
+
+@pytest.mark.asyncio
+async def test_final_update_is_skipped_when_the_artifact_is_settled(agent):
+    """A complete artifact with no user message after its last update should not call the model at all."""
+    user_says(agent, "I am Jane and I take Aspirin")
+    fill_artifact(agent)
+    avoided = FINAL_UPDATE_CALLS_AVOIDED_TOTAL.value(reason="artifact_settled")
+
+    with patch.object(guided_conversation_agent, "final_update_plan_function", new_callable=AsyncMock) as plan:
+        await agent.final_update({})
+
+    plan.assert_not_awaited()
+    assert FINAL_UPDATE_CALLS_AVOIDED_TOTAL.value(reason="artifact_settled") == avoided + 2
+
+
+@pytest.mark.parametrize("complete", [True, False])
+@pytest.mark.asyncio
+async def test_final_update_runs_after_new_user_input_or_with_open_fields(agent, complete):
+    """A user message after the last update, or an unanswered field, should go through planning and execution,
+    even when the plan's reasoning mentions that other fields need no update."""
+    if complete:
+        fill_artifact(agent)
+    user_says(agent, "Actually my name is Janet")
+    avoided = FINAL_UPDATE_CALLS_AVOIDED_TOTAL.value(reason="artifact_settled")
+    reasoning = MagicMock()
+    reasoning.value = [MagicMock(content="Update name to Janet; otherwise no fields need to be updated.")]
+
+    with patch.object(guided_conversation_agent, "final_update_plan_function", AsyncMock(return_value=reasoning)), \
+         patch.object(guided_conversation_agent, "execution", new_callable=AsyncMock) as execution, \
+         patch.object(guided_conversation_agent, "parse_function_result", return_value={}):
+        await agent.final_update({})
+
+    assert execution.await_args.kwargs["reasoning"].startswith("Update name to Janet")
+    assert FINAL_UPDATE_CALLS_AVOIDED_TOTAL.value(reason="artifact_settled") == avoided
+
+
+@pytest.mark.asyncio
+async def test_background_agenda_update_lands_before_the_next_user_message():
+    """In background mode a step's agenda update should be recorded before the next step adds its user message."""
+    kernel = Kernel()
+    kernel.add_service(AzureChatCompletion(
+        service_id="gc_main", deployment_name="chat", endpoint="https://example.openai.azure.com/", api_key="key",
+    ))
+    agent = GuidedConversation(
+        kernel=kernel, artifact=Prescription, rules=[], conversation_flow=None, context=None,
+        resource_constraint=ResourceConstraint(
+            quantity=10, unit=ResourceConstraintUnit.TURNS, mode=ResourceConstraintMode.MAXIMUM
+        ),
+        plan_mode=PlanMode.SINGLE_CALL, agenda_mode=AgendaMode.BACKGROUND,
+    )
+    executed_plan = MagicMock()
+    executed_plan.value = (
+        ToolValidationResult.SUCCESS,
+        [("update_agenda-update_agenda", {"items": []})],
+        [("send_message_to_user-send_message_to_user", {"message": "Noted."})],
+    )
+
+    async def update_agenda(**kwargs):
+        await asyncio.sleep(0.01)
+        return PluginOutput(True, [ChatMessageContent(role=AuthorRole.ASSISTANT, content="agenda", metadata={})])
+
+    with patch.object(Kernel, "invoke", AsyncMock(return_value=executed_plan)), \
+         patch.object(agent.agenda, "update_agenda", side_effect=update_agenda):
+        await agent.step_conversation("I am Jane")
+        await agent.step_conversation("I take Aspirin")
+        await agent.wait_for_pending_updates()
+
+    contents = [message.content for message in agent.conversation.conversation_messages]
+    assert contents == ["I am Jane", "agenda", "I take Aspirin", "agenda"]
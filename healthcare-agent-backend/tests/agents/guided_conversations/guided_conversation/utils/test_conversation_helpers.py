@@ -0,0 +1,50 @@
+import pytest
+from semantic_kernel.contents import AuthorRole, ChatMessageContent
+from guided_conversation.utils.conversation_helpers import Conversation, ConversationMessageType
+from guided_conversation.utils.history_window import HistoryWindow
+
+EXCLUDE_TYPE_VARIANTS = [
+    None,
+    [ConversationMessageType.REASONING],
+    [ConversationMessageType.ARTIFACT_UPDATE],
+    [ConversationMessageType.REASONING, ConversationMessageType.ARTIFACT_UPDATE],
+]
+
+
+def messages():
+    """Three turns, each with a user message, reasoning, an artifact update and a reply."""
+    result = []
+    for turn in range(3):
+        for role, content, message_type in [
+            (AuthorRole.USER, f"user message {turn}", ConversationMessageType.DEFAULT),
+            (AuthorRole.ASSISTANT, f"reasoning {turn}", ConversationMessageType.REASONING),
+            (AuthorRole.ASSISTANT, f"updated field_{turn}", ConversationMessageType.ARTIFACT_UPDATE),
+            (AuthorRole.ASSISTANT, f"reply {turn}", ConversationMessageType.DEFAULT),
+        ]:
+            result.append(ChatMessageContent(
+                role=role, content=content, metadata={"turn_number": turn, "type": message_type}
+            ))
+    return result
+
+
+def fresh_render(conversation, exclude_types):
+    return Conversation(
+        conversation_messages=list(conversation.conversation_messages), window=conversation.window
+    ).get_repr_for_prompt(exclude_types)
+
+
+@pytest.mark.parametrize("window", [None, HistoryWindow(max_tokens=10_000, recent_turns=1)])
+def test_incremental_render_matches_a_fresh_render(window):
+    """After every appended message, and after set_turn_numbers, each exclude_types variant should render
+    exactly as a conversation rendered from scratch."""
+    conversation = Conversation(window=window)
+    for message in messages():
+        conversation.add_messages(message)
+        for exclude_types in EXCLUDE_TYPE_VARIANTS:
+            assert conversation.get_repr_for_prompt(exclude_types) == fresh_render(conversation, exclude_types)
+
+    conversation.set_turn_numbers(7)
+    for exclude_types in EXCLUDE_TYPE_VARIANTS:
+        rendered = conversation.get_repr_for_prompt(exclude_types)
+        assert rendered == fresh_render(conversation, exclude_types)
+        assert "Turn 7" in rendered and "Turn 0" not in rendered
@@ -0,0 +1,50 @@
+import pytest
+from agents.guided_conversations.guided_conversation.utils.history_window import HistoryWindow
+
+
+@pytest.fixture
+def turns():
+    """Fixture with five turns, each with a user message, reasoning and an artifact update."""
+    return [
+        (
+            f"[Turn {n}]",
+            [
+                (f"User: message {n} " + "x" * 40, False),
+                (f"Reasoning for turn {n} " + "y" * 40, True),
+                (f"Assistant updated field_{n}", True),
+            ],
+        )
+        for n in range(5)
+    ]
+
+
+def test_recent_turns_are_kept_verbatim_and_old_chatter_is_dropped(turns):
+    """Older turns should lose reasoning and artifact updates while recent turns stay complete."""
+    history = HistoryWindow(max_tokens=10_000, recent_turns=2).render(turns)
+
+    assert "Reasoning for turn 2" not in history
+    assert "Assistant updated field_2" not in history
+    assert "User: message 0" in history
+    assert "Reasoning for turn 3" in history
+    assert "Assistant updated field_4" in history
+
+
+def test_oldest_turns_are_dropped_to_fit_the_budget(turns):
+    """When the history does not fit, the oldest turns should be replaced by an omission marker."""
+    window = HistoryWindow(max_tokens=120, recent_turns=2)
+    history = window.render(turns)
+
+    assert window.tokenizer.count(history) <= 120
+    assert history.startswith("[")
+    assert "earlier turn(s) omitted" in history
+    assert "User: message 0" not in history
+    assert history.endswith("Assistant updated field_4")
+
+
+def test_history_never_exceeds_the_budget(turns):
+    """Even the most recent turn should be cut when it alone exceeds the budget."""
+    window = HistoryWindow(max_tokens=10, recent_turns=1)
+    history = window.render(turns)
+
+    assert 0 < window.tokenizer.count(history) <= 10
+    assert history.endswith("field_4")
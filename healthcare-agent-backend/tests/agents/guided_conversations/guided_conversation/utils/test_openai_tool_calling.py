@@ -0,0 +1,70 @@
+import pytest
+from agents.guided_conversations.guided_conversation.utils.openai_tool_calling import (
+    ToolRegistry,
+    ToolValidationResult,
+    validate_tool_calling,
+)
+
+
+def tool_definition(name, properties, required):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": "",
+            "parameters": {
+                "type": "object",
+                "properties": {p: {"type": "string"} for p in properties},
+                "required": required,
+            },
+        },
+    }
+
+
+@pytest.fixture
+def tools():
+    """Fixture with the tool definitions of the artifact and message tools."""
+    return [
+        tool_definition("update_artifact_field-update_artifact_field", ["field", "value"], ["field", "value"]),
+        tool_definition("send_message_to_user-send_message_to_user", ["message"], ["message"]),
+        tool_definition("end_conversation-end_conversation", [], []),
+    ]
+
+
+@pytest.mark.parametrize(
+    "response, expected",
+    [
+        ({}, ToolValidationResult.NO_TOOL_CALLED),
+        (
+            {"tool_names": ["unknown-unknown"], "tool_args_list": [{}]},
+            ToolValidationResult.INVALID_TOOL_CALLED,
+        ),
+        (
+            {"tool_names": ["update_artifact_field-update_artifact_field"], "tool_args_list": [{"field": "name"}]},
+            ToolValidationResult.MISSING_REQUIRED_ARGUMENT,
+        ),
+        (
+            {
+                "tool_names": ["update_artifact_field-update_artifact_field", "end_conversation-end_conversation"],
+                "tool_args_list": [{"field": "name", "value": "Jane"}, {}],
+            },
+            ToolValidationResult.SUCCESS,
+        ),
+    ],
+)
+def test_registry_validates_like_tool_definitions(tools, response, expected):
+    """A prebuilt registry and the raw tool definitions should give the same validation result."""
+    assert validate_tool_calling(response, ToolRegistry.from_tool_definitions(tools)) == expected
+    assert validate_tool_calling(response, tools) == expected
+
+
+def test_with_tools_keeps_existing_definitions(tools):
+    """Extra tool definitions are added, but do not replace a tool that is already registered."""
+    registry = ToolRegistry.from_tool_definitions(tools).with_tools(
+        [
+            tool_definition("send_message_to_user-send_message_to_user", ["message", "tone"], ["message", "tone"]),
+            tool_definition("artifact_plugin-resume_conversation", [], []),
+        ]
+    )
+    assert registry.required_args["send_message_to_user-send_message_to_user"] == {"message"}
+    assert registry.required_args["artifact_plugin-resume_conversation"] == frozenset()
@@ -0,0 +1,55 @@
+import gc
+from semantic_kernel import Kernel
+from semantic_kernel.functions import kernel_function
+from guided_conversation.utils import plugin_helpers
+from guided_conversation.utils.plugin_helpers import get_tool_registry
+
+
+@kernel_function(name="send_message_to_user")
+def send_message(message: str) -> None:
+    pass
+
+
+@kernel_function(name="send_message_to_user")
+def send_message_with_tone(message: str, tone: str) -> None:
+    pass
+
+
+def kernel_with(function):
+    kernel = Kernel()
+    kernel.add_function(plugin_name="send_message_to_user", function=function)
+    return kernel
+
+
+def test_kernels_with_the_same_function_names_get_their_own_registry():
+    """Registries should follow each kernel's parameter schemas, not just its plugin and function names."""
+    plain, with_tone = kernel_with(send_message), kernel_with(send_message_with_tone)
+    name = "send_message_to_user-send_message_to_user"
+
+    assert get_tool_registry(plain).required_args[name] == {"message"}
+    assert get_tool_registry(with_tone).required_args[name] == {"message", "tone"}
+    assert get_tool_registry(plain) is get_tool_registry(plain)
+
+
+def test_replacing_a_function_rebuilds_the_registry():
+    """A function re-registered with other parameters should not be validated against the cached schema."""
+    kernel = kernel_with(send_message)
+    name = "send_message_to_user-send_message_to_user"
+    assert get_tool_registry(kernel).required_args[name] == {"message"}
+
+    kernel.add_function(plugin_name="send_message_to_user", function=send_message_with_tone)
+
+    assert get_tool_registry(kernel).required_args[name] == {"message", "tone"}
+
+
+def test_registries_are_released_with_their_kernel():
+    """Once a kernel is garbage collected its registries should be dropped."""
+    kernel = kernel_with(send_message)
+    get_tool_registry(kernel)
+    kernel_id = id(kernel)
+    assert kernel_id in plugin_helpers._tool_registries
+
+    del kernel
+    gc.collect()
+
+    assert kernel_id not in plugin_helpers._tool_registries
@@ -0,0 +1,90 @@
+import pytest
+from agents.guided_conversations.guided_conversation.utils.snapshot import (
+    SNAPSHOT_VERSION,
+    SnapshotFormat,
+    decode_snapshot,
+    encode_snapshot,
+)
+
+
+@pytest.fixture
+def state():
+    """Fixture mirroring the layout produced by GuidedConversation.to_json."""
+    return {
+        "artifact": {
+            "artifact": {"name": "Jane", "primary_email": "Unanswered"},
+            "failed_fields": {"primary_email": [["jane@", "value is not a valid email"]]},
+        },
+        "agenda": {"agenda": {"items": [{"title": "ask for medicine", "resource": 2}]}},
+        "chat_history": {
+            "conversation": {
+                "conversation_messages": [
+                    {
+                        "role": "user",
+                        "content": "Hi, I'm Jane",
+                        "name": None,
+                        "metadata": {"turn_number": 0, "type": "default"},
+                    }
+                ]
+            }
+        },
+        "resource": {"turn_number": 1, "remaining_units": 14, "elapsed_units": 1},
+    }
+
+
+def test_json_round_trip(state):
+    """A JSON snapshot should decode to the same state, stamped with the current version."""
+    decoded = decode_snapshot(encode_snapshot(state))
+
+    assert decoded["version"] == SNAPSHOT_VERSION
+    assert {k: v for k, v in decoded.items() if k != "version"} == state
+
+
+def test_msgpack_round_trip(state):
+    """A msgpack snapshot should decode to the same state and be smaller than JSON."""
+    pytest.importorskip("msgpack")
+    encoded = encode_snapshot(state, SnapshotFormat.MSGPACK)
+    decoded = decode_snapshot(encoded)
+
+    assert {k: v for k, v in decoded.items() if k != "version"} == state
+    assert len(encoded) < len(encode_snapshot(state, SnapshotFormat.JSON))
+
+
+def test_newer_snapshot_version_is_rejected(state):
+    """Snapshots written by a newer release must not be silently misread."""
+    encoded = encode_snapshot({**state, "version": SNAPSHOT_VERSION + 1})
+
+    with pytest.raises(ValueError):
+        decode_snapshot(encoded)
+
+
+def test_unknown_format_tag_is_rejected():
+    """Bytes without a known format tag should raise instead of being parsed."""
+    with pytest.raises(ValueError):
+        decode_snapshot(b"X{}")
+
+
+def test_conversation_round_trip():
+    """Conversation.from_json should accept the nested metadata written by message_to_json."""
+    pytest.importorskip("semantic_kernel")
+    from semantic_kernel.contents import AuthorRole, ChatMessageContent
+    from agents.guided_conversations.guided_conversation.utils.conversation_helpers import (
+        Conversation,
+        ConversationMessageType,
+    )
+
+    conversation = Conversation()
+    conversation.add_messages(
+        ChatMessageContent(
+            role=AuthorRole.ASSISTANT,
+            content="Assistant updated name to Jane",
+            metadata={"turn_number": 2, "type": ConversationMessageType.ARTIFACT_UPDATE},
+        )
+    )
+
+    restored = Conversation.from_json(decode_snapshot(encode_snapshot(conversation.to_json())))
+
+    message = restored.conversation_messages[0]
+    assert message.content == "Assistant updated name to Jane"
+    assert message.metadata["turn_number"] == 2
+    assert message.metadata["type"] == ConversationMessageType.ARTIFACT_UPDATE
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from agents.guided_conversations import session_documents
+from agents.guided_conversations.data_collection import DataCollectionAgent
+from guided_conversation.plugins.guided_conversation_agent import GCOutput, GuidedConversation
+
+
+@pytest.fixture
+def make_worker(azure_env, monkeypatch, tmp_path):
+    """Fixture returning a factory for agents that share one SQLite session store, like two workers on a node."""
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_SQLITE_PATH", str(tmp_path / "sessions.db"))
+
+    def make_worker(persistence_mode=session_documents.PERSISTENCE_MODE_FULL):
+        monkeypatch.setenv("COSMOS_PERSISTENCE_MODE", persistence_mode)
+        worker = DataCollectionAgent(cosmos=MagicMock())
+        worker.container = AsyncMock()
+        # New sessions have no session document to rehydrate from
+        worker.container.read_item.side_effect = CosmosResourceNotFoundError()
+        return worker
+
+    return make_worker
+
+
+async def run_turn(worker, session_id, content, file_urls=None):
+    """Record a turn without calling the model: append a message, save to Cosmos DB and the session store."""
+    async with worker.session_pool.checkout(session_id) as session:
+        await worker._refresh_session(session_id, session)
+        worker.conversation_history[session_id] = session.history
+        session.history.append({"role": "user", "content": content})
+        await worker._save_artifact_to_cosmos(session_id, {"name": "Jane"}, file_urls)
+        await worker._save_session(session_id, session)
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_what_another_worker_persisted(make_worker):
+    """After another worker handled a turn, the next incremental save should patch and append, not rewrite."""
+    mode = session_documents.PERSISTENCE_MODE_INCREMENTAL
+    worker_a, worker_b = make_worker(mode), make_worker(mode)
+
+    await run_turn(worker_a, "s1", "Hi")
+    await run_turn(worker_b, "s1", "I am Jane")
+    await run_turn(worker_a, "s1", "I take aspirin")
+
+    operations = worker_a.container.execute_item_batch.call_args.kwargs["batch_operations"]
+    turn, summary = operations
+    assert turn[0] == "upsert" and turn[1][0]["turn_index"] == 2
+    assert turn[1][0]["messages"] == [{"role": "user", "content": "I take aspirin"}]
+    assert summary[0] == "patch"
+
+
+@pytest.mark.asyncio
+async def test_uploads_through_another_worker_are_kept(make_worker):
+    """A turn saved after another worker recorded an upload should write the uploaded files back, not drop them."""
+    worker_a, worker_b = make_worker(), make_worker()
+
+    await run_turn(worker_a, "s1", "Hi")
+    await run_turn(worker_b, "s1", "Here is my prescription", file_urls=["https://files/rx.pdf"])
+    await run_turn(worker_a, "s1", "Thanks")
+
+    saved = worker_a.container.upsert_item.call_args.args[0]
+    assert saved["uploaded_files"] == ["https://files/rx.pdf"]
+    assert [message["content"] for message in saved["conversation"]] == ["Hi", "Here is my prescription", "Thanks"]
+
+
+@pytest.mark.asyncio
+async def test_each_session_engine_gets_its_own_kernel(make_worker):
+    """Session tools must be registered on a per-engine kernel, never on the kernel shared by the agent."""
+    worker = make_worker()
+
+    async with worker.session_pool.checkout("s1") as first, worker.session_pool.checkout("s2") as second:
+        assert first.engine.kernel is not second.engine.kernel
+        assert first.engine.kernel.get_service("data_collection_service") is worker.kernel.get_service(
+            "data_collection_service"
+        )
+        update_artifact = first.engine.kernel.get_function("update_artifact_field", "update_artifact_field")
+        assert update_artifact.method.__self__ is first.engine.artifact
+
+    assert not worker.kernel.plugins
+
+
+@pytest.mark.parametrize("store, replies_first", [("memory", True), ("sqlite", False)])
+@pytest.mark.asyncio
+async def test_reply_waits_for_a_background_agenda_update_only_with_a_shared_store(
+    make_worker, monkeypatch, store, replies_first
+):
+    """With a per-process store the reply should not wait for the agenda update, but the turn is still saved."""
+    monkeypatch.setenv("SESSION_STORE", store)
+    worker = make_worker()
+    agenda_updated = asyncio.Event()
+
+    async def step_conversation(engine, user_input, on_event=None):
+        engine._pending_agenda_update = asyncio.create_task(agenda_updated.wait())
+        return GCOutput(ai_message="Noted.")
+
+    with patch.object(GuidedConversation, "step_conversation", step_conversation):
+        turn = asyncio.create_task(worker.handle_user_input("s1", "I am Jane"))
+        await asyncio.sleep(0.05)
+        assert turn.done() is replies_first
+        agenda_updated.set()
+        assert (await turn)["message"] == "Noted."
+
+    # Shutdown flushes a save that is still running
+    await worker.stop_background_tasks()
+    state = await worker.session_store.load("s1")
+    assert state["revision"] == 1
+    assert state["history"] == [{"role": "user", "content": "I am Jane"}, {"role": "assistant", "content": "Noted."}]
@@ -0,0 +1,56 @@
+import pytest
+from semantic_kernel import Kernel
+from agents.guided_conversations.data_collection import HealthArtifact
+from agents.guided_conversations.field_extraction import extract_health_fields
+from agents.guided_conversations.guided_conversation.plugins.artifact import Artifact
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("My name is Jane Doe.", {"name": "Jane Doe"}),
+        ("My email is jane.doe@example.com", {"primary_email": "jane.doe@example.com"}),
+        ("For 7 days.", {"no_of_days_of_medicine": "7"}),
+        ("for a week", {"no_of_days_of_medicine": "7"}),
+        ("I take it twice a day, at 8am and 8pm.", {"time_of_medicine": "twice a day at 8am and 8pm"}),
+        (
+            "3 times daily for 2 weeks",
+            {"time_of_medicine": "3 times daily", "no_of_days_of_medicine": "14"},
+        ),
+        ("I take it at 9am", {"time_of_medicine": "9am"}),
+        ("jane@example.com", {"primary_email": "jane@example.com"}),
+    ],
+)
+def test_obvious_values_are_extracted(text, expected):
+    """Messages carrying a single, easily parsed value should fill the matching fields."""
+    assert extract_health_fields(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Yes, that's all correct.",
+        "I was prescribed Amoxicillin 500mg.",
+        "Not 7 days, 10 days.",
+        "Either a@example.com or b@example.com",
+        "Every 2 days",
+        "I missed my dose 2 days ago",
+        "It has been 3 days since my last dose",
+        "I have had this cough for 3 days",
+        "My appointment is tomorrow at 3pm",
+        "The pharmacy email is rx@pharmacy.com",
+        "",
+    ],
+)
+def test_ambiguous_or_missing_values_are_left_to_the_planner(text):
+    """Nothing should be extracted when a field has no candidate, more than one, or none about the prescription."""
+    assert extract_health_fields(text) == {}
+
+
+def test_extracted_values_only_fill_unanswered_fields():
+    """A rule-based value should never overwrite an answer the artifact already holds."""
+    artifact = Artifact(kernel=Kernel(), service_id="data_collection_service", input_artifact=HealthArtifact)
+
+    assert artifact.try_update_artifact("no_of_days_of_medicine", "7") is not None
+    assert artifact.try_update_artifact("no_of_days_of_medicine", "3") is None
+    assert artifact.artifact.no_of_days_of_medicine == "7"
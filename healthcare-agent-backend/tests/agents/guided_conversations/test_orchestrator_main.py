@@ -1,13 +1,18 @@
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from agents.guided_conversations.orchestrator_main import Orchestrator
+from agents.guided_conversations.session_documents import SESSION_INDEXING_POLICY
+from services.cosmos_client import CosmosResources
 from datetime import datetime
  
 @pytest.fixture
-def orchestrator():
-    """Fixture to instantiate Orchestrator explicitly."""
-    return Orchestrator()
+def orchestrator(azure_env):
+    """Fixture to instantiate Orchestrator explicitly, with a mocked Cosmos DB client."""
+    orchestrator = Orchestrator(cosmos=MagicMock())
+    orchestrator.container = MagicMock()
+    return orchestrator
  
 @pytest.mark.asyncio
 async def test_start_conversation(orchestrator):
@@ -29,7 +34,7 @@ async def test_handle_user_message(orchestrator):
  
         response = await orchestrator.handle_user_message(session_id, user_input)
  
-        mock_handle.assert_called_once_with(session_id, user_input)
+        mock_handle.assert_called_once_with(session_id, user_input, on_event=None)
         assert response['message'] == "Next question?"
         assert response['is_conversation_over'] is False
  
@@ -37,14 +42,14 @@ async def test_handle_user_message(orchestrator):
 async def test_handle_prescription_upload(orchestrator):
     """Test explicitly handling prescription image upload."""
     session_id = 'test_session'
-    image_bytes = b'binary_image_data'
+    file_urls = ['https://files/prescription.png']
  
-    with patch.object(orchestrator.data_collection_agent, 'extract_details_from_image', new_callable=AsyncMock) as mock_extract:
-        mock_extract.return_value = {"medicine": "Paracetamol"}
+    with patch.object(orchestrator.data_collection_agent, 'handle_document_upload_input', new_callable=AsyncMock) as mock_upload:
+        mock_upload.return_value = {"medicine": "Paracetamol"}
  
-        response = await orchestrator.handle_prescription_upload(session_id, image_bytes)
+        response = await orchestrator.handle_prescription_upload(session_id, file_urls)
  
-        mock_extract.assert_called_once_with(session_id, image_bytes)
+        mock_upload.assert_called_once_with(session_id=session_id, file_urls=file_urls, on_event=None)
         assert response["medicine"] == "Paracetamol"
  
 @pytest.mark.asyncio
@@ -53,14 +58,15 @@ async def test_finalize_conversation_and_send_email(orchestrator):
     session_id = 'test_session'
     mock_user_details = {"primary_email": "user@example.com"}
  
-    with patch.object(orchestrator.container, 'query_items') as mock_query, \
+    with patch.object(orchestrator.container, 'read_item', new_callable=AsyncMock) as mock_read, \
          patch.object(orchestrator.email_agent, 'send_email', new_callable=AsyncMock) as mock_send_email:
  
-        mock_query.return_value = iter([{"user_details": mock_user_details}])
+        mock_read.return_value = {"id": session_id, "session_id": session_id, "artifact": mock_user_details}
         mock_send_email.return_value = "Email successfully sent."
  
         response = await orchestrator.finalize_conversation_and_send_email(session_id)
  
+        mock_read.assert_awaited_once_with(item=session_id, partition_key=session_id)
         mock_send_email.assert_called_once_with(mock_user_details)
         assert response['message'] == "Email successfully sent."
  
@@ -69,8 +75,8 @@ async def test_finalize_conversation_no_details_found(orchestrator):
     """Test handling finalizing conversation with no session details explicitly."""
     session_id = 'invalid_session'
  
-    with patch.object(orchestrator.container, 'query_items') as mock_query:
-        mock_query.return_value = iter([])  # Empty result explicitly
+    with patch.object(orchestrator.container, 'read_item', new_callable=AsyncMock) as mock_read:
+        mock_read.side_effect = CosmosResourceNotFoundError(message="Not found")
  
         response = await orchestrator.finalize_conversation_and_send_email(session_id)
  
@@ -82,8 +88,8 @@ async def test_get_conversation_history(orchestrator):
     session_id = 'test_session'
     mock_history = [{"message": "Hello"}, {"message": "Hi there"}]
  
-    with patch.object(orchestrator.container, 'query_items') as mock_query:
-        mock_query.return_value = iter([{"conversation_history": mock_history}])
+    with patch.object(orchestrator.container, 'read_item', new_callable=AsyncMock) as mock_read:
+        mock_read.return_value = {"id": session_id, "session_id": session_id, "conversation": mock_history}
  
         response = await orchestrator.get_conversation_history(session_id)
  
@@ -94,9 +100,62 @@ async def test_get_conversation_history_empty(orchestrator):
     """Test explicitly retrieving empty conversation history."""
     session_id = 'empty_session'
  
-    with patch.object(orchestrator.container, 'query_items') as mock_query:
-        mock_query.return_value = iter([])
+    with patch.object(orchestrator.container, 'read_item', new_callable=AsyncMock) as mock_read:
+        mock_read.side_effect = CosmosResourceNotFoundError(message="Not found")
  
         response = await orchestrator.get_conversation_history(session_id)
  
-        assert response['history'] == []
\ No newline at end of file
+        assert response['history'] == []
+ 
+class FakePages:
+    """Stands in for the async pager returned by query_items(...).by_page(token)."""
+
+    def __init__(self, items, continuation_token):
+        self.items = items
+        self.continuation_token = continuation_token
+
+    async def __anext__(self):
+        async def page():
+            for item in self.items:
+                yield item
+        return page()
+
+@pytest.mark.asyncio
+async def test_list_sessions_pages_with_date_filters(orchestrator):
+    """A page request should filter on doc_type and the dates only, and pass the continuation tokens through."""
+    pages = FakePages([{"session_id": "s2", "timestamp": "2025-01-02T10:00:00"}], continuation_token="next-page")
+    orchestrator.container.query_items.return_value.by_page.return_value = pages
+
+    response = await orchestrator.list_sessions(
+        page_size=5, continuation_token="this-page",
+        from_date=datetime(2025, 1, 1), to_date=datetime(2025, 1, 31),
+    )
+
+    assert response == {
+        "sessions": [{"session_id": "s2", "created_at": "2025-01-02T10:00:00"}],
+        "continuation_token": "next-page",
+    }
+    kwargs = orchestrator.container.query_items.call_args.kwargs
+    assert kwargs["query"] == (
+        "SELECT c.session_id, c.timestamp FROM c WHERE c.doc_type = @doc_type"
+        " AND c.timestamp >= @from_date AND c.timestamp <= @to_date ORDER BY c.timestamp DESC"
+    )
+    assert {p["name"]: p["value"] for p in kwargs["parameters"]} == {
+        "@doc_type": "session", "@from_date": "2025-01-01T00:00:00", "@to_date": "2025-01-31T00:00:00",
+    }
+    assert kwargs["max_item_count"] == 5
+    orchestrator.container.query_items.return_value.by_page.assert_called_once_with("this-page")
+ 
+@pytest.mark.asyncio
+async def test_sessions_container_is_registered_with_the_listing_index(azure_env, monkeypatch):
+    """The composite index behind the sessions listing should be registered even though other components
+    register the same container first without an indexing policy."""
+    monkeypatch.setenv("COSMOS_DB", "HealthConversations")
+    monkeypatch.setenv("COSMOS_CONTAINER", "ExtractedDetails")
+    cosmos = CosmosResources(endpoint="https://example.documents.azure.com:443/", key="a2V5")
+    try:
+        orchestrator = Orchestrator(cosmos=cosmos)
+        options = cosmos._containers[(orchestrator.database_name, orchestrator.container_name)]
+        assert options["indexing_policy"]["compositeIndexes"] == SESSION_INDEXING_POLICY["compositeIndexes"]
+    finally:
+        await cosmos.close()
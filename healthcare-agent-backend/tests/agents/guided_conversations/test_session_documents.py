@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from agents.guided_conversations.session_documents import (
+    LEGACY_TIMESTAMP, assemble_session, backfill_session_doc_type, prepare_turn_item, summary_patch_operations
+)
+
+
+def test_assemble_session_appends_turns_after_legacy_conversation():
+    """Turn documents should continue the conversation stored on a full-mode summary, in order."""
+    summary = {"id": "s1", "session_id": "s1", "conversation": [{"role": "user", "content": "Hi"}]}
+    later = prepare_turn_item("s1", 2, [{"role": "user", "content": "Ibuprofen"}])
+    earlier = prepare_turn_item("s1", 1, [{"role": "assistant", "content": "Which medicine?"}])
+    stale = prepare_turn_item("s1", 0, [{"role": "user", "content": "Hi"}])
+
+    found, conversation = assemble_session([later, summary, stale, earlier])
+
+    assert found is summary
+    assert [m["content"] for m in conversation] == ["Hi", "Which medicine?", "Ibuprofen"]
+
+
+def test_summary_patch_leaves_uploaded_files_alone_without_new_files():
+    """A chat turn must not overwrite the uploaded files recorded by an earlier upload."""
+    paths = [op["path"] for op in summary_patch_operations({"name": "Jane"}, 4)]
+
+    assert "/uploaded_files" not in paths
+    assert "/message_count" in paths
+
+
+@pytest.mark.asyncio
+async def test_backfill_sets_doc_type_and_missing_timestamps_on_legacy_summaries():
+    """Legacy summaries should get doc_type, and a timestamp only when they have none."""
+    async def legacy_items():
+        yield {"id": "s1", "session_id": "s1", "timestamp": "2024-05-01T09:00:00"}
+        yield {"id": "s2", "session_id": "s2"}
+
+    container = MagicMock()
+    container.query_items.return_value = legacy_items()
+    container.patch_item = AsyncMock()
+
+    assert await backfill_session_doc_type(container) == 2
+
+    patches = {call.kwargs["item"]: call.kwargs["patch_operations"] for call in container.patch_item.await_args_list}
+    assert patches["s1"] == [{"op": "set", "path": "/doc_type", "value": "session"}]
+    assert patches["s2"][1] == {"op": "set", "path": "/timestamp", "value": LEGACY_TIMESTAMP}
@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from agents.guided_conversations.session_locks import SessionLocks, SESSION_LOCK_WAIT_SECONDS
+
+
+async def _turn(locks, session_id, events, delay=0.01):
+    async with locks.hold(session_id):
+        events.append((session_id, "start"))
+        await asyncio.sleep(delay)
+        events.append((session_id, "end"))
+
+
+@pytest.mark.asyncio
+async def test_turns_of_one_session_do_not_overlap():
+    """Concurrent turns of the same session should run one after the other, in arrival order."""
+    locks = SessionLocks()
+    events = []
+    waits_before = SESSION_LOCK_WAIT_SECONDS.count(operation="message")
+
+    await asyncio.gather(*(_turn(locks, "a", events) for _ in range(3)))
+
+    assert events == [("a", "start"), ("a", "end")] * 3
+    assert SESSION_LOCK_WAIT_SECONDS.count(operation="message") == waits_before + 3
+    assert len(locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_different_sessions_run_concurrently():
+    """Turns of different sessions should not wait for each other."""
+    locks = SessionLocks()
+    events = []
+
+    await asyncio.gather(_turn(locks, "a", events), _turn(locks, "b", events))
+
+    assert events[:2] == [("a", "start"), ("b", "start")]
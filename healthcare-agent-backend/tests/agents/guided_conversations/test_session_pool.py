@@ -0,0 +1,88 @@
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from agents.guided_conversations.session_pool import SessionPool
+
+
+@pytest.fixture
+def factory():
+    """Fixture returning a factory that builds a distinct engine per session."""
+    return MagicMock(side_effect=lambda session_id: {"session_id": session_id})
+
+
+@pytest.mark.asyncio
+async def test_sessions_get_isolated_engines(factory):
+    """Each session should get its own engine, and repeat lookups should hit the pool."""
+    pool = SessionPool(factory=factory)
+
+    async with pool.checkout("a") as engine_a:
+        pass
+    async with pool.checkout("b") as engine_b:
+        pass
+    async with pool.checkout("a") as engine_a_again:
+        pass
+
+    assert engine_a is not engine_b
+    assert engine_a is engine_a_again
+    assert factory.call_count == 2
+    assert pool.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_by_count(factory):
+    """The least recently used session should be evicted once max_sessions is exceeded."""
+    on_evict = MagicMock()
+    pool = SessionPool(factory=factory, on_evict=on_evict, max_sessions=2)
+
+    for session_id in ["a", "b", "a", "c"]:
+        async with pool.checkout(session_id):
+            pass
+
+    assert "b" not in pool
+    assert "a" in pool and "c" in pool
+    on_evict.assert_called_once_with("b", {"session_id": "b"})
+
+
+@pytest.mark.asyncio
+async def test_eviction_by_bytes_skips_checked_out_sessions(factory):
+    """Sessions in use must never be evicted, even when the byte cap is exceeded."""
+    pool = SessionPool(factory=factory, size_of=lambda engine: 100, max_bytes=150)
+
+    async with pool.checkout("a"):
+        async with pool.checkout("b"):
+            assert "a" in pool and "b" in pool
+        assert "b" not in pool
+    assert pool.total_bytes == 100
+
+
+@pytest.mark.asyncio
+async def test_evicted_session_is_rehydrated(factory):
+    """A miss should ask the loader for persisted state before building a fresh engine."""
+    restored = {"session_id": "a", "restored": True}
+    loader = AsyncMock(side_effect=lambda session_id: restored if session_id == "a" else None)
+    pool = SessionPool(factory=factory, loader=loader)
+
+    async with pool.checkout("a") as engine:
+        assert engine is restored
+    async with pool.checkout("new") as engine:
+        assert engine == {"session_id": "new"}
+
+    factory.assert_called_once_with("new")
+
+
+@pytest.mark.asyncio
+async def test_sweep_idle_evicts_only_expired_unpinned_sessions(factory):
+    """Idle sessions past the TTL should be flushed via on_evict, while busy ones are kept."""
+    on_evict = AsyncMock()
+    pool = SessionPool(factory=factory, on_evict=on_evict)
+
+    for session_id in ["idle", "busy"]:
+        async with pool.checkout(session_id):
+            pass
+
+    async with pool.checkout("busy"):
+        evicted = await pool.sweep_idle(ttl_seconds=60, now=time.monotonic() + 120)
+
+    assert evicted == ["idle"]
+    assert "busy" in pool
+    on_evict.assert_awaited_once_with("idle", {"session_id": "idle"})
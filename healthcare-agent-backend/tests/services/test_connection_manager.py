@@ -0,0 +1,24 @@
+import pytest
+from unittest.mock import AsyncMock
+from services.connection_manager import ConnectionManager
+
+
+@pytest.mark.asyncio
+async def test_events_reach_every_connection_of_the_session_only():
+    """Events should be pushed to all sockets of a session, and broken sockets dropped."""
+    manager = ConnectionManager()
+    tab_a, tab_b, broken, other = AsyncMock(), AsyncMock(), AsyncMock(), AsyncMock()
+    broken.send_json.side_effect = RuntimeError("socket closed")
+    for websocket in (tab_a, tab_b, broken):
+        await manager.connect("session-1", websocket)
+    await manager.connect("session-2", other)
+
+    await manager.send("session-1", "message", {"message": "Hi!"})
+
+    tab_a.send_json.assert_awaited_once_with({"type": "message", "message": "Hi!"})
+    tab_b.send_json.assert_awaited_once_with({"type": "message", "message": "Hi!"})
+    other.send_json.assert_not_awaited()
+
+    manager.disconnect("session-1", tab_a)
+    manager.disconnect("session-1", tab_b)
+    assert not manager.is_connected("session-1")
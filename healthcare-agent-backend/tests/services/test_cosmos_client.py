@@ -0,0 +1,37 @@
+import pytest
+from services.cosmos_client import CosmosResources
+
+
+def placeholder_resources():
+    """CosmosResources on a placeholder account; registering containers makes no requests."""
+    return CosmosResources(endpoint="https://example.documents.azure.com:443/", key="a2V5")
+
+
+@pytest.mark.asyncio
+async def test_later_registrations_add_their_options():
+    """An indexing policy passed by the second component sharing a container should not be dropped."""
+    cosmos = placeholder_resources()
+    policy = {"indexingMode": "consistent"}
+    try:
+        cosmos.get_container("db", "sessions")
+        cosmos.get_container("db", "sessions", indexing_policy=policy)
+        cosmos.get_container("db", "sessions")
+
+        assert cosmos._containers[("db", "sessions")]["indexing_policy"] == policy
+    finally:
+        await cosmos.close()
+
+
+@pytest.mark.asyncio
+async def test_conflicting_registrations_are_rejected():
+    """A second registration with another partition key or option value should raise instead of being ignored."""
+    cosmos = placeholder_resources()
+    try:
+        cosmos.get_container("db", "sessions", indexing_policy={"indexingMode": "consistent"})
+
+        with pytest.raises(ValueError):
+            cosmos.get_container("db", "sessions", partition_key_path="/id")
+        with pytest.raises(ValueError):
+            cosmos.get_container("db", "sessions", indexing_policy={"indexingMode": "none"})
+    finally:
+        await cosmos.close()
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from services.event_stream import EventStream
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_at_done_while_turn_keeps_running():
+    """The response should finish at "done", and the rest of the turn (e.g. persistence) should still complete."""
+    stream = EventStream()
+    persisted = asyncio.Event()
+
+    async def turn():
+        await stream.push("message", {"message": "Hi!"})
+        await stream.push("done", {"is_conversation_over": False})
+        await asyncio.sleep(0.01)
+        persisted.set()
+
+    task = stream.run(turn())
+    events = [chunk async for chunk in stream.sse()]
+
+    assert events == [
+        'event: message\ndata: {"message": "Hi!"}\n\n',
+        'event: done\ndata: {"is_conversation_over": false}\n\n',
+    ]
+    assert not persisted.is_set()
+    await task
+    assert persisted.is_set()
+
+
+@pytest.mark.asyncio
+async def test_failed_turn_is_reported_as_error_event():
+    """A failing turn should end the stream with an "error" event instead of hanging."""
+    stream = EventStream()
+
+    async def turn():
+        raise RuntimeError("model unavailable")
+
+    stream.run(turn())
+    events = [chunk async for chunk in stream.sse()]
+
+    assert events == ['event: error\ndata: {"detail": "model unavailable"}\n\n']
@@ -0,0 +1,165 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from services.llm_resilience import (
+    DeploymentConfig,
+    DeploymentPool,
+    RetryPolicy,
+    call_with_retries,
+    deployment_configs,
+    llm_deadline,
+    retry_after_seconds,
+)
+
+
+def status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://example.openai.azure.com/openai/deployments/chat-completion")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    error_class = openai.RateLimitError if status_code == 429 else openai.APIStatusError
+    return error_class("request failed", response=response, body=None)
+
+
+def flaky(*errors, result="ok"):
+    """A call that raises the given errors in turn, then returns result."""
+    remaining = list(errors)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if remaining:
+            raise remaining.pop(0)
+        return result
+
+    call.calls = calls
+    return call
+
+
+FAST = RetryPolicy(max_attempts=3, base_delay_seconds=0.001, max_delay_seconds=0.001)
+
+
+@pytest.mark.asyncio
+async def test_throttled_call_is_retried_until_it_succeeds():
+    """A 429 followed by a success should return the result after one retry."""
+    call = flaky(status_error(429, {"retry-after-ms": "1"}))
+    assert await call_with_retries("test", call, FAST) == "ok"
+    assert len(call.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_wrapped_errors_are_classified_by_their_cause():
+    """Semantic kernel raises its own exception from the OpenAI error; that should still be retried."""
+    wrapped = RuntimeError("service failed")
+    wrapped.__cause__ = status_error(503)
+    call = flaky(wrapped)
+    assert await call_with_retries("test", call, FAST) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_and_exhausted_retries_are_raised():
+    """A 400 is raised at once, and a call that keeps failing is raised after max_attempts."""
+    bad_request = flaky(status_error(400))
+    with pytest.raises(openai.APIStatusError):
+        await call_with_retries("test", bad_request, FAST)
+    assert len(bad_request.calls) == 1
+
+    throttled = flaky(*[status_error(429) for _ in range(5)])
+    with pytest.raises(openai.RateLimitError):
+        await call_with_retries("test", throttled, FAST)
+    assert len(throttled.calls) == FAST.max_attempts
+
+
+@pytest.mark.asyncio
+async def test_retry_after_past_the_deadline_is_not_waited_for():
+    """When the requested wait does not fit in the turn deadline, the error should be raised right away."""
+    call = flaky(status_error(429, {"retry-after": "30"}))
+    with llm_deadline(1.0):
+        with pytest.raises(openai.RateLimitError):
+            await call_with_retries("test", call, FAST)
+    assert len(call.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged():
+    """A request that is slower than hedge_after_seconds should be answered by the hedge."""
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "primary"
+
+    async def hedge():
+        return "hedge"
+
+    policy = RetryPolicy(hedge_after_seconds=0.01)
+    assert await call_with_retries("test", slow, policy, hedge=hedge) == "hedge"
+
+
+def test_retry_after_headers():
+    """Millisecond headers take precedence over retry-after in seconds."""
+    assert retry_after_seconds(status_error(429, {"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+    assert retry_after_seconds(status_error(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(status_error(429)) is None
+
+
+@pytest.mark.asyncio
+async def test_pool_routes_to_the_deployment_with_fewest_requests_in_flight():
+    """While a request is in flight on one deployment, the next request should go to the other one."""
+    pool = DeploymentPool([("busy@routing", "busy"), ("idle@routing", "idle")])
+    release = asyncio.Event()
+    used = []
+
+    async def send(target):
+        used.append(target)
+        if len(used) == 1:
+            await release.wait()
+        return target
+
+    first = asyncio.ensure_future(pool.run(send))
+    await asyncio.sleep(0)
+    second = await pool.run(send)
+    release.set()
+    assert {await first, second} == {"busy", "idle"}
+
+
+@pytest.mark.asyncio
+async def test_pool_ejects_throttled_deployment_for_its_retry_after():
+    """A 429 with retry-after should take the deployment out of rotation until then."""
+    pool = DeploymentPool([("throttled@ejection", "throttled"), ("healthy@ejection", "healthy")])
+
+    async def send(target):
+        if target == "throttled":
+            raise status_error(429, {"retry-after": "60"})
+        return target
+
+    for _ in range(10):
+        try:
+            await pool.run(send)
+        except openai.RateLimitError:
+            pass
+    assert [await pool.run(send) for _ in range(5)] == ["healthy"] * 5
+    # Retries go to the healthy deployment at once instead of waiting out the retry-after
+    assert pool.retry_after(status_error(429, {"retry-after": "60"})) is None
+
+
+def test_deployment_configs_from_environment(monkeypatch):
+    """Entries are endpoint|deployment with an optional API key variable; without the list the default is used."""
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://east.openai.azure.com/")
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "east-key")
+    monkeypatch.setenv("WEST_KEY", "west-key")
+    monkeypatch.delenv("AZURE_OPENAI_DEPLOYMENTS", raising=False)
+    assert deployment_configs() == [DeploymentConfig("https://east.openai.azure.com/", "chat-completion", "east-key")]
+
+    monkeypatch.setenv(
+        "AZURE_OPENAI_DEPLOYMENTS",
+        "https://east.openai.azure.com/|chat-completion, https://west.openai.azure.com/|gpt-4o|WEST_KEY",
+    )
+    configs = deployment_configs()
+    assert [config.name for config in configs] == [
+        "chat-completion@east.openai.azure.com",
+        "gpt-4o@west.openai.azure.com",
+    ]
+    assert [config.api_key for config in configs] == ["east-key", "west-key"]
+
+    monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENTS", "https://east.openai.azure.com/")
+    with pytest.raises(ValueError):
+        deployment_configs()
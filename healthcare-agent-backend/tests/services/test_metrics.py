@@ -0,0 +1,30 @@
+from services.metrics import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text_format():
+    """Each metric should be rendered with its HELP and TYPE lines followed by one sample per label set."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests by route.")
+    registry.gauge("live_sessions", "Sessions in memory.").set(3)
+    latency = registry.histogram("turn_seconds", "Turn latency.", buckets=(0.1, 1.0))
+
+    requests.inc(route="/chat")
+    requests.inc(2, route="/chat")
+    latency.observe(0.5, mode="full")
+
+    assert registry.counter("requests_total", "ignored") is requests
+    assert registry.render() == "\n".join([
+        "# HELP requests_total Requests by route.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/chat"} 3',
+        "# HELP live_sessions Sessions in memory.",
+        "# TYPE live_sessions gauge",
+        "live_sessions 3",
+        "# HELP turn_seconds Turn latency.",
+        "# TYPE turn_seconds histogram",
+        'turn_seconds_bucket{mode="full",le="0.1"} 0',
+        'turn_seconds_bucket{mode="full",le="1.0"} 1',
+        'turn_seconds_bucket{mode="full",le="+Inf"} 1',
+        'turn_seconds_sum{mode="full"} 0.5',
+        'turn_seconds_count{mode="full"} 1',
+    ]) + "\n"
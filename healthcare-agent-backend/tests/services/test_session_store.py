@@ -0,0 +1,78 @@
+import time
+import pytest
+from services.session_store import InMemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+@pytest.fixture
+def state():
+    """Fixture with a minimal session state as written by DataCollectionAgent._save_session."""
+    return {
+        "artifact": {"artifact": {"name": "Jane"}, "failed_fields": {}},
+        "history": [{"role": "user", "content": "Hi"}],
+        "revision": 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_round_trip(state):
+    """The in-memory store should return what was saved and forget deleted sessions."""
+    store = InMemorySessionStore()
+
+    await store.save("session-1", state)
+
+    assert await store.load("session-1") == state
+    assert await store.load("unknown") is None
+    await store.delete("session-1")
+    assert await store.load("session-1") is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_is_shared_between_instances(tmp_path, state):
+    """Two SQLite stores on the same file (e.g. two workers) should see each other's writes."""
+    path = str(tmp_path / "sessions.db")
+    worker_a = SQLiteSessionStore(path)
+    worker_b = SQLiteSessionStore(path)
+
+    await worker_a.save("session-1", state)
+    assert await worker_b.load("session-1") == state
+
+    state["revision"] = 4
+    await worker_b.save("session-1", state)
+    assert (await worker_a.load("session-1"))["revision"] == 4
+
+
+def test_create_session_store_rejects_unknown_kind(monkeypatch):
+    """A misconfigured SESSION_STORE should fail loudly at startup."""
+    monkeypatch.setenv("SESSION_STORE", "redis")
+
+    with pytest.raises(ValueError):
+        create_session_store()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_expires_idle_state(state):
+    """State not saved or loaded for ttl_seconds should be dropped by a sweep."""
+    store = InMemorySessionStore(ttl_seconds=60)
+    await store.save("session-1", state)
+
+    assert await store.sweep_expired(now=time.monotonic() + 30) == 0
+    assert await store.sweep_expired(now=time.monotonic() + 120) == 1
+    assert await store.load("session-1") is None
+    assert store.total_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_evicts_least_recently_used_over_max_bytes(state):
+    """Once the encoded states exceed max_bytes the least recently used ones should be dropped."""
+    size = len(InMemorySessionStore().encode(state))
+    store = InMemorySessionStore(max_bytes=size * 2)
+
+    await store.save("a", state)
+    await store.save("b", state)
+    await store.load("a")
+    await store.save("c", state)
+
+    assert len(store) == 2
+    assert store.total_bytes == size * 2
+    assert await store.load("b") is None
+    assert await store.load("a") == state
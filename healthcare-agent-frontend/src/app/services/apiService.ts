@@ -129,11 +129,13 @@ const apiService = {
     }
   },
 
-  // Retrieves all conversation sessions
-  async getAllSessions() {
+  // Retrieves one page of conversation sessions, newest first
+  async getAllSessions(continuationToken?: string, pageSize?: number) {
     // console.log('accessToken:', localStorage.getItem('accessToken'));
     try {
-      const response = await apiClient.get('/conversation/sessions');
+      const response = await apiClient.get('/conversation/sessions', {
+        params: { continuation_token: continuationToken, page_size: pageSize },
+      });
       console.log('[apiService] Retrieved sessions:', response.data);
       return response.data;
     } catch (error) {
@@ -192,7 +194,7 @@ export default apiService;
  * - uploadPrescription: Handles prescription image uploads
  * - finalizeConversation: Finalizes conversation and sends email notifications
  * - recognizePii: Processes text for PII entities
- * - getAllSessions: Retrieves all conversation sessions
+ * - getAllSessions: Retrieves a page of conversation sessions
  * - getConversationHistory: Retrieves conversation history for a session
  * - setAuthToken: Stores JWT token in localStorage
  * - clearAuthToken: Removes JWT token from localStorage